@@ -1,6 +1,11 @@
+import asyncio
+
+from solbot_common.cp.wallet_events import WalletEvent, WalletEventProducer, WalletEventType
 from solbot_common.models.tg_bot.user import User as UserModel
+from solbot_db.redis import RedisClient
 from solbot_db.session import NEW_ASYNC_SESSION, provide_session
 from solders.keypair import Keypair  # type: ignore
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import and_, delete, select
 from typing_extensions import Self
@@ -14,6 +19,26 @@ class UserService:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    def _publish_after_commit(
+        self, session: AsyncSession, event_type: WalletEventType, chat_id: int, pubkey: str
+    ) -> None:
+        """事务提交后通知其他服务钱包发生了变化
+
+        调用方可能传入自己的 session，在提交之前通知会让其他服务读到旧数据并重新缓存。
+        """
+        if not hasattr(self, "_wallet_events"):
+            self._wallet_events = WalletEventProducer(RedisClient.get_instance())
+            self._publish_tasks: set[asyncio.Task] = set()
+        wallet_event = WalletEvent(event_type=event_type, pubkey=pubkey, chat_id=chat_id)
+        loop = asyncio.get_running_loop()
+
+        def _publish(_session) -> None:
+            task = loop.create_task(self._wallet_events.publish_event(wallet_event))
+            self._publish_tasks.add(task)
+            task.add_done_callback(self._publish_tasks.discard)
+
+        event.listen(session.sync_session, "after_commit", _publish, once=True)
+
     @provide_session
     async def register(
         self,
@@ -30,6 +55,7 @@ class UserService:
             is_default=is_default,
         )
         session.add(user)
+        self._publish_after_commit(session, WalletEventType.REGISTERED, chat_id, user.pubkey)
 
     @provide_session
     async def set_default(
@@ -66,6 +92,7 @@ class UserService:
             raise ValueError(f"User with chat_id {chat_id} not found")
         user.is_active = is_active
         session.add(user)
+        self._publish_after_commit(session, WalletEventType.ACTIVE_CHANGED, chat_id, pubkey)
 
     @provide_session
     async def is_registered(
@@ -83,6 +110,7 @@ class UserService:
             and_(UserModel.chat_id == chat_id, UserModel.pubkey == pubkey)
         )
         await session.execute(statement)
+        self._publish_after_commit(session, WalletEventType.DELETED, chat_id, pubkey)
 
     @provide_session
     async def get_keypair(
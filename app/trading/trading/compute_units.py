@@ -0,0 +1,323 @@
+"""交易计算单位（CU）统计
+
+优先费用按申请的 CU 数量计算，申请过多既浪费费用，也会降低调度优先级。
+这里按交易类型（路由:方向，如 pump:buy、raydium_v4:sell）记录实际消耗的 CU，
+构建交易时使用 p99 加上余量作为 CU 上限。
+
+样本来源：
+- 确认后的交易详情中的 computeUnitsConsumed
+- 因 CU 不足失败的交易不作为样本（消耗量只是当时的上限），而是把该类型的上限提高到失败时的 1.5 倍
+- 开启 trading.tx_simulate 时的模拟结果
+- 离线校准：python -m trading.compute_units，从历史交易记录统计并保存到 trading.compute_unit_profile
+
+Jupiter 交易的 CU 上限由 Jupiter 模拟后设置（dynamicComputeUnitLimit），这里只做统计。
+"""
+
+import argparse
+import asyncio
+import math
+import os
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+import orjson as json
+from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
+from solbot_common.constants import PUMP_FUN_PROGRAM, RAY_V4
+from solbot_common.log import logger
+from solbot_common.utils.balance_change import TokenBalanceIndex
+from solders.transaction import VersionedTransaction  # type: ignore
+
+DEFAULT_UNIT_LIMIT = 200_000
+MAX_UNIT_LIMIT = 1_400_000
+JUPITER_V6_PROGRAM = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4"
+# 交易因 CU 不足失败后，上限至少提高到失败时消耗的倍数
+EXCEEDED_LIMIT_BUMP = 1.5
+
+# 按日志中出现的程序判断交易路由，聚合器优先
+_ROUTE_PROGRAMS = (
+    ("dex", JUPITER_V6_PROGRAM),
+    ("pump", str(PUMP_FUN_PROGRAM)),
+    ("raydium_v4", str(RAY_V4)),
+)
+
+
+def exceeded_compute_budget(tx_detail: dict, unit_limit: int | None = None) -> bool:
+    """交易是否因 CU 不足失败"""
+    meta = tx_detail.get("meta") or {}
+    err = meta.get("err")
+    if err is None:
+        return False
+    if "ComputationalBudgetExceeded" in str(err):
+        return True
+    units = meta.get("computeUnitsConsumed") or 0
+    return unit_limit is not None and units >= unit_limit
+
+
+def profile_name(route: str, swap_direction: str) -> str:
+    return f"{route}:{swap_direction}"
+
+
+def profile_of(tx_detail: dict) -> str | None:
+    """从交易详情推断交易类型，无法识别时返回 None"""
+    meta = tx_detail.get("meta") or {}
+    logs = "\n".join(meta.get("logMessages") or [])
+    route = next((name for name, program in _ROUTE_PROGRAMS if program in logs), None)
+    if route is None:
+        return None
+    payer = tx_detail["transaction"]["message"]["accountKeys"][0]
+    payer = payer if isinstance(payer, str) else payer["pubkey"]
+    index = TokenBalanceIndex(
+        payer, meta.get("preTokenBalances", []), meta.get("postTokenBalances", [])
+    )
+    if index.mint is None:
+        return None
+    pre_amount, post_amount, _ = index.get(index.mint)
+    if pre_amount == post_amount:
+        return None
+    return profile_name(route, "buy" if post_amount > pre_amount else "sell")
+
+
+class ComputeUnitProfiler:
+    """按交易类型统计 CU 消耗并给出 CU 上限"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        margin: float | None = None,
+        min_samples: int = 20,
+        window: int = 500,
+        profile_path: str | None = None,
+    ) -> None:
+        """
+        Args:
+            margin: 在 p99 之上增加的余量比例，默认使用 trading.compute_unit_margin
+            min_samples: 样本数少于该值时使用默认上限
+            window: 每种交易类型保留的最近样本数
+            profile_path: 离线校准结果的路径，启动时加载
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.margin = settings.trading.compute_unit_margin if margin is None else margin
+        self.min_samples = min_samples
+        self.window = window
+        self.samples: dict[str, deque[int]] = {}
+        # 因 CU 不足失败后提高的上限，不低于统计值
+        self.floors: dict[str, int] = {}
+        # 签名 -> (交易类型, CU 上限)，确认后按签名记录 CU 消耗
+        self._pending: OrderedDict[str, tuple[str, int | None]] = OrderedDict()
+        profile_path = profile_path or settings.trading.compute_unit_profile
+        if profile_path and os.path.isfile(profile_path):
+            try:
+                self.load(profile_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load compute unit profile {profile_path}: {e}")
+
+    def __repr__(self) -> str:
+        return "ComputeUnitProfiler()"
+
+    def observe(self, profile: str, units: int) -> None:
+        if units <= 0:
+            return
+        samples = self.samples.get(profile)
+        if samples is None:
+            samples = self.samples[profile] = deque(maxlen=self.window)
+        samples.append(units)
+
+    def percentile(self, profile: str, q: float = 0.99) -> int | None:
+        samples = self.samples.get(profile)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def limit(self, profile: str | None, default: int = DEFAULT_UNIT_LIMIT) -> int:
+        """交易类型的 CU 上限：p99 加余量，样本不足时使用 default
+
+        交易因 CU 不足失败过时，上限不低于失败后提高的值
+        """
+        if profile is None:
+            return default
+        floor = self.floors.get(profile, 0)
+        if len(self.samples.get(profile, ())) < self.min_samples:
+            return max(default, floor)
+        p99 = self.percentile(profile)
+        assert p99 is not None
+        # 向上取整到 1000，避免上限随样本频繁抖动
+        return max(min(MAX_UNIT_LIMIT, _round_up(p99 * (1 + self.margin))), floor)
+
+    def track(self, signature: str, profile: str, unit_limit: int | None = None) -> None:
+        """记录已构建交易的类型和 CU 上限，确认后由 observe_transaction 记录 CU 消耗"""
+        self._pending[signature] = (profile, unit_limit)
+        while len(self._pending) > 4096:
+            self._pending.popitem(last=False)
+
+    def observe_transaction(self, signature: str, tx_detail: dict) -> None:
+        """记录已上链交易的 CU 消耗
+
+        成功的交易作为样本；因 CU 不足失败的交易提高该类型的上限；
+        其他原因失败的交易（如滑点）在中途退出，消耗量不作为样本
+        """
+        profile, unit_limit = self._pending.pop(signature, None) or (profile_of(tx_detail), None)
+        meta = tx_detail.get("meta") or {}
+        units = meta.get("computeUnitsConsumed")
+        if profile is None or not units:
+            return
+        if meta.get("err") is None:
+            self.observe(profile, units)
+        elif exceeded_compute_budget(tx_detail, unit_limit):
+            floor = min(
+                MAX_UNIT_LIMIT, _round_up(max(units, unit_limit or 0) * EXCEEDED_LIMIT_BUMP)
+            )
+            if floor > self.floors.get(profile, 0):
+                self.floors[profile] = floor
+                logger.warning(
+                    f"Transaction {signature} exceeded compute budget ({units} units), "
+                    f"raising {profile} unit limit to {floor}"
+                )
+
+    async def observe_simulation(
+        self, transaction: VersionedTransaction, client: AsyncClient
+    ) -> None:
+        """模拟已构建的交易，记录 CU 消耗
+
+        Raises:
+            ValueError: 如果模拟失败
+        """
+        resp = await client.simulate_transaction(transaction, sig_verify=False)
+        if resp.value.err is not None:
+            raise ValueError(f"Transaction simulation failed: {resp.value.err}")
+        pending = self._pending.get(str(transaction.signatures[0]))
+        if pending is not None and resp.value.units_consumed:
+            self.observe(pending[0], resp.value.units_consumed)
+
+    def snapshot(self) -> dict[str, dict]:
+        """各交易类型的样本数、p50/p99 和当前使用的 CU 上限"""
+        return {
+            profile: {
+                "count": len(samples),
+                "p50": self.percentile(profile, 0.5),
+                "p99": self.percentile(profile),
+                "limit": self.limit(profile),
+            }
+            for profile, samples in self.samples.items()
+        }
+
+    def load(self, path: str) -> None:
+        with open(path, "rb") as f:
+            data = json.loads(f.read())
+        for profile, units in data.items():
+            for unit in units[-self.window :]:
+                self.observe(profile, int(unit))
+        logger.info(f"Loaded compute unit profile from {path}: {self.snapshot()}")
+
+    def dump(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(
+                json.dumps(
+                    {profile: list(samples) for profile, samples in self.samples.items()},
+                    option=json.OPT_INDENT_2,
+                )
+            )
+
+
+def _round_up(units: float) -> int:
+    return math.ceil(units / 1000) * 1000
+
+
+async def _load_recorded_signatures(limit: int) -> list[str]:
+    from solbot_common.models.swap_record import SwapRecord, TransactionStatus
+    from solbot_db.session import start_async_session
+    from sqlmodel import select
+
+    async with start_async_session() as session:
+        stmt = (
+            select(SwapRecord.signature)
+            .where(SwapRecord.status == TransactionStatus.SUCCESS)
+            .order_by(SwapRecord.id.desc())  # type: ignore
+            .limit(limit)
+        )
+        return [signature for signature in (await session.execute(stmt)).scalars() if signature]
+
+
+async def _fetch_transactions(signatures: Iterable[str]) -> list[dict]:
+    from solbot_common.utils.endpoint_pool import EndpointPool
+
+    pool = EndpointPool(settings.rpc.endpoints)
+    semaphore = asyncio.Semaphore(8)
+
+    async def fetch(signature: str) -> dict | None:
+        async with semaphore:
+            try:
+                return await pool.request(
+                    "getTransaction",
+                    [
+                        signature,
+                        {"encoding": "json", "maxSupportedTransactionVersion": 0},
+                    ],
+                )
+            except Exception as e:
+                logger.warning(f"Failed to fetch transaction {signature}: {e}")
+                return None
+
+    results = await asyncio.gather(*(fetch(signature) for signature in signatures))
+    return [tx_detail for tx_detail in results if tx_detail is not None]
+
+
+async def calibrate(
+    limit: int, files: list[str], output: str, margin: float
+) -> ComputeUnitProfiler:
+    """从历史交易统计 CU 消耗并保存
+
+    Args:
+        limit: 从数据库读取最近的成功交易数量，files 不为空时不读取数据库
+        files: getTransaction 返回结果的 JSON 文件
+        output: 保存统计结果的路径
+        margin: p99 之上的余量比例
+    """
+    if files:
+        tx_details = []
+        for path in files:
+            with open(path, "rb") as f:
+                data = json.loads(f.read())
+            tx_details.extend(data if isinstance(data, list) else [data])
+    else:
+        tx_details = await _fetch_transactions(await _load_recorded_signatures(limit))
+
+    profiler = ComputeUnitProfiler(margin=margin, profile_path=os.devnull)
+    for tx_detail in tx_details:
+        if (tx_detail.get("meta") or {}).get("err") is not None:
+            continue
+        profiler.observe_transaction(tx_detail["transaction"]["signatures"][0], tx_detail)
+    profiler.dump(output)
+    return profiler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Calibrate compute unit limits from recorded swaps"
+    )
+    parser.add_argument("files", nargs="*", help="getTransaction JSON files, default: swap records")
+    parser.add_argument("--limit", type=int, default=1000, help="number of recent swap records")
+    parser.add_argument("--output", default=settings.trading.compute_unit_profile)
+    parser.add_argument("--margin", type=float, default=settings.trading.compute_unit_margin)
+    args = parser.parse_args()
+
+    profiler = asyncio.run(calibrate(args.limit, args.files, args.output, args.margin))
+    for profile, stats in sorted(profiler.snapshot().items()):
+        print(
+            f"{profile:<20} samples={stats['count']:<5} p50={stats['p50']:<8} "
+            f"p99={stats['p99']:<8} limit={stats['limit']}"
+        )
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from typing import Literal
 from solbot_common.constants import WSOL
 from solbot_common.cp.copytrade_event import NotifyCopyTradeProducer
 from solbot_common.cp.swap_event import SwapEventProducer
+from solbot_common.config import settings
 from solbot_common.cp.tx_event import TxEventConsumer
 from solbot_common.log import logger
 from solbot_common.models.tg_bot.copytrade import CopyTrade
@@ -21,6 +22,8 @@ from solbot_services.bot_setting import BotSettingService as SettingService
 from solbot_services.copytrade import CopyTradeService
 from solbot_services.holding import HoldingService
 
+from trading.slippage import SlippageEstimator
+
 IGNORED_MINTS = {
     "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
     "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",  # USDT
@@ -43,10 +46,17 @@ class CopyTradeProcessor:
         self.setting_service = SettingService()
         self.swap_event_producer = SwapEventProducer(redis_client)
         self.notify_copytrade_producer = NotifyCopyTradeProducer(redis_client)
+        self.slippage_estimator = SlippageEstimator()
 
     async def _process_tx_event(self, tx_event: TxEvent):
         """处理交易事件"""
         logger.info(f"Processing tx event: {tx_event}")
+        # 所有跟单钱包的成交价都用于估计该代币的波动
+        self.slippage_estimator.observe(tx_event)
+        if tx_event.backfilled:
+            # 断线期间的历史交易，价格已经过时，不再跟单
+            logger.info(f"Skipping copytrade of backfilled tx: {tx_event.signature}")
+            return
         copytrade_items = await self.copytrade_service.get_by_target_wallet(tx_event.who)
         sell_pct = 0
         if tx_event.tx_direction == SwapDirection.Buy:
@@ -143,6 +153,13 @@ class CopyTradeProcessor:
                 slippage_bps = setting.sandwich_slippage_bps
             elif copytrade.auto_slippage is False:
                 slippage_bps = copytrade.custom_slippage * 10000
+            elif settings.trading.local_slippage:
+                estimate = await self.slippage_estimator.estimate(
+                    mint=tx_event.mint,
+                    amount=amount,
+                    swap_direction=swap_direction,
+                )
+                slippage_bps = estimate.slippage_bps
             else:
                 slippage_bps = await calculate_auto_slippage(
                     input_mint=input_mint,
@@ -195,3 +212,7 @@ class CopyTradeProcessor:
     def stop(self):
         """停止跟单交易"""
         self.tx_event_consumer.stop()
+
+    async def close(self):
+        """停止后台的滑点校准"""
+        await self.slippage_estimator.stop()
@@ -1,15 +1,13 @@
 from solana.rpc.async_api import AsyncClient
+from solbot_cache.keypair import KeypairCache
 from solbot_cache.launch import LaunchCache
+from solbot_cache.token_info import TokenInfoCache
 from solbot_common.config import settings
-from solbot_common.constants import PUMP_FUN_PROGRAM, RAY_V4
+from solbot_common.constants import PUMP_FUN_PROGRAM, RAY_V4, SOL_DECIMAL
 from solbot_common.log import logger
-from solbot_common.models.tg_bot.user import User
 from solbot_common.types.swap import SwapEvent
 from solbot_common.types.enums import SwapDirection, SwapInType
-from solbot_db.session import NEW_ASYNC_SESSION, provide_session
-from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
-from sqlmodel import select
 
 from trading.transaction import TradingRoute, TradingService
 
@@ -21,15 +19,47 @@ class TradingExecutor:
     def __init__(self, client: AsyncClient):
         self._rpc_client = client
         self._launch_cache = LaunchCache()
-        self._trading_service = TradingService(self._rpc_client)
+        self._token_info_cache = TokenInfoCache()
+        self._keypair_cache = KeypairCache()
+        self._trading_service = TradingService(
+            self._rpc_client,
+            route_quote_timeout=settings.trading.route_quote_timeout_ms / 1000,
+        )
 
-    @provide_session
-    async def __get_keypair(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> Keypair:
-        stmt = select(User.private_key).where(User.pubkey == pubkey).limit(1)
-        private_key = (await session.execute(stmt)).scalar_one_or_none()
-        if not private_key:
-            raise ValueError("Wallet not found")
-        return Keypair.from_bytes(private_key)
+    async def _select_route(
+        self,
+        swap_event: SwapEvent,
+        token_address: str,
+        swap_in_type: SwapInType,
+        fallback: TradingRoute,
+        should_use_pump: bool,
+    ) -> TradingRoute:
+        """并发报价选择路由，报价全部失败或超时时使用 fallback"""
+        if swap_event.swap_direction == SwapDirection.Buy:
+            amount_in = int(swap_event.ui_amount * 10**SOL_DECIMAL)
+        elif swap_in_type == SwapInType.Qty:
+            token_info = await self._token_info_cache.get(token_address)
+            if token_info is None:
+                # 没有代币精度无法报价，沿用原有路由
+                return fallback
+            amount_in = int(swap_event.ui_amount * 10**token_info.decimals)
+        else:
+            # 按比例卖出需要先查询余额才能报价，沿用原有路由
+            return fallback
+
+        # 未发射的 pump 代币没有 Raydium 池子
+        candidates = [TradingRoute.PUMP if should_use_pump else TradingRoute.RAYDIUM_V4]
+        # Jupiter 只在本地路由没有报价时才会被请求
+        candidates.append(TradingRoute.DEX)
+        decision = await self._trading_service.router.select(
+            token_address,
+            amount_in,
+            swap_event.swap_direction,
+            candidates,
+            fallback,
+            priority_fee=int((swap_event.priority_fee or 0) * 10**SOL_DECIMAL),
+        )
+        return decision.route
 
     async def exec(self, swap_event: SwapEvent) -> Signature | None:
         """执行交易
@@ -50,7 +80,7 @@ class TradingExecutor:
         token_address = swap_event.output_mint if swap_event.swap_direction == SwapDirection.Buy else swap_event.input_mint
 
         sig = None
-        keypair = await self.__get_keypair(swap_event.user_pubkey)
+        keypair = await self._keypair_cache.get(swap_event.user_pubkey)
         swap_in_type = SwapInType(swap_event.swap_in_type)
 
         # 检查是否需要使用 Pump 协议进行交易
@@ -91,6 +121,11 @@ class TradingExecutor:
         else:
             raise ValueError(f"Program ID is not supported, {swap_event.program_id}")
 
+        if settings.trading.smart_routing:
+            trade_route = await self._select_route(
+                swap_event, token_address, swap_in_type, trade_route, should_use_pump
+            )
+
         target_price = None
         if swap_event.by == 'copytrade':
             if swap_event.swap_direction == SwapDirection.Buy:
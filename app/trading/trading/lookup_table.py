@@ -0,0 +1,389 @@
+"""地址查找表（Address Lookup Table）管理
+
+构建交易时，账户默认全部内联在消息中，每个账户占 32 字节。
+在查找表中的账户只需要 1 字节索引，Raydium V4 交易约 18 个账户，可以明显减小交易大小。
+
+- 用户查找表：每个用户一张，包含交易常用的固定账户（程序、sysvar、WSOL 等）和用户的 WSOL 账户。
+  首次交易时由用户钱包创建并支付租金，因此需要开启 trading.lookup_tables。
+- 共享查找表：由 trading.lookup_table_authority 钱包创建和维护，
+  收录被多个用户交易过的池子账户。
+
+创建和追加地址的交易确认后才写入 Redis 或刷新内容，避免保存不存在的查找表或重复追加。
+查找表的地址保存在 Redis，内容缓存在本地并定期刷新，构建交易时不访问网络。
+"""
+
+import asyncio
+import struct
+from collections import OrderedDict
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed, Finalized
+from solbot_cache import BlockhashRefresher, KeypairCache
+from solbot_common.config import settings
+from solbot_common.constants import (
+    ASSOCIATED_TOKEN_PROGRAM,
+    EVENT_AUTHORITY,
+    JITO_TIP_ACCOUNTS,
+    OPEN_BOOK_PROGRAM,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    RAY_AUTHORITY_V4,
+    RAY_V4,
+    RENT_PROGRAM_ID,
+    SYSTEM_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+    WSOL,
+)
+from solbot_common.log import logger
+from solbot_common.models.swap_record import TransactionStatus
+from solbot_common.utils.utils import get_async_client
+from solbot_db.redis import RedisClient
+from solders.address_lookup_table_account import ID as ADDRESS_LOOKUP_TABLE_PROGRAM  # type: ignore
+from solders.address_lookup_table_account import (  # type: ignore
+    LOOKUP_TABLE_MAX_ADDRESSES,
+    AddressLookupTable,
+    AddressLookupTableAccount,
+    derive_lookup_table_address,
+)
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from spl.token.instructions import get_associated_token_address
+
+from trading.settlement.confirmation import SignatureConfirmer
+
+USER_LOOKUP_TABLES_KEY = "lookup_table:users"
+SHARED_LOOKUP_TABLE_KEY = "lookup_table:shared"
+
+# 一笔交易最多追加的地址数，受交易大小限制
+MAX_EXTEND_ADDRESSES = 30
+# 查找表未停用时 deactivation_slot 为 u64 最大值
+_ACTIVE_SLOT = 2**64 - 1
+
+# 用户查找表中的固定账户
+STATIC_ACCOUNTS = [
+    SYSTEM_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    ASSOCIATED_TOKEN_PROGRAM,
+    RENT_PROGRAM_ID,
+    WSOL,
+    RAY_V4,
+    RAY_AUTHORITY_V4,
+    OPEN_BOOK_PROGRAM,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    EVENT_AUTHORITY,
+    # 交易固定使用的 Jito 小费账户，和 tx.py 保持一致
+    JITO_TIP_ACCOUNTS[0],
+]
+
+
+def create_lookup_table_instruction(
+    authority: Pubkey, payer: Pubkey, recent_slot: int
+) -> tuple[Instruction, Pubkey]:
+    """创建查找表的指令
+
+    Returns:
+        tuple[Instruction, Pubkey]: (指令, 查找表地址)
+    """
+    table, bump = derive_lookup_table_address(authority, recent_slot)
+    data = struct.pack("<IQB", 0, recent_slot, bump)
+    accounts = [
+        AccountMeta(table, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, data, accounts), table
+
+
+def extend_lookup_table_instruction(
+    table: Pubkey, authority: Pubkey, payer: Pubkey, addresses: list[Pubkey]
+) -> Instruction:
+    """向查找表追加地址的指令"""
+    data = struct.pack("<IQ", 2, len(addresses)) + b"".join(bytes(a) for a in addresses)
+    accounts = [
+        AccountMeta(table, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, data, accounts)
+
+
+def decode_lookup_table(table: Pubkey, data: bytes) -> AddressLookupTableAccount | None:
+    """解析查找表账户，已停用的查找表返回 None"""
+    lookup_table = AddressLookupTable.deserialize(data)
+    if lookup_table.meta.deactivation_slot != _ACTIVE_SLOT:
+        return None
+    return AddressLookupTableAccount(table, list(lookup_table.addresses))
+
+
+class AddressLookupTableManager:
+    """维护用户查找表和共享查找表，并在本地缓存查找表内容"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        refresh_interval: float = 30,
+        hot_threshold: int = 2,
+        max_tracked: int = 4096,
+        confirmer: SignatureConfirmer | None = None,
+        confirm_timeout: float = 30,
+    ) -> None:
+        """
+        Args:
+            client: RPC 客户端
+            refresh_interval: 刷新查找表内容和追加共享账户的间隔（秒）
+            hot_threshold: 账户被多少个不同用户使用后加入共享查找表
+            max_tracked: 最多统计的候选账户数
+            confirmer: 交易确认服务，默认使用全局的 SignatureConfirmer
+            confirm_timeout: 等待创建和追加交易确认的时间（秒）
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.refresh_interval = refresh_interval
+        self.hot_threshold = hot_threshold
+        self.max_tracked = max_tracked
+        self.confirmer = confirmer or SignatureConfirmer(self.client)
+        self.confirm_timeout = confirm_timeout
+
+        # 用户 -> 查找表地址，None 表示 Redis 中没有记录
+        self._user_tables: dict[str, Pubkey | None] = {}
+        self.shared_table: Pubkey | None = None
+        # 查找表地址 -> 已解析的内容
+        self.tables: dict[Pubkey, AddressLookupTableAccount] = {}
+        # 候选账户 -> 使用过的用户
+        self._candidates: OrderedDict[Pubkey, set[Pubkey]] = OrderedDict()
+        self._creating: set[str] = set()
+        self._background: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return "AddressLookupTableManager()"
+
+    def lookup_tables(self, keypair: Keypair) -> list[AddressLookupTableAccount]:
+        """构建交易时使用的查找表，只读取本地缓存
+
+        用户的查找表尚未加载时在后台加载或创建，本次交易不使用。
+        """
+        owner = str(keypair.pubkey())
+        tables = []
+        if owner in self._user_tables:
+            table = self._user_tables[owner]
+            if table is not None and table in self.tables:
+                tables.append(self.tables[table])
+        elif settings.trading.lookup_tables and owner not in self._creating:
+            self._creating.add(owner)
+            self._spawn(self._ensure_user_table(keypair))
+        if self.shared_table is not None and self.shared_table in self.tables:
+            tables.append(self.tables[self.shared_table])
+        return tables
+
+    def record(self, payer: Pubkey, instructions: list[Instruction]) -> None:
+        """记录交易使用的账户，被多个用户使用的账户会加入共享查找表"""
+        for instruction in instructions:
+            for meta in instruction.accounts:
+                account = meta.pubkey
+                if meta.is_signer or account == payer:
+                    continue
+                payers = self._candidates.get(account)
+                if payers is None:
+                    payers = self._candidates[account] = set()
+                else:
+                    self._candidates.move_to_end(account)
+                payers.add(payer)
+        while len(self._candidates) > self.max_tracked:
+            self._candidates.popitem(last=False)
+
+    def hot_accounts(self) -> list[Pubkey]:
+        """需要加入共享查找表的账户，已在任意查找表中的账户除外"""
+        known = {account for table in self.tables.values() for account in table.addresses}
+        known.update(STATIC_ACCOUNTS)
+        return [
+            account
+            for account, payers in self._candidates.items()
+            if len(payers) >= self.hot_threshold and account not in known
+        ]
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _ensure_user_table(self, keypair: Keypair) -> None:
+        owner = str(keypair.pubkey())
+        try:
+            redis = RedisClient.get_instance()
+            address = await redis.hget(USER_LOOKUP_TABLES_KEY, owner)
+            table = None if address is None else Pubkey.from_string(address)
+            if table is not None and await self.refresh([table]):
+                # 记录的查找表在链上不存在，重新创建
+                logger.warning(f"Lookup table {table} of {owner} does not exist, recreating")
+                table = None
+            if table is None:
+                wsol_account = get_associated_token_address(keypair.pubkey(), WSOL)
+                # create 在交易确认后返回，Redis 中只保存已上链的查找表
+                table = await self.create(keypair, keypair, [*STATIC_ACCOUNTS, wsol_account])
+                await redis.hset(USER_LOOKUP_TABLES_KEY, owner, str(table))
+                logger.info(f"Created lookup table {table} for {owner}")
+                await self.refresh([table])
+            self._user_tables[owner] = table
+        except Exception as e:
+            # 本次运行不再重试，避免每笔交易都尝试创建
+            self._user_tables[owner] = None
+            logger.error(f"Failed to prepare lookup table for {owner}: {e}")
+        finally:
+            self._creating.discard(owner)
+
+    async def _send(self, keypair: Keypair, instructions: list[Instruction]) -> None:
+        """发送交易并等待确认
+
+        Raises:
+            RuntimeError: 如果交易失败或超时未确认
+        """
+        recent_blockhash, _ = await BlockhashRefresher().get()
+        message = MessageV0.try_compile(
+            payer=keypair.pubkey(),
+            instructions=instructions,
+            address_lookup_table_accounts=[],
+            recent_blockhash=recent_blockhash,
+        )
+        resp = await self.client.send_transaction(VersionedTransaction(message, [keypair]))
+        logger.info(f"Lookup table transaction sent: {resp.value}")
+        status = await self.confirmer.confirm(resp.value, timeout=self.confirm_timeout)
+        if status != TransactionStatus.SUCCESS:
+            raise RuntimeError(f"Lookup table transaction {resp.value} {status.value}")
+
+    async def create(self, authority: Keypair, payer: Keypair, addresses: list[Pubkey]) -> Pubkey:
+        """创建查找表并写入地址，交易确认后返回
+
+        Returns:
+            Pubkey: 查找表地址
+        """
+        slot = (await self.client.get_slot(commitment=Finalized)).value
+        instruction, table = create_lookup_table_instruction(
+            authority.pubkey(), payer.pubkey(), slot
+        )
+        instructions = [instruction]
+        if addresses:
+            instructions.append(
+                extend_lookup_table_instruction(
+                    table, authority.pubkey(), payer.pubkey(), addresses[:MAX_EXTEND_ADDRESSES]
+                )
+            )
+        await self._send(payer, instructions)
+        if len(addresses) > MAX_EXTEND_ADDRESSES:
+            await self.extend(table, authority, addresses[MAX_EXTEND_ADDRESSES:])
+        return table
+
+    async def extend(self, table: Pubkey, authority: Keypair, addresses: list[Pubkey]) -> None:
+        """向查找表追加地址，由 authority 支付租金，交易确认后返回"""
+        for i in range(0, len(addresses), MAX_EXTEND_ADDRESSES):
+            chunk = addresses[i : i + MAX_EXTEND_ADDRESSES]
+            await self._send(
+                authority,
+                [
+                    extend_lookup_table_instruction(
+                        table, authority.pubkey(), authority.pubkey(), chunk
+                    )
+                ],
+            )
+
+    async def refresh(self, tables: list[Pubkey] | None = None) -> list[Pubkey]:
+        """从链上加载查找表内容
+
+        Returns:
+            list[Pubkey]: 链上不存在的查找表
+        """
+        if tables is None:
+            tables = [table for table in self._user_tables.values() if table is not None]
+            if self.shared_table is not None:
+                tables.append(self.shared_table)
+        missing = []
+        for i in range(0, len(tables), 100):
+            chunk = tables[i : i + 100]
+            resp = await self.client.get_multiple_accounts(chunk, commitment=Confirmed)
+            for table, account in zip(chunk, resp.value, strict=True):
+                if account is None:
+                    missing.append(table)
+                    continue
+                resolved = decode_lookup_table(table, bytes(account.data))
+                if resolved is None:
+                    self.tables.pop(table, None)
+                else:
+                    self.tables[table] = resolved
+        return missing
+
+    async def _maintain_shared_table(self) -> None:
+        """创建共享查找表，并追加被多个用户使用的账户"""
+        authority_address = settings.trading.lookup_table_authority
+        if not authority_address:
+            return
+        redis = RedisClient.get_instance()
+        if self.shared_table is None:
+            address = await redis.get(SHARED_LOOKUP_TABLE_KEY)
+            if address is not None:
+                self.shared_table = Pubkey.from_string(address)
+                return
+        hot_accounts = self.hot_accounts()
+        if not hot_accounts:
+            return
+
+        authority = await KeypairCache().get(authority_address)
+        if self.shared_table is None:
+            table = await self.create(authority, authority, hot_accounts)
+            await redis.set(SHARED_LOOKUP_TABLE_KEY, str(table))
+            self.shared_table = table
+            logger.info(f"Created shared lookup table {table}")
+            await self.refresh([table])
+            return
+        resolved = self.tables.get(self.shared_table)
+        if resolved is None:
+            # 内容尚未加载，等待下次刷新
+            return
+        capacity = LOOKUP_TABLE_MAX_ADDRESSES - len(resolved.addresses)
+        if capacity <= 0:
+            logger.warning(f"Shared lookup table {self.shared_table} is full")
+            return
+        await self.extend(self.shared_table, authority, hot_accounts[:capacity])
+        logger.info(
+            f"Extended shared lookup table with {min(capacity, len(hot_accounts))} accounts"
+        )
+        # 追加的交易已确认，立即刷新，下次计算候选账户时不会重复追加
+        await self.refresh([self.shared_table])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                await self._maintain_shared_table()
+            except Exception as e:
+                logger.error(f"Failed to refresh lookup tables: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [*self._background]
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
@@ -3,20 +3,34 @@ import time
 
 import backoff
 import httpx
+from aioredis.client import PubSub
+from solbot_cache import (
+    BlockhashRefresher,
+    BondingCurveCache,
+    KeypairCache,
+    TokenAccountIndexCache,
+)
+from solbot_common.config import settings
 from solbot_common.cp.swap_event import SwapEventConsumer
 from solbot_common.cp.swap_result import SwapResultProducer
+from solbot_common.cp.wallet_events import WalletEventConsumer, WalletEventType
 from solbot_common.log import logger
 from solbot_common.prestart import pre_start
+from solbot_common.types.enums import SwapDirection
 from solbot_common.types.swap import SwapEvent, SwapResult
+from solbot_common.utils.quote import QuoteService
 from solbot_common.utils.utils import get_async_client
 from solbot_services.holding import HoldingService
 from solbot_services.copytrade import CopyTradeService
 from solbot_db.redis import RedisClient
 from solders.signature import Signature  # type: ignore
 
+from trading.compute_units import ComputeUnitProfiler
 from trading.copytrade import CopyTradeProcessor
 from trading.executor import TradingExecutor
-from trading.settlement import SwapSettlementProcessor
+from trading.lookup_table import AddressLookupTableManager
+from trading.pipeline import PipelineMetrics, SendTracker
+from trading.settlement import SignatureConfirmer, SwapSettlementProcessor
 
 
 class Trading:
@@ -40,6 +54,17 @@ class Trading:
         self.copytrade_processor = CopyTradeProcessor()
 
         self.swap_result_producer = SwapResultProducer(self.redis)
+        # 钱包变化后使私钥缓存失效
+        self.wallet_event_consumer = WalletEventConsumer(self.redis)
+        for event_type in WalletEventType:
+            self.wallet_event_consumer.register_handler(
+                event_type, KeypairCache().handle_wallet_event
+            )
+        self._wallet_event_task: asyncio.Task | None = None
+        self.blockhash_refresher = BlockhashRefresher(
+            interval=settings.trading.blockhash_refresh_ms / 1000
+        )
+        self._metrics_task: asyncio.Task | None = None
         # 添加任务池和信号量
         self.task_pool = set()
         self.max_concurrent_tasks = 10
@@ -110,6 +135,13 @@ class Trading:
         await HoldingService.update_holding_tokens(swap_result)
         await self.swap_result_producer.produce(swap_result)
         logger.info(f"Recorded transaction: {sig}")
+        if (
+            swap_event.swap_direction == SwapDirection.Sell
+            and swap_event.swap_in_type == "pct"
+            and swap_event.ui_amount >= 1
+        ):
+            # 清仓后不再需要该代币的 bonding curve 推送
+            await BondingCurveCache().evict(swap_event.input_mint)
         return swap_result
 
     async def _record_failed_swap(self, swap_event: SwapEvent) -> SwapResult:
@@ -133,7 +165,46 @@ class Trading:
         self.task_pool.add(task)
         task.add_done_callback(self.task_pool.discard)
 
+    async def _consume_wallet_events(self, pubsub: PubSub):
+        try:
+            while True:
+                try:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
+                    if message is None:
+                        continue
+                    await self.wallet_event_consumer.process_event(message)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing wallet event: {e}")
+        finally:
+            await self.wallet_event_consumer.unsubscribe()
+
+    async def _report_pipeline_metrics(self, interval: float = 60):
+        """定期输出交易流水线各阶段的耗时、CU 和本地滑点统计"""
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = PipelineMetrics().snapshot()
+            if snapshot:
+                logger.info(f"Trading pipeline timings: {snapshot}")
+            compute_units = ComputeUnitProfiler().snapshot()
+            if compute_units:
+                logger.info(f"Compute units: {compute_units}")
+            slippage = self.copytrade_processor.slippage_estimator.stats()
+            if slippage["estimates"]:
+                logger.info(f"Local slippage: {slippage}")
+
     async def start(self):
+        self.blockhash_refresher.start()
+        AddressLookupTableManager().start()
+        self._metrics_task = asyncio.create_task(self._report_pipeline_metrics())
+        # 先订阅钱包事件再预热，避免错过预热期间的钱包变化
+        pubsub = await self.wallet_event_consumer.subscribe()
+        self._wallet_event_task = asyncio.create_task(self._consume_wallet_events(pubsub))
+        try:
+            await KeypairCache().warm()
+        except Exception as e:
+            logger.error(f"Failed to warm keypair cache: {e}")
         processor_task = asyncio.create_task(self.copytrade_processor.start())
         # 添加任务完成回调以处理可能的异常
         processor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
@@ -149,10 +220,31 @@ class Trading:
         # 停止所有消费者
         for consumer in self.swap_event_consumers:
             consumer.stop()
+        await BondingCurveCache().stop()
+        await TokenAccountIndexCache().stop()
+        if self._wallet_event_task is not None:
+            self._wallet_event_task.cancel()
+            await asyncio.gather(self._wallet_event_task, return_exceptions=True)
+        KeypairCache().clear()
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+        await self.blockhash_refresher.stop()
+        await AddressLookupTableManager().stop()
 
         if self.task_pool:
             logger.info("Waiting for remaining tasks to complete...")
             await asyncio.gather(*self.task_pool, return_exceptions=True)
+        await SendTracker().stop()
+        await SignatureConfirmer().stop()
+        await self.copytrade_processor.close()
+        await QuoteService().close()
+        # 保存运行期间统计的 CU 消耗，下次启动时加载
+        profiler = ComputeUnitProfiler()
+        if profiler.samples:
+            try:
+                profiler.dump(settings.trading.compute_unit_profile)
+            except OSError as e:
+                logger.error(f"Failed to save compute unit profile: {e}")
         logger.info("All consumers stopped")
 
 
@@ -0,0 +1,133 @@
+"""
+交易流水线的阶段耗时统计和异步发送
+
+交易分为 build（报价、指令、编译消息）、sign（签名）、send（提交到节点）三个阶段。
+签名在 build_transaction 中放到线程池执行，发送不阻塞调用方：
+签名在发送前就已确定，Swapper 提交发送任务后直接返回签名，
+结算时再通过 SendTracker 获取发送结果。
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+
+from solbot_common.log import logger
+from solbot_common.utils.endpoint_pool import EndpointStats
+from solders.signature import Signature  # type: ignore
+
+
+class PipelineMetrics:
+    """各阶段最近的耗时分位数和错误率"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, window: int = 500) -> None:
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.window = window
+        self.stages: dict[str, EndpointStats] = {}
+
+    def record(self, stage: str, seconds: float, ok: bool = True) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = EndpointStats(self.window)
+        stats.record(seconds, ok)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """统计代码块的耗时，抛出异常时记为失败"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(stage, time.perf_counter() - start, ok)
+
+    def snapshot(self) -> dict[str, dict]:
+        """各阶段的样本数、p50/p99 耗时（毫秒）和错误率"""
+        return {
+            stage: {
+                "count": len(stats.latencies),
+                "p50_ms": round(stats.p50 * 1000, 2) if stats.p50 is not None else None,
+                "p99_ms": round(stats.p99 * 1000, 2) if stats.p99 is not None else None,
+                "error_rate": round(stats.error_rate, 4),
+            }
+            for stage, stats in self.stages.items()
+        }
+
+
+class SendTracker:
+    """跟踪后台发送任务，按签名查询发送结果"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, max_failed: int = 1000) -> None:
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.max_failed = max_failed
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def submit(self, signature: Signature, send: Awaitable) -> None:
+        """在后台发送交易"""
+        key = str(signature)
+        metrics = PipelineMetrics()
+        start = time.perf_counter()
+
+        async def _send() -> None:
+            with metrics.measure("send"):
+                await send
+            logger.info(
+                f"Transaction sent successfully: {key} "
+                f"({(time.perf_counter() - start) * 1000:.1f}ms)"
+            )
+
+        task = asyncio.create_task(_send())
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        self._tasks[key] = task
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            # 成功的发送不需要保留，wait 找不到记录时返回 None
+            self._tasks.pop(key, None)
+            return
+        logger.error(f"Failed to send transaction {key}: {task.exception()!r}")
+        # 失败的记录保留到结算时读取，只保留最近的 max_failed 条
+        failed = [k for k, t in self._tasks.items() if t.done()]
+        for k in failed[: max(0, len(failed) - self.max_failed)]:
+            self._tasks.pop(k, None)
+
+    async def wait(self, signature: Signature, timeout: float = 10) -> BaseException | None:
+        """等待发送完成并移除记录
+
+        Returns:
+            BaseException | None: 发送失败时返回异常，成功、超时或不是由本进程发送时返回 None
+        """
+        task = self._tasks.pop(str(signature), None)
+        if task is None:
+            return None
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            return e
+        return None
+
+    async def stop(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
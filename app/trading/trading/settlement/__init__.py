@@ -2,8 +2,10 @@
 
 包含以下主要组件：
 1. SwapSettlementProcessor: 交易结算处理器，负责获取和验证交易状态
+2. SignatureConfirmer: 交易确认服务，多路复用 signatureSubscribe 等待交易确认
 """
 
+from .confirmation import SignatureConfirmer
 from .processor import SwapSettlementProcessor
 
-__all__ = ["SwapSettlementProcessor"]
+__all__ = ["SignatureConfirmer", "SwapSettlementProcessor"]
@@ -4,107 +4,164 @@
 1. 分析交易输入输出
 2. 计算实际的交易数量
 3. 提取其他重要的交易信息
+
+交易确认后通过一次 getTransaction 获取原始交易，按用户钱包计算余额变化，
+不再依赖第三方的交易解析 API。
 """
 
+import asyncio
 from typing import TypedDict
 
-from solbot_common.constants import SOL_DECIMAL, WSOL
-# from solbot_common.utils.helius import HeliusAPI
-from solbot_common.utils.shyft import ShyftAPI
+from solbot_cache import TokenAccountIndexCache
 from solbot_common.config import settings
-from solbot_cache.token_info import TokenInfoCache
+from solbot_common.constants import JITO_TIP_ACCOUNTS, SOL_DECIMAL
+from solbot_common.utils.balance_change import WSOL_MINT, TokenBalanceIndex, account_index
+from solbot_common.utils.endpoint_pool import EndpointPool
+
+from trading.compute_units import ComputeUnitProfiler
 
-from datetime import datetime, timezone
+_JITO_TIP_ACCOUNTS = frozenset(str(account) for account in JITO_TIP_ACCOUNTS)
 
 
 class Result(TypedDict):
+    # 交易手续费（lamports），包含优先费用
     fee: int
     slot: int
     timestamp: int
+    # 用户 SOL 余额的总变化（SOL），买入为负
     sol_change: float
+    # 与池子交换的 SOL 数量（SOL）
     swap_sol_change: float
+    # 手续费、Jito 小费和代币账户租金等其他 SOL 支出（SOL）
     other_sol_change: float
+    # 用户代币余额的变化（UI 数量），买入为正
     token_change: float
 
 
+def jito_tip(tx_detail: dict) -> int:
+    """交易中转入 Jito 小费账户的 lamports
+
+    小费账户可能通过地址查找表加载，余额数组的顺序为静态账户、可写的查找表账户、只读的查找表账户。
+    """
+    meta = tx_detail["meta"]
+    keys = [
+        account_key if isinstance(account_key, str) else account_key["pubkey"]
+        for account_key in tx_detail["transaction"]["message"]["accountKeys"]
+    ]
+    loaded = meta.get("loadedAddresses") or {}
+    keys += loaded.get("writable", []) + loaded.get("readonly", [])
+    return sum(
+        max(0, post - pre)
+        for key, pre, post in zip(keys, meta["preBalances"], meta["postBalances"], strict=True)
+        if key in _JITO_TIP_ACCOUNTS
+    )
+
+
+def analyze_balance_changes(tx_detail: dict, user_account: str, mint: str) -> Result:
+    """从原始交易的余额变化计算用户的交易结果
+
+    Args:
+        tx_detail: getTransaction 的返回结果
+        user_account: 用户钱包地址
+        mint: 交易的代币
+
+    Raises:
+        ValueError: 如果用户不在交易的账户列表中
+    """
+    meta = tx_detail["meta"]
+    pre_balances, post_balances = meta["preBalances"], meta["postBalances"]
+    owner_index = account_index(tx_detail, user_account)
+    native_change = post_balances[owner_index] - pre_balances[owner_index]
+
+    token_index = TokenBalanceIndex(
+        user_account, meta["preTokenBalances"], meta["postTokenBalances"]
+    )
+    pre_amount, post_amount, decimals = token_index.get(mint)
+    token_change = (post_amount - pre_amount) / 10**decimals
+
+    def lamports_change(token_mint: str) -> int:
+        balance = token_index.post_balances.get(token_mint) or token_index.pre_balances.get(
+            token_mint
+        )
+        if balance is None:
+            return 0
+        index = balance["accountIndex"]
+        return post_balances[index] - pre_balances[index]
+
+    # WSOL 账户的 lamports 包含包装的 SOL，与钱包余额一起计算
+    native_change += lamports_change(WSOL_MINT)
+    # 创建代币账户支付的租金（买入为正），关闭账户退还的租金（卖出为负）
+    rent = lamports_change(mint)
+
+    fee = meta["fee"]
+    tip = jito_tip(tx_detail)
+    # 用户支付的所有费用都计入 native_change，加回后剩下的是与池子交换的 SOL
+    swap_lamports = abs(native_change + fee + tip + rent)
+    return {
+        "fee": fee,
+        "slot": tx_detail["slot"],
+        "timestamp": tx_detail.get("blockTime") or 0,
+        "sol_change": native_change / 10**SOL_DECIMAL,
+        "swap_sol_change": swap_lamports / 10**SOL_DECIMAL,
+        "other_sol_change": (fee + tip + rent) / 10**SOL_DECIMAL,
+        "token_change": token_change,
+    }
+
+
 class TransactionAnalyzer:
     """交易分析器"""
 
-    def __init__(self) -> None:
-        # self.helius_api = HeliusAPI()
-        self.shyft_api = ShyftAPI()
-        self.token_info_cache = TokenInfoCache()
+    def __init__(self, endpoint_pool: EndpointPool | None = None, max_retries: int = 3) -> None:
+        """
+        Args:
+            endpoint_pool: 获取交易详情的 RPC 端点池
+            max_retries: 交易刚确认时节点可能还查不到详情，最多重试的次数
+        """
+        self.endpoint_pool = endpoint_pool or EndpointPool(settings.rpc.endpoints)
+        self.max_retries = max_retries
+        self.compute_units = ComputeUnitProfiler()
+        self.token_accounts = TokenAccountIndexCache()
+
+    async def get_transaction(self, tx_signature: str) -> dict | None:
+        for attempt in range(self.max_retries + 1):
+            tx_detail = await self.endpoint_pool.request(
+                "getTransaction",
+                [
+                    tx_signature,
+                    {
+                        "encoding": "json",
+                        "commitment": "confirmed",
+                        "maxSupportedTransactionVersion": 0,
+                    },
+                ],
+            )
+            if tx_detail is not None:
+                return tx_detail
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.2 * 2**attempt)
+        return None
+
+    async def observe_failed_transaction(self, tx_signature: str) -> None:
+        """记录上链失败交易的 CU 消耗，因 CU 不足失败时提高该类型的上限"""
+        tx_details = await self.get_transaction(tx_signature)
+        if tx_details is not None:
+            self.compute_units.observe_transaction(tx_signature, tx_details)
 
     async def analyze_transaction(self, tx_signature: str, user_account: str, mint: str) -> Result:
         """分析交易详情
 
         Args:
             tx_signature: 交易签名
+            user_account: 发起交易的用户钱包
+            mint: 交易的代币
         """
-        # 获取交易详情
-        tx_details = await self.shyft_api.get_parsed_transaction(tx_signature)
+        tx_details = await self.get_transaction(tx_signature)
         if tx_details is None:
             raise Exception("交易不存在")
-        fee = tx_details['fee']
-        slot = 0
-        timestamp = int(datetime.strptime(tx_details["timestamp"], "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc).timestamp())
-        # PREF: ADD PUMP SELL
-        # 测试金额累计是否正确
-        tx_type = tx_details['type']
-        if tx_type == "SWAP":
-            swap_sol_change = None
-            token_change = None
-
-            for action in tx_details['actions']:
-                # PREF: setting wallet is not updated.
-                if 'swapper' in action['info'] and action['info']['swapper'] == settings.wallet.pubkey:
-                    if action['info']['tokens_swapped']['in']['token_address'] == str(WSOL):
-                        swap_sol_change = float(action['info']['tokens_swapped']['in']['amount'])
-                        token_change = float(action['info']['tokens_swapped']['out']['amount'])
-                    else:
-                        assert action['info']['tokens_swapped']['out']['token_address'] == str(WSOL)
-                        swap_sol_change = float(action['info']['tokens_swapped']['out']['amount'])
-                        token_change = float(action['info']['tokens_swapped']['in']['amount'])
-                    break
-
-            assert swap_sol_change is not None and token_change is not None, f"Sol or Token change is None: {settings.wallet.pubkey}"
-            return {
-                "fee": fee,
-                "slot": slot,
-                "timestamp": timestamp,
-                "sol_change": fee + swap_sol_change,
-                "swap_sol_change": swap_sol_change,
-                "other_sol_change": fee,
-                "token_change": token_change,
-            }
-        # 假设出现问题
-        elif tx_type in ["TOKEN_TRANSFER", "SELL"]:
-            assert len(tx_details['events']) == 1 and tx_details['events'][0]['name'] == 'SwapEvent', f"Error Tx Parsed: {tx_details['events']}"
-            swap_event = tx_details['events'][0]
-            swap_sol_change = None
-            token_change = None
-            if swap_event['data']['input_mint'] == str(WSOL):
-                swap_sol_change = swap_event['data']['input_amount'] / 10 ** SOL_DECIMAL
-                token_change = swap_event['data']['output_amount'] / 10 ** (await self.token_info_cache.get(swap_event['data']['output_mint'])).decimals
-            elif swap_event['data']['output_mint'] == str(WSOL):
-                swap_sol_change = swap_event['data']['output_amount'] / 10 ** SOL_DECIMAL
-                token_change = swap_event['data']['input_amount'] / 10 ** (await self.token_info_cache.get(swap_event['data']['input_mint'])).decimals
-            else:
-                raise ValueError("Input & Output mint both not SOL.")
-            
-            return {
-                "fee": fee,
-                "slot": slot,
-                "timestamp": timestamp,
-                "sol_change": swap_sol_change + fee,
-                "swap_sol_change": swap_sol_change,
-                "other_sol_change": fee,
-                "token_change": token_change,
-            }
-        else:
-            raise NotImplementedError(f"不支持的交易类型: {tx_type}")
-        
-
+        self.compute_units.observe_transaction(tx_signature, tx_details)
+        # 创建或关闭的代币账户立即写入钱包的索引，不等待推送
+        self.token_accounts.apply_transaction(user_account, tx_details)
+        return analyze_balance_changes(tx_details, user_account, mint)
 
     # async def analyze_transaction(self, tx_signature: str, user_account: str, mint: str) -> Result:
     #     """分析交易详情
@@ -0,0 +1,258 @@
+"""交易确认服务
+
+所有待确认的签名共用一个 websocket，通过 signatureSubscribe 订阅，状态推送到达时立即返回。
+超过 fallback_after 秒仍未收到推送（或 websocket 断开）的签名，
+改为批量调用 getSignatureStatuses 查询，每次最多 256 个签名。
+"""
+
+import asyncio
+import itertools
+import random
+import time
+
+import orjson as json
+import websockets
+from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solbot_common.models.swap_record import TransactionStatus
+from solbot_common.utils.utils import get_async_client
+from solders.signature import Signature  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+
+MAX_SIGNATURES_PER_REQUEST = 256
+
+
+class SignatureConfirmer:
+    """多路复用的交易确认服务"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        commitment: str = "confirmed",
+        fallback_after: float = 2,
+        poll_interval: float = 1,
+        base_delay: float = 1,
+        max_delay: float = 30,
+    ) -> None:
+        """
+        Args:
+            client: RPC 客户端，批量查询时使用
+            commitment: 订阅的确认级别
+            fallback_after: 订阅后多少秒仍未收到推送时改为批量查询
+            poll_interval: 批量查询的间隔（秒）
+            base_delay: 重连退避的初始间隔（秒）
+            max_delay: 重连退避的最大间隔（秒）
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.websocket_url = settings.rpc.rpc_url.replace("https://", "wss://")
+        self.commitment = commitment
+        self.fallback_after = fallback_after
+        self.poll_interval = poll_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # 签名 -> 确认结果
+        self._futures: dict[str, asyncio.Future[TransactionStatus]] = {}
+        # 签名 -> 等待中的调用数，最后一个调用结束时才取消订阅
+        self._waiters: dict[str, int] = {}
+        self._registered_at: dict[str, float] = {}
+        self.websocket = None
+        self._ids = itertools.count(1)
+        # 请求 id -> (方法, 签名)
+        self._pending: dict[int, tuple[str, str]] = {}
+        # 订阅 id <-> 签名
+        self._signature_of: dict[int, str] = {}
+        self._subscription_of: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+        self._poll_task: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return "SignatureConfirmer()"
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def confirm(self, signature: Signature | str, timeout: float = 10) -> TransactionStatus:
+        """等待交易确认，同一签名的多个调用（如结算和重发）共用一个订阅
+
+        Returns:
+            TransactionStatus: 成功、失败，超时未确认时返回 EXPIRED
+        """
+        key = str(signature)
+        future = self._futures.get(key)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._futures[key] = future
+                self._registered_at[key] = time.monotonic()
+                self._start()
+                await self._subscribe(key)
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # 超时前最后查询一次
+            await self._poll([key])
+            if future.done():
+                return future.result()
+            return TransactionStatus.EXPIRED
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                del self._waiters[key]
+                await self._forget(key)
+
+    def resolve(self, signature: str, err) -> None:
+        """记录签名的确认结果，err 为 None 表示交易成功"""
+        future = self._futures.get(signature)
+        if future is None or future.done():
+            return
+        future.set_result(TransactionStatus.SUCCESS if err is None else TransactionStatus.FAILED)
+
+    async def _forget(self, key: str) -> None:
+        self._futures.pop(key, None)
+        self._registered_at.pop(key, None)
+        subscription_id = self._subscription_of.pop(key, None)
+        if subscription_id is None:
+            return
+        self._signature_of.pop(subscription_id, None)
+        await self._send("signatureUnsubscribe", [subscription_id], key)
+
+    async def _send(self, method: str, params: list, signature: str) -> None:
+        if self.websocket is None:
+            # 尚未连接，连接后会订阅全部签名
+            return
+        request_id = next(self._ids)
+        self._pending[request_id] = (method, signature)
+        try:
+            await self.websocket.send(
+                json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            )
+        except Exception as e:
+            # 连接断开时由批量查询兜底
+            self._pending.pop(request_id, None)
+            logger.warning(f"Failed to send {method} for {signature}: {e}")
+
+    async def _subscribe(self, signature: str) -> None:
+        await self._send(
+            "signatureSubscribe", [signature, {"commitment": self.commitment}], signature
+        )
+
+    async def handle_message(self, message: dict) -> None:
+        """处理单条 websocket 消息"""
+        if "id" in message:
+            method, signature = self._pending.pop(message["id"], (None, None))
+            if method != "signatureSubscribe":
+                return
+            if "error" in message:
+                logger.error(f"Failed to subscribe signature {signature}: {message['error']}")
+                return
+            if signature not in self._futures:
+                # 订阅响应返回前已经完成
+                await self._send("signatureUnsubscribe", [message["result"]], signature)
+                return
+            self._subscription_of[signature] = message["result"]
+            self._signature_of[message["result"]] = signature
+            return
+
+        if message.get("method") != "signatureNotification":
+            return
+        params = message["params"]
+        # 推送后服务端会自动取消订阅
+        signature = self._signature_of.pop(params["subscription"], None)
+        if signature is None:
+            return
+        self._subscription_of.pop(signature, None)
+        value = params["result"]["value"]
+        if isinstance(value, dict):
+            self.resolve(signature, value.get("err"))
+
+    async def _poll(self, signatures: list[str]) -> None:
+        """批量查询签名状态，已确认的签名直接返回结果"""
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST):
+            chunk = signatures[i : i + MAX_SIGNATURES_PER_REQUEST]
+            try:
+                resp = await self.client.get_signature_statuses(
+                    [Signature.from_string(signature) for signature in chunk],
+                    search_transaction_history=True,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to get signature statuses: {e}")
+                continue
+            for signature, status in zip(chunk, resp.value, strict=True):
+                if status is None or status.confirmation_status not in (
+                    TransactionConfirmationStatus.Confirmed,
+                    TransactionConfirmationStatus.Finalized,
+                ):
+                    continue
+                self.resolve(signature, status.err)
+
+    def overdue(self) -> list[str]:
+        """需要批量查询的签名：websocket 未连接，或者订阅后超过 fallback_after 秒仍未确认"""
+        now = time.monotonic()
+        return [
+            signature
+            for signature, registered_at in self._registered_at.items()
+            if not self._futures[signature].done()
+            and (self.websocket is None or now - registered_at >= self.fallback_after)
+        ]
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            signatures = self.overdue()
+            if signatures:
+                await self._poll(signatures)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                async with websockets.connect(
+                    self.websocket_url,
+                    ping_interval=20,
+                    ping_timeout=30,
+                    close_timeout=20,
+                ) as websocket:
+                    self.websocket = websocket
+                    failures = 0
+                    logger.info(f"Connected to {self.websocket_url} for signature confirmations")
+                    for signature in list(self._futures):
+                        await self._subscribe(signature)
+                    async for raw in websocket:
+                        await self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Signature subscription error: {e}")
+            finally:
+                self.websocket = None
+                self._pending.clear()
+                self._signature_of.clear()
+                self._subscription_of.clear()
+
+            failures += 1
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**failures))
+            logger.info(f"Reconnecting signature subscription in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def stop(self) -> None:
+        for task in (self._task, self._poll_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = None
+        self._poll_task = None
@@ -3,19 +3,19 @@
 交易验证器用于验证交易的上链情况.
 """
 
-import asyncio, time
-
 from solbot_common.constants import SOL_DECIMAL
 from solbot_common.log import logger
 from solbot_common.models.swap_record import SwapRecord, TransactionStatus
 from solbot_common.types.swap import SwapEvent
 from solbot_common.types.enums import SwapDirection
-from solbot_common.utils.utils import validate_transaction
 from solbot_db.session import NEW_ASYNC_SESSION, provide_session
 from solbot_cache.token_info import TokenInfoCache
 from solders.signature import Signature  # type: ignore
 
+from trading.pipeline import SendTracker
+
 from .analyzer import TransactionAnalyzer
+from .confirmation import SignatureConfirmer
 
 
 class SwapSettlementProcessor:
@@ -27,6 +27,8 @@ class SwapSettlementProcessor:
     def __init__(self):
         self.analyzer = TransactionAnalyzer()
         self.token_info_cache = TokenInfoCache()
+        self.send_tracker = SendTracker()
+        self.confirmer = SignatureConfirmer()
 
     @provide_session
     async def record(
@@ -42,8 +44,8 @@ class SwapSettlementProcessor:
     async def validate(self, tx_hash: Signature) -> TransactionStatus | None:
         """验证交易是否已经上链.
 
-        调用 validate 会返回一个协程，协程会在 60 秒内等待交易的上链状态。
-        如果协程超时，则返回 None。
+        调用 validate 会返回一个协程，协程会在 10 秒内等待交易的上链状态。
+        如果协程超时，则返回 TransactionStatus.EXPIRED。
 
         Examples:
             >>> from solders.signature import Signature  # type: ignore
@@ -65,27 +67,8 @@ class SwapSettlementProcessor:
         Returns:
             Coroutine[None, None, TransactionStatus | None]: 协程
         """
-        # 此处取循环次数和轮询时间的小值
-        tx_status = None
-        n = 10
-        time_threshold = 10
-        start_time = time.time()
-        for i in range(n):
-            try:
-                tx_status = await validate_transaction(tx_hash)
-            except Exception as e:
-                logger.error(f"({i}/{n}) Retry to get transaction status: {tx_hash}.")
-                await asyncio.sleep(1)
-                continue
-
-            if tx_status is True:
-                return TransactionStatus.SUCCESS
-            elif tx_status is False:
-                return TransactionStatus.FAILED
-            if time.time() - start_time > time_threshold:
-                break
-            await asyncio.sleep(0.5)
-        return TransactionStatus.EXPIRED
+        # 所有交易共用一个 signatureSubscribe 连接，未及时推送时批量查询状态
+        return await self.confirmer.confirm(tx_hash, timeout=10)
 
     async def process(self, signature: Signature | None, swap_event: SwapEvent) -> SwapRecord:
         """处理交易
@@ -123,7 +106,19 @@ class SwapSettlementProcessor:
                 output_token_decimals=output_token_decimals,
             )
         else:
-            tx_status = await self.validate(signature)
+            send_error = await self.send_tracker.wait(signature)
+            if send_error is not None:
+                # 后台发送失败，交易不会上链，无需轮询
+                logger.error(f"Transaction {signature} was not sent: {send_error!r}")
+                tx_status = TransactionStatus.FAILED
+            else:
+                tx_status = await self.validate(signature)
+            if tx_status == TransactionStatus.FAILED and send_error is None:
+                # 上链失败的交易也记录 CU 消耗，CU 不足时提高上限
+                try:
+                    await self.analyzer.observe_failed_transaction(str(signature))
+                except Exception as e:
+                    logger.warning(f"Failed to observe failed transaction {signature}: {e}")
             # PREF: 在此考虑是否重新提交交易。
             # 更新失败，处理target状态
             if tx_status != TransactionStatus.SUCCESS:
@@ -143,7 +138,11 @@ class SwapSettlementProcessor:
                 data = await self.analyzer.analyze_transaction(
                     str(signature),
                     user_account=swap_event.user_pubkey,
-                    mint=swap_event.output_mint,
+                    mint=(
+                        output_mint
+                        if swap_event.swap_direction == SwapDirection.Buy
+                        else input_mint
+                    ),
                 )
                 logger.debug(f"Transaction analysis data: {data}")
 
@@ -0,0 +1,316 @@
+"""本地自动滑点估计
+
+calculate_auto_slippage 需要先向 Jupiter 报价才能生成跟单的 SwapEvent，
+Jupiter 的频率限制和网络延迟都落在跟单的关键路径上。这里改为在本地估计滑点：
+
+- 价格影响：由缓存的池子状态按恒定乘积计算，Pump 使用 bonding curve 的虚拟储备，
+  Raydium AMM v4 使用金库余额，与交易构建器报价使用的是同一份缓存
+- 波动：由 TxEvent 流中该代币最近的成交价计算，成交价的对数收益率的标准差
+- 校准：在后台按代币限频向 Jupiter 报价，以 Jupiter 的价格影响与本地估计的比值
+  （按路由的指数移动平均）修正本地的价格影响，Jupiter 不在关键路径上
+
+滑点 = 价格影响 * 校准系数 * price_impact_multiplier + 波动 * volatility_multiplier，
+并限制在 [min_slippage_bps, max_slippage_bps] 之间，与 calculate_auto_slippage 一致。
+"""
+
+import asyncio
+import itertools
+import math
+import statistics
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from solbot_cache import BondingCurveCache, VaultBalanceCache
+from solbot_cache.rayidum import get_preferred_pool
+from solbot_common.config import settings
+from solbot_common.constants import WSOL
+from solbot_common.log import logger
+from solbot_common.types.enums import SwapDirection
+from solbot_common.types.tx import TxEvent
+from solbot_common.utils.pool import AmmV4PoolKeys
+from solbot_common.utils.quote import QuoteService
+
+from trading.transaction.protocol import TradingRoute
+
+
+def price_impact(amount_in: int, reserve_in: int) -> float:
+    """恒定乘积池子的价格影响（0~1），不含手续费
+
+    成交均价为 reserve_out / (reserve_in + amount_in)，相对现价 reserve_out / reserve_in
+    偏离 amount_in / (reserve_in + amount_in)。
+    """
+    if amount_in <= 0 or reserve_in <= 0:
+        return 0.0
+    return amount_in / (reserve_in + amount_in)
+
+
+def trade_price(tx_event: TxEvent) -> float | None:
+    """TxEvent 的成交价（每最小单位代币的 lamports），只用于计算收益率，不需要换算精度"""
+    if tx_event.tx_direction == SwapDirection.Buy:
+        sol_amount, token_amount = tx_event.from_amount, tx_event.to_amount
+    else:
+        sol_amount, token_amount = tx_event.to_amount, tx_event.from_amount
+    if sol_amount <= 0 or token_amount <= 0:
+        return None
+    return sol_amount / token_amount
+
+
+@dataclass
+class SlippageEstimate:
+    """一次滑点估计的结果"""
+
+    slippage_bps: int
+    # 池子状态不可用时为 None
+    route: TradingRoute | None = None
+    # 本地计算的价格影响（0~1），未校准
+    price_impact: float = 0.0
+    # 成交价对数收益率的标准差（0~1）
+    volatility: float = 0.0
+
+
+class SlippageEstimator:
+    """基于本地池子状态和近期波动的滑点估计"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        min_slippage_bps: int = 250,
+        max_slippage_bps: int = 3000,
+        price_impact_multiplier: float = 1.5,
+        volatility_multiplier: float = 2.0,
+        default_slippage_bps: int = 500,
+        reserve_timeout: float | None = None,
+        calibration_interval: float | None = None,
+        calibration_alpha: float = 0.2,
+        price_window: float = 60,
+        max_prices: int = 64,
+        max_mints: int = 1024,
+    ) -> None:
+        """
+        Args:
+            min_slippage_bps: 最小滑点（bps）
+            max_slippage_bps: 最大滑点（bps）
+            price_impact_multiplier: 价格影响的倍数
+            volatility_multiplier: 波动的倍数
+            default_slippage_bps: 池子状态不可用时的滑点（bps）
+            reserve_timeout: 读取池子状态的超时时间（秒），默认使用 trading.route_quote_timeout_ms
+            calibration_interval: 同一代币两次 Jupiter 校准的最小间隔（秒），
+                默认使用 trading.slippage_calibration_interval，为 0 时不校准
+            calibration_alpha: 校准系数指数移动平均的权重
+            price_window: 计算波动使用的成交价的时间窗口（秒）
+            max_prices: 每个代币最多保留的成交价数
+            max_mints: 最多记录成交价的代币数
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        trading = settings.trading
+        self.min_slippage_bps = min_slippage_bps
+        self.max_slippage_bps = max_slippage_bps
+        self.price_impact_multiplier = price_impact_multiplier
+        self.volatility_multiplier = volatility_multiplier
+        self.default_slippage_bps = default_slippage_bps
+        self.reserve_timeout = (
+            trading.route_quote_timeout_ms / 1000 if reserve_timeout is None else reserve_timeout
+        )
+        self.calibration_interval = (
+            trading.slippage_calibration_interval
+            if calibration_interval is None
+            else calibration_interval
+        )
+        self.calibration_alpha = calibration_alpha
+        self.price_window = price_window
+        self.max_prices = max_prices
+        self.max_mints = max_mints
+
+        # mint -> [(时间, 成交价)]
+        self._prices: OrderedDict[str, deque[tuple[float, float]]] = OrderedDict()
+        # 路由 -> Jupiter 价格影响 / 本地价格影响
+        self.scales: dict[TradingRoute, float] = {}
+        # mint -> 上次校准的时间
+        self._calibrated_at: OrderedDict[str, float] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self.estimates = 0
+        self.fallbacks = 0
+        self.calibrations = 0
+
+    def __repr__(self) -> str:
+        return "SlippageEstimator()"
+
+    def observe(self, tx_event: TxEvent) -> None:
+        """记录 TxEvent 的成交价，用于计算波动"""
+        price = trade_price(tx_event)
+        if price is None:
+            return
+        prices = self._prices.get(tx_event.mint)
+        if prices is None:
+            prices = self._prices[tx_event.mint] = deque(maxlen=self.max_prices)
+            while len(self._prices) > self.max_mints:
+                self._prices.popitem(last=False)
+        else:
+            self._prices.move_to_end(tx_event.mint)
+        prices.append((time.monotonic(), price))
+
+    def volatility(self, mint: str) -> float:
+        """时间窗口内相邻成交价对数收益率的标准差，成交价少于 3 个时为 0"""
+        prices = self._prices.get(mint)
+        if not prices:
+            return 0.0
+        since = time.monotonic() - self.price_window
+        recent = [price for at, price in prices if at >= since]
+        if len(recent) < 3:
+            return 0.0
+        returns = [math.log(b / a) for a, b in itertools.pairwise(recent)]
+        return statistics.pstdev(returns)
+
+    async def reserves(
+        self, mint: str, swap_direction: SwapDirection
+    ) -> tuple[TradingRoute, int, int] | None:
+        """从池子状态缓存读取 (路由, 输入储备, 输出储备)，优先使用未完成的 Pump bonding curve"""
+        entry = await BondingCurveCache().get(mint)
+        if entry is not None and not entry.account.complete:
+            account = entry.account
+            sol_reserve = account.virtual_sol_reserves
+            token_reserve = account.virtual_token_reserves
+            route = TradingRoute.PUMP
+        else:
+            pool_data = await get_preferred_pool(mint)
+            if pool_data is None:
+                return None
+            pool_keys = await AmmV4PoolKeys.from_pool_data(
+                pool_id=pool_data["pool_id"],
+                amm_data=pool_data["amm_data"],
+                market_data=pool_data["market_data"],
+            )
+            base_reserve, quote_reserve = await VaultBalanceCache().get_balances(
+                pool_keys.base_vault, pool_keys.quote_vault
+            )
+            if pool_keys.base_mint == WSOL:
+                sol_reserve, token_reserve = base_reserve, quote_reserve
+            else:
+                sol_reserve, token_reserve = quote_reserve, base_reserve
+            route = TradingRoute.RAYDIUM_V4
+        if sol_reserve <= 0 or token_reserve <= 0:
+            return None
+        if swap_direction == SwapDirection.Buy:
+            return route, sol_reserve, token_reserve
+        return route, token_reserve, sol_reserve
+
+    async def estimate(
+        self, mint: str, amount: int, swap_direction: SwapDirection
+    ) -> SlippageEstimate:
+        """估计滑点，池子状态不可用时使用默认滑点
+
+        Args:
+            mint: 代币的 mint
+            amount: 输入数量（最小单位），买入为 lamports，卖出为代币数量
+            swap_direction: 交易方向
+        """
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        swap_direction = SwapDirection(swap_direction)
+        self.estimates += 1
+        volatility = self.volatility(mint)
+        try:
+            reserves = await asyncio.wait_for(
+                self.reserves(mint, swap_direction), timeout=self.reserve_timeout
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read pool state of {mint}: {e!r}")
+            reserves = None
+
+        if reserves is None:
+            self.fallbacks += 1
+            self.calibrate(mint, amount, swap_direction, None, 0.0)
+            return SlippageEstimate(self.default_slippage_bps, volatility=volatility)
+
+        route, reserve_in, _ = reserves
+        impact = price_impact(amount, reserve_in)
+        scale = self.scales.get(route, 1.0)
+        slippage_bps = (
+            impact * scale * self.price_impact_multiplier + volatility * self.volatility_multiplier
+        ) * 10000
+        slippage_bps = int(min(max(slippage_bps, self.min_slippage_bps), self.max_slippage_bps))
+        logger.info(
+            f"Local slippage for {amount} {swap_direction.value} {mint}: route={route.value}, "
+            f"price_impact={impact * 100:.4f}%, scale={scale:.3f}, "
+            f"volatility={volatility * 100:.4f}%, final_slippage={slippage_bps}bps"
+        )
+        self.calibrate(mint, amount, swap_direction, route, impact)
+        return SlippageEstimate(slippage_bps, route, impact, volatility)
+
+    def calibrate(
+        self,
+        mint: str,
+        amount: int,
+        swap_direction: SwapDirection,
+        route: TradingRoute | None,
+        impact: float,
+    ) -> None:
+        """在后台向 Jupiter 报价校准本地的价格影响，同一代币在 calibration_interval 内只校准一次"""
+        if self.calibration_interval <= 0:
+            return
+        now = time.monotonic()
+        calibrated_at = self._calibrated_at.get(mint)
+        if calibrated_at is not None and now - calibrated_at < self.calibration_interval:
+            return
+        self._calibrated_at[mint] = now
+        self._calibrated_at.move_to_end(mint)
+        while len(self._calibrated_at) > self.max_mints:
+            self._calibrated_at.popitem(last=False)
+
+        task = asyncio.create_task(self._calibrate(mint, amount, swap_direction, route, impact))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _calibrate(
+        self,
+        mint: str,
+        amount: int,
+        swap_direction: SwapDirection,
+        route: TradingRoute | None,
+        impact: float,
+    ) -> None:
+        if swap_direction == SwapDirection.Buy:
+            input_mint, output_mint = WSOL.__str__(), mint
+        else:
+            input_mint, output_mint = mint, WSOL.__str__()
+        try:
+            # 池子状态不可用时也报价一次，为同一数量附近的后续报价预热 Jupiter 报价缓存
+            quote = await QuoteService().get_quote(input_mint, output_mint, amount, exact=False)
+            jupiter_impact = float(quote["priceImpactPct"])
+        except Exception as e:
+            logger.info(f"Failed to calibrate slippage of {mint}: {e!r}")
+            return
+        # 价格影响过小时比值没有意义
+        if route is None or impact < 1e-4 or jupiter_impact <= 0:
+            return
+        ratio = min(max(jupiter_impact / impact, 0.2), 5.0)
+        scale = self.scales.get(route, 1.0)
+        self.scales[route] = scale + self.calibration_alpha * (ratio - scale)
+        self.calibrations += 1
+        logger.info(
+            f"Calibrated {route.value} slippage with {mint}: local={impact * 100:.4f}%, "
+            f"jupiter={jupiter_impact * 100:.4f}%, scale={self.scales[route]:.3f}"
+        )
+
+    def stats(self) -> dict:
+        """估计、回退到默认滑点和校准的次数，以及各路由的校准系数"""
+        return {
+            "estimates": self.estimates,
+            "fallbacks": self.fallbacks,
+            "calibrations": self.calibrations,
+            "scales": {route.value: round(scale, 3) for route, scale in self.scales.items()},
+        }
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -2,9 +2,14 @@ from trading.transaction.base import TransactionSender
 from trading.transaction.builders.base import TransactionBuilder
 from trading.transaction.factory import TradingService
 from trading.transaction.protocol import TradingRoute
-from trading.transaction.sender import DefaultTransactionSender, JitoTransactionSender
+from trading.transaction.sender import (
+    BroadcastSender,
+    DefaultTransactionSender,
+    JitoTransactionSender,
+)
 
 __all__ = [
+    "BroadcastSender",
     "DefaultTransactionSender",
     "JitoTransactionSender",
     "TradingRoute",
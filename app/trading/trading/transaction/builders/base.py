@@ -5,6 +5,7 @@ from solders.keypair import Keypair  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
 from solbot_common.types.enums import SwapDirection, SwapInType
+from trading.transaction.protocol import SwapQuote
 
 
 class TransactionBuilder(ABC):
@@ -43,3 +44,21 @@ class TransactionBuilder(ABC):
             VersionedTransaction: 构建好的交易
         """
         pass
+
+    async def quote(
+        self,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+    ) -> SwapQuote | None:
+        """报价，供路由比较各个构建器的预期输出
+
+        Args:
+            token_address (str): 代币地址
+            amount_in (int): 输入数量，买入时为 lamports，卖出时为代币的最小单位
+            swap_direction (SwapDirection): 交易方向
+
+        Returns:
+            SwapQuote | None: 报价，该构建器无法交易此代币时返回 None
+        """
+        return None
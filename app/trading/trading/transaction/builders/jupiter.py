@@ -7,6 +7,7 @@ from solders.keypair import Keypair  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
 from solbot_common.types.enums import SwapDirection, SwapInType
+from trading.transaction.protocol import SwapQuote, TradingRoute
 from trading.tx import sign_transaction_from_raw
 from .base import TransactionBuilder
 
@@ -17,9 +18,22 @@ class JupiterTransactionBuilder(TransactionBuilder):
     def __init__(self, rpc_client: AsyncClient) -> None:
         super().__init__(rpc_client=rpc_client)
         self.token_info_cache = TokenInfoCache()
-        self.jupiter_client = JupiterAPI() # base_url="https://public.jupiterapi.com"
+        self.jupiter_client = JupiterAPI()
         self.shyft = ShyftAPI()
 
+    async def quote(
+        self,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+    ) -> SwapQuote | None:
+        if swap_direction == SwapDirection.Buy:
+            token_in, token_out = str(WSOL), token_address
+        else:
+            token_in, token_out = token_address, str(WSOL)
+        quote = await self.jupiter_client.get_quote(token_in, token_out, amount_in, slippage_bps=0)
+        return SwapQuote(TradingRoute.DEX, amount_in, int(quote["outAmount"]))
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
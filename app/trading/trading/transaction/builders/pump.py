@@ -1,33 +1,32 @@
-from solbot_cache import AccountAmountCache, MintAccountCache
+from functools import lru_cache
+
+from solbot_cache import AccountAmountCache, BondingCurveCache, MintAccountCache
 from solbot_common.constants import (
-    ASSOCIATED_TOKEN_PROGRAM,
     PUMP_BUY_METHOD,
-    PUMP_FUN_ACCOUNT,
     PUMP_FUN_PROGRAM,
-    PUMP_GLOBAL_ACCOUNT,
     PUMP_SELL_METHOD,
-    RENT_PROGRAM_ID,
     SOL_DECIMAL,
-    SYSTEM_PROGRAM_ID,
     TOKEN_PROGRAM_ID,
     WSOL,
 )
-from solbot_common.IDL.pumpfun import PumpFunInterface
+from solbot_common.IDL.pumpfun import build_buy_instruction, build_sell_instruction
 from solbot_common.log import logger
-from solbot_common.utils.utils import get_bonding_curve_account, get_global_account
+from solbot_common.utils.utils import get_global_account
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 from spl.token.instructions import (
     CloseAccountParams,
     close_account,
-    create_associated_token_account,
+    create_idempotent_associated_token_account,
     get_associated_token_address,
 )
 
 from trading.exceptions import BondingCurveNotFound
+from trading.compute_units import profile_name
+from trading.transaction.protocol import SwapQuote, TradingRoute
 from trading.tx import build_transaction
-from trading.utils import has_ata, max_amount_with_slippage, min_amount_with_slippage
+from trading.utils import max_amount_with_slippage, min_amount_with_slippage
 
 from .base import TransactionBuilder
 
@@ -36,10 +35,36 @@ from solbot_common.utils.shyft import ShyftAPI
 from solbot_cache.token_info import TokenInfoCache
 
 
+@lru_cache(maxsize=4096)
+def _get_ata(owner: Pubkey, mint: Pubkey) -> Pubkey:
+    return get_associated_token_address(owner=owner, mint=mint)
+
+
 # Reference: https://github.com/wisarmy/raytx/blob/main/src/pump.rs
 class PumpTransactionBuilder(TransactionBuilder):
     shyft = ShyftAPI()
     token_info_cache = TokenInfoCache()
+
+    async def quote(
+        self,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+    ) -> SwapQuote | None:
+        entry = await BondingCurveCache().get(token_address)
+        if entry is None or entry.account.complete or entry.account.virtual_sol_reserves == 0:
+            return None
+        global_account = await get_global_account(self.rpc_client, PUMP_FUN_PROGRAM)
+        if global_account is None:
+            return None
+        fee_bps = global_account.fee_basis_points
+        if swap_direction == SwapDirection.Buy:
+            # 手续费在 SOL 成本之外收取
+            amount_out = entry.account.get_buy_price(amount_in * 10000 // (10000 + fee_bps))
+        else:
+            amount_out = entry.account.get_sell_price(amount_in, fee_bps)
+        return SwapQuote(TradingRoute.PUMP, amount_in, amount_out)
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
@@ -73,8 +98,12 @@ class PumpTransactionBuilder(TransactionBuilder):
 
         pump_program = PUMP_FUN_PROGRAM
 
-        result = await get_bonding_curve_account(self.rpc_client, mint, pump_program)
-        bonding_curve, associated_bonding_curve, bonding_curve_account = result
+        entry = await BondingCurveCache().get(mint)
+        if entry is None:
+            raise BondingCurveNotFound(f"bonding curve account not found for {mint}")
+        bonding_curve = entry.bonding_curve
+        associated_bonding_curve = entry.associated_bonding_curve
+        bonding_curve_account = entry.account
 
         global_account = await get_global_account(self.rpc_client, pump_program)
         if global_account is None:
@@ -82,19 +111,15 @@ class PumpTransactionBuilder(TransactionBuilder):
 
         fee_recipient = global_account.fee_recipient
 
-        in_ata = get_associated_token_address(owner=owner, mint=token_in)
-        out_ata = get_associated_token_address(owner=owner, mint=token_out)
+        in_ata = _get_ata(owner, token_in)
+        out_ata = _get_ata(owner, token_out)
 
         create_instruction = None
         close_instruction = None
         if swap_direction == SwapDirection.Buy:
-            # 如果 ata 账户不存在，需要创建
-            if not await has_ata(
-                self.rpc_client,
-                owner,
-                token_out,
-            ):
-                create_instruction = create_associated_token_account(owner, owner, token_out)
+            # 总是使用幂等的创建指令，账户已存在时不会失败；代币账户索引收不到
+            # 在其他地方关闭 ATA 的推送，不能据此省略创建
+            create_instruction = create_idempotent_associated_token_account(owner, owner, token_out)
 
             amount_specified = int(ui_amount * 10 ** SOL_DECIMAL)
         elif swap_direction == SwapDirection.Sell:
@@ -159,20 +184,6 @@ class PumpTransactionBuilder(TransactionBuilder):
                 if token_amount < min_amount_out:
                     raise ValueError(f"已达滑点上限，最小输出金额: {min_amount_out}, 实际输出金额: {token_amount}")
                 token_amount = min_amount_out
-            input_accounts = {
-                "fee_recipient": fee_recipient,
-                "mint": mint,
-                "bonding_curve": bonding_curve,
-                "associated_bonding_curve": associated_bonding_curve,
-                "associated_user": out_ata,
-                "user": owner,
-                "global": PUMP_GLOBAL_ACCOUNT,
-                "system_program": SYSTEM_PROGRAM_ID,
-                "token_program": program_id,
-                "rent": RENT_PROGRAM_ID,
-                "event_authority": PUMP_FUN_ACCOUNT,
-                "program": PUMP_FUN_PROGRAM,
-            }
         elif swap_direction == SwapDirection.Sell:
             sol_output = (
                 amount_specified
@@ -184,35 +195,28 @@ class PumpTransactionBuilder(TransactionBuilder):
             min_sol_cost = min_amount_with_slippage(sol_output, 9900)
             sol_amount_threshold = min_sol_cost
             token_amount = amount_specified
-            input_accounts = {
-                "fee_recipient": fee_recipient,
-                "mint": mint,
-                "bonding_curve": bonding_curve,
-                "associated_bonding_curve": associated_bonding_curve,
-                "associated_user": in_ata,
-                "user": owner,
-                "global": PUMP_GLOBAL_ACCOUNT,
-                "system_program": SYSTEM_PROGRAM_ID,
-                "token_program": program_id,
-                "associated_token_program": ASSOCIATED_TOKEN_PROGRAM,
-                "rent": RENT_PROGRAM_ID,
-                "event_authority": PUMP_FUN_ACCOUNT,
-                "program": PUMP_FUN_PROGRAM,
-            }
 
         logger.info(
             f"token_amount: {token_amount}, sol_amount_threshold: {sol_amount_threshold}, unit_price: {unit_price}"
         )
 
         instructions = []
-        pumpfun = PumpFunInterface(keypair, self.rpc_client)
-        pump_method = pumpfun.program.methods[swap_direction]
-        build_swap_instruction = (
-            pump_method.args([token_amount, sol_amount_threshold])
-            .accounts(input_accounts)
-            .instruction()
+        build_instruction = (
+            build_buy_instruction
+            if swap_direction == SwapDirection.Buy
+            else build_sell_instruction
+        )
+        build_swap_instruction = build_instruction(
+            token_amount,
+            sol_amount_threshold,
+            user=owner,
+            mint=mint,
+            fee_recipient=fee_recipient,
+            bonding_curve=bonding_curve,
+            associated_bonding_curve=associated_bonding_curve,
+            associated_user=out_ata if swap_direction == SwapDirection.Buy else in_ata,
+            token_program=program_id,
         )
-        # logger.debug(f"Build swap input accounts: {input_accounts}")
 
         if create_instruction is not None:
             instructions.append(create_instruction)
@@ -234,4 +238,5 @@ class PumpTransactionBuilder(TransactionBuilder):
             instructions=instructions,
             priority_fee=priority_fee,
             use_jito=use_jito,
+            profile=profile_name(TradingRoute.PUMP.value, swap_direction.value),
         )
@@ -2,14 +2,12 @@ import base64
 import os
 
 from loguru import logger
-from solana.rpc.commitment import Processed
-from solana.rpc.types import TokenAccountOpts
-from solbot_cache import get_min_balance_rent
+from solbot_cache import TokenAccountIndexCache, VaultBalanceCache, get_min_balance_rent
 from solbot_cache.rayidum import get_preferred_pool
 from solbot_common.constants import ACCOUNT_LAYOUT_LEN, SOL_DECIMAL, TOKEN_PROGRAM_ID, WSOL
 from solbot_common.utils.pool import (
     AmmV4PoolKeys,
-    get_amm_v4_reserves,
+    amm_v4_amount_out,
     make_amm_v4_swap_instruction,
 )
 from solbot_common.utils.utils import get_associated_token_address, get_token_balance
@@ -25,10 +23,12 @@ from spl.token.instructions import (
     CloseAccountParams,  # type: ignore
     InitializeAccountParams,
     close_account,
-    create_associated_token_account,
+    create_idempotent_associated_token_account,
     initialize_account,
 )
 
+from trading.compute_units import profile_name
+from trading.transaction.protocol import SwapQuote, TradingRoute
 from trading.tx import build_transaction
 
 from .base import TransactionBuilder
@@ -37,6 +37,53 @@ from solbot_common.types.enums import SwapDirection, SwapInType
 
 
 class RaydiumV4TransactionBuilder(TransactionBuilder):
+    async def get_reserves(self, pool_keys: AmmV4PoolKeys) -> tuple[int, int, int]:
+        """获取池子的 SOL 储备、代币储备（最小单位）和代币精度
+
+        与链上一致，储备为金库余额减去尚未提取的 PnL。金库余额来自金库余额缓存，
+        needTakePnl 来自获取池子状态时的快照。
+        """
+        base_balance, quote_balance = await VaultBalanceCache(self.rpc_client).get_balances(
+            pool_keys.base_vault, pool_keys.quote_vault
+        )
+        base_reserve = max(0, base_balance - pool_keys.need_take_pnl_base)
+        quote_reserve = max(0, quote_balance - pool_keys.need_take_pnl_quote)
+        if pool_keys.base_mint == WSOL:
+            return base_reserve, quote_reserve, pool_keys.quote_decimals
+        return quote_reserve, base_reserve, pool_keys.base_decimals
+
+    async def quote(
+        self,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+    ) -> SwapQuote | None:
+        pool_data = await get_preferred_pool(token_address)
+        if pool_data is None:
+            return None
+        pool_keys = await AmmV4PoolKeys.from_pool_data(
+            pool_id=pool_data["pool_id"],
+            amm_data=pool_data["amm_data"],
+            market_data=pool_data["market_data"],
+        )
+        sol_reserve, token_reserve, _ = await self.get_reserves(pool_keys)
+        if swap_direction == SwapDirection.Buy:
+            reserve_in, reserve_out = sol_reserve, token_reserve
+        else:
+            reserve_in, reserve_out = token_reserve, sol_reserve
+        amount_out = amm_v4_amount_out(
+            amount_in,
+            reserve_in,
+            reserve_out,
+            pool_keys.swap_fee_numerator,
+            pool_keys.swap_fee_denominator,
+        )
+        return SwapQuote(TradingRoute.RAYDIUM_V4, amount_in, amount_out)
+
+    async def get_token_account(self, owner: Pubkey, mint: Pubkey) -> Pubkey | None:
+        """获取 owner 持有 mint 的代币账户，从钱包的代币账户索引中查找"""
+        return await TokenAccountIndexCache().get_token_account(owner, mint)
+
     async def build_buy_instructions(
         self,
         payer_keypair: Keypair,
@@ -77,44 +124,43 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         amount_in = int(sol_in * 10 ** SOL_DECIMAL)
 
         # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
+        sol_reserve, token_reserve, token_decimal = await self.get_reserves(pool_keys)
 
         # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_sol_in = sol_in * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_quote_reserve = quote_reserve + effective_sol_in
-        new_base_reserve = constant_product / new_quote_reserve
-        amount_out = base_reserve - new_base_reserve
+        amount_out = amm_v4_amount_out(
+            amount_in,
+            sol_reserve,
+            token_reserve,
+            pool_keys.swap_fee_numerator,
+            pool_keys.swap_fee_denominator,
+        )
 
         # 应用跟单滑点
         if target_price is None:
-            slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-            minimum_amount_out = int(amount_out * slippage_adjustment * (10**token_decimal))
+            minimum_amount_out = amount_out * (10000 - slippage_bps) // 10000
         else:
             minimum_amount_out = int(target_price * (1 - slippage_bps / 10000) * sol_in * (10**token_decimal))
 
         # PREF: 如果minimum_amount_out小于amount_out，说明已达滑点上限，直接返回
         # logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
-        if amount_out*(10**token_decimal) < minimum_amount_out:
-            raise ValueError(f"已达滑点上限，最小输出金额: {minimum_amount_out}, 实际输出金额: {amount_out*(10**token_decimal)}")
+        if amount_out < minimum_amount_out:
+            raise ValueError(f"已达滑点上限，最小输出金额: {minimum_amount_out}, 实际输出金额: {amount_out}")
 
         # 检查代币账户是否存在
-        token_account = None
-        token_accounts = await self.rpc_client.get_token_accounts_by_owner(
-            payer_keypair.pubkey(), TokenAccountOpts(mint=token_mint), Processed
-        )
+        token_account = await self.get_token_account(payer_keypair.pubkey(), token_mint)
 
+        ata = get_associated_token_address(payer_keypair.pubkey(), token_mint)
         create_token_account_ix = None
-        if token_accounts.value:
-            token_account = token_accounts.value[0].pubkey
+        if token_account is not None and token_account != ata:
             logger.info(f"找到现有代币账户: {token_account}")
         else:
-            token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
-            create_token_account_ix = create_associated_token_account(
+            token_account = ata
+            # 总是使用幂等的创建指令：索引可能尚未收到进行中的交易创建的账户，
+            # 也收不到在其他地方关闭 ATA 的推送
+            create_token_account_ix = create_idempotent_associated_token_account(
                 payer_keypair.pubkey(), payer_keypair.pubkey(), token_mint
             )
-            logger.info(f"创建新的关联代币账户: {token_account}")
+            logger.info(f"使用关联代币账户: {token_account}")
 
         # 创建临时WSOL账户
         seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
@@ -244,24 +290,24 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             logger.info(f"卖出数量: {sell_amount}")
 
         # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
+        sol_reserve, token_reserve, token_decimal = await self.get_reserves(pool_keys)
+
+        # 计算输入金额
+        amount_in = int(sell_amount * (10**token_decimal))
 
         # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_token_in = sell_amount * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_base_reserve = base_reserve + effective_token_in
-        new_quote_reserve = constant_product / new_base_reserve
-        amount_out = quote_reserve - new_quote_reserve
+        amount_out = amm_v4_amount_out(
+            amount_in,
+            token_reserve,
+            sol_reserve,
+            pool_keys.swap_fee_numerator,
+            pool_keys.swap_fee_denominator,
+        )
 
         # 应用滑点
-        # slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
+        # minimum_amount_out = amount_out * (10000 - slippage_bps) // 10000
         # 卖出设为max滑点
-        slippage_adjustment = 1 - (9900 / 10000)
-        minimum_amount_out = int(amount_out * slippage_adjustment * 10 ** SOL_DECIMAL)
-
-        # 计算输入金额
-        amount_in = int(sell_amount * (10**token_decimal))
+        minimum_amount_out = amount_out * (10000 - 9900) // 10000
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
@@ -392,4 +438,5 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             instructions=instructions,
             use_jito=use_jito,
             priority_fee=priority_fee,
+            profile=profile_name(TradingRoute.RAYDIUM_V4.value, swap_direction.value),
         )
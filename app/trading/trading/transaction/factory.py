@@ -1,6 +1,9 @@
 import asyncio
 
+import backoff
+import httpx
 from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
@@ -8,6 +11,8 @@ from solders.transaction import VersionedTransaction  # type: ignore
 
 from solbot_common.types.enums import SwapDirection, SwapInType
 
+from trading.compute_units import ComputeUnitProfiler
+from trading.pipeline import PipelineMetrics, SendTracker
 from trading.transaction.base import TransactionSender
 from trading.transaction.builders.base import TransactionBuilder
 from trading.transaction.builders.gmgn import GMGNTransactionBuilder
@@ -15,7 +20,9 @@ from trading.transaction.builders.jupiter import JupiterTransactionBuilder
 from trading.transaction.builders.pump import PumpTransactionBuilder
 from trading.transaction.builders.ray_v4 import RaydiumV4TransactionBuilder
 from trading.transaction.protocol import TradingRoute
+from trading.transaction.router import TradingRouter
 from trading.transaction.sender import (
+    BroadcastSender,
     DefaultTransactionSender,
     GMGNTransactionSender,
     JitoTransactionSender,
@@ -29,6 +36,9 @@ class Swapper:
         """初始化交换服务"""
         self.builder = builder
         self.sender = sender
+        self.metrics = PipelineMetrics()
+        self.send_tracker = SendTracker()
+        self.compute_units = ComputeUnitProfiler()
 
     async def swap(
         self,
@@ -56,24 +66,54 @@ class Swapper:
             priority_fee (float | None, optional): 优先费用. Defaults to None.
 
         Returns:
-            Optional[Signature]: 交易签名，如果交易失败则返回 None
+            Optional[Signature]: 交易签名，如果交易失败则返回 None。
+                开启 async_send 时交易在后台发送，发送结果通过 SendTracker 获取
         """
-        transaction = await self.builder.build_swap_transaction(
-            keypair=keypair,
-            token_address=token_address,
-            ui_amount=ui_amount,
-            swap_direction=swap_direction,
-            slippage_bps=slippage_bps,
-            target_price=target_price,
-            in_type=in_type,
-            use_jito=use_jito,
-            priority_fee=priority_fee,
-        )
+        with self.metrics.measure("build"):
+            transaction = await self.builder.build_swap_transaction(
+                keypair=keypair,
+                token_address=token_address,
+                ui_amount=ui_amount,
+                swap_direction=swap_direction,
+                slippage_bps=slippage_bps,
+                target_price=target_price,
+                in_type=in_type,
+                use_jito=use_jito,
+                priority_fee=priority_fee,
+            )
         logger.debug(f"Built swap transaction: {transaction}")
-        signature = await self.sender.send_transaction(transaction)
+        if settings.trading.tx_simulate:
+            with self.metrics.measure("simulate"):
+                await self.compute_units.observe_simulation(transaction, self.builder.rpc_client)
+        if settings.trading.async_send:
+            # 签名在发送前就已确定，不等待节点响应
+            signature = transaction.signatures[0]
+            self.send_tracker.submit(signature, self._send_with_retry(transaction, use_jito))
+            return signature
+
+        with self.metrics.measure("send"):
+            signature = await self.sender.send_transaction(transaction, use_jito=use_jito)
         logger.info(f"Transaction sent successfully: {signature}")
         return signature
 
+    @backoff.on_exception(
+        backoff.expo,
+        (httpx.ConnectTimeout, httpx.ConnectError),
+        max_tries=3,
+        base=1.5,
+        factor=0.1,
+        max_time=2,
+    )
+    async def _send_with_retry(
+        self, transaction: VersionedTransaction, use_jito: bool
+    ) -> Signature:
+        """在后台发送交易，连接失败时重发
+
+        后台发送的异常不会回到 _execute_swap，这里使用与其相同的重试策略。
+        重发的是同一笔已签名的交易，签名不变，不会重复成交。
+        """
+        return await self.sender.send_transaction(transaction, use_jito=use_jito)
+
 
 class AggregateTransactionBuilder(TransactionBuilder):
     """聚合多个交易构建器,返回最快成功的结果"""
@@ -188,8 +228,13 @@ class AggregateTransactionBuilder(TransactionBuilder):
 class TradingService:
     """交易服务，协调交易的构建和执行"""
 
-    def __init__(self, rpc_client: AsyncClient):
-        """初始化交易服务"""
+    def __init__(self, rpc_client: AsyncClient, route_quote_timeout: float = 0.3):
+        """初始化交易服务
+
+        Args:
+            rpc_client (AsyncClient): RPC客户端
+            route_quote_timeout (float, optional): 路由报价超时时间（秒）. Defaults to 0.3.
+        """
         self._rpc_client = rpc_client
         # self._aggreage_txn_builder = AggregateTransactionBuilder(
         #     self._rpc_client,
@@ -205,6 +250,17 @@ class TradingService:
         self._gmgn_sender = GMGNTransactionSender(self._rpc_client)
         self._jito_sender = JitoTransactionSender(self._rpc_client)
         self.default_sender = DefaultTransactionSender(rpc_client)
+        self._broadcast_sender = (
+            BroadcastSender(self._rpc_client) if settings.trading.broadcast else None
+        )
+        self.router = TradingRouter(
+            {
+                TradingRoute.PUMP: self._pump_txn_builder,
+                TradingRoute.RAYDIUM_V4: self._raydium_v4_txn_builder,
+                TradingRoute.DEX: self._aggreage_txn_builder,
+            },
+            timeout=route_quote_timeout,
+        )
 
     def select_builder(self, route: TradingRoute) -> TransactionBuilder:
         if route == TradingRoute.PUMP:
@@ -219,7 +275,9 @@ class TradingService:
     def select_sender(
         self, builder: TransactionBuilder, use_jito: bool = False
     ) -> TransactionSender:
-        if isinstance(builder, GMGNTransactionBuilder):
+        if self._broadcast_sender is not None:
+            sender = self._broadcast_sender
+        elif isinstance(builder, GMGNTransactionBuilder):
             sender = self._gmgn_sender
         elif use_jito:
             sender = self._jito_sender
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from enum import Enum
 
 
@@ -27,3 +28,12 @@ class TradingRoute(Enum):
             raise ValueError(
                 f"Invalid trading route: {value}. Must be one of: {[e.value for e in cls]}"
             )
+
+
+@dataclass
+class SwapQuote:
+    """交易构建器给出的报价，数量均为最小单位"""
+
+    route: TradingRoute
+    amount_in: int
+    amount_out: int
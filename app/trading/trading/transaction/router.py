@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from solbot_common.log import logger
+from solbot_common.types.enums import SwapDirection
+
+from trading.transaction.builders.base import TransactionBuilder
+from trading.transaction.protocol import SwapQuote, TradingRoute
+
+
+@dataclass
+class RouteDecision:
+    """一次路由选择的结果"""
+
+    route: TradingRoute
+    # 是否因为没有可用报价而使用了备选路由
+    fallback: bool
+    quotes: dict[TradingRoute, SwapQuote] = field(default_factory=dict)
+    # 每个候选路由的报价耗时（秒），超时的路由记为超时时间
+    latencies: dict[TradingRoute, float] = field(default_factory=dict)
+    errors: dict[TradingRoute, str] = field(default_factory=dict)
+
+
+# 需要请求外部服务的路由，报价慢且占用 Jupiter 的请求额度
+REMOTE_ROUTES = frozenset({TradingRoute.DEX})
+
+
+def net_amount_out(quote: SwapQuote, swap_direction: SwapDirection, priority_fee: int) -> float:
+    """扣除优先费用后的预期输出
+
+    各路由的协议手续费已计入 amount_out；ATA 租金与路由无关，临时 WSOL 账户的租金在交易结束时退回，
+    都不参与比较。买入时输出为代币，按总花费折算为 amount_in 对应的代币数量；卖出时输出为 SOL，直接扣除。
+    """
+    if swap_direction == SwapDirection.Buy:
+        return quote.amount_out * quote.amount_in / (quote.amount_in + priority_fee)
+    return quote.amount_out - priority_fee
+
+
+class TradingRouter:
+    """并发向本地候选构建器报价，选择扣除费用后输出最多的路由
+
+    本地路由（Pump、Raydium）按缓存的链上状态报价，不访问网络。
+    只有所有本地路由都没有报价时，才请求远程路由（Jupiter），避免每笔交易都等待网络报价。
+    """
+
+    def __init__(self, builders: dict[TradingRoute, TransactionBuilder], timeout: float = 0.3):
+        """
+        Args:
+            builders: 路由 -> 交易构建器
+            timeout: 报价超时时间（秒），超时的路由不参与比较
+        """
+        self.builders = builders
+        self.timeout = timeout
+        self.wins: Counter[TradingRoute] = Counter()
+        self.fallbacks = 0
+        self._latency_sum: defaultdict[TradingRoute, float] = defaultdict(float)
+        self._latency_count: Counter[TradingRoute] = Counter()
+
+    async def _quote(
+        self,
+        route: TradingRoute,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+        latencies: dict[TradingRoute, float],
+    ) -> SwapQuote | None:
+        start = time.perf_counter()
+        try:
+            return await self.builders[route].quote(token_address, amount_in, swap_direction)
+        finally:
+            latencies[route] = time.perf_counter() - start
+
+    async def select(
+        self,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+        candidates: Sequence[TradingRoute],
+        fallback: TradingRoute,
+        priority_fee: int = 0,
+    ) -> RouteDecision:
+        """选择路由
+
+        Args:
+            token_address: 代币地址
+            amount_in: 输入数量（最小单位）
+            swap_direction: 交易方向
+            candidates: 候选路由
+            fallback: 所有报价都失败或超时时使用的路由
+            priority_fee: 优先费用（lamports）
+
+        Returns:
+            RouteDecision: 路由选择结果
+        """
+        latencies: dict[TradingRoute, float] = {}
+        routes = [route for route in candidates if route in self.builders]
+        local = [route for route in routes if route not in REMOTE_ROUTES]
+        remote = [route for route in routes if route in REMOTE_ROUTES]
+        decision = RouteDecision(route=fallback, fallback=True)
+        deadline = time.perf_counter() + self.timeout
+        await self._collect(
+            local, deadline, token_address, amount_in, swap_direction, decision, latencies
+        )
+        if not decision.quotes:
+            await self._collect(
+                remote, deadline, token_address, amount_in, swap_direction, decision, latencies
+            )
+        # 被取消的报价任务稍后仍会写入 latencies，这里取当前的快照
+        decision.latencies = dict(latencies)
+
+        if decision.quotes:
+            decision.route = max(
+                decision.quotes.values(),
+                key=lambda q: net_amount_out(q, swap_direction, priority_fee),
+            ).route
+            decision.fallback = False
+        self.record(token_address, decision)
+        return decision
+
+    async def _collect(
+        self,
+        routes: list[TradingRoute],
+        deadline: float,
+        token_address: str,
+        amount_in: int,
+        swap_direction: SwapDirection,
+        decision: RouteDecision,
+        latencies: dict[TradingRoute, float],
+    ) -> None:
+        """并发报价，在 deadline 前返回的有效报价写入 decision"""
+        if not routes:
+            return
+        tasks = {
+            asyncio.create_task(
+                self._quote(route, token_address, amount_in, swap_direction, latencies)
+            ): route
+            for route in routes
+        }
+        timeout = max(0.0, deadline - time.perf_counter())
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+            route = tasks[task]
+            latencies[route] = self.timeout
+            decision.errors[route] = "timeout"
+        for task in done:
+            route = tasks[task]
+            try:
+                quote = task.result()
+            except Exception as e:
+                decision.errors[route] = repr(e)
+                continue
+            if quote is None:
+                decision.errors[route] = "no route"
+            elif quote.amount_out > 0:
+                decision.quotes[route] = quote
+
+    def record(self, token_address: str, decision: RouteDecision) -> None:
+        self.wins[decision.route] += 1
+        if decision.fallback:
+            self.fallbacks += 1
+        for route, latency in decision.latencies.items():
+            self._latency_sum[route] += latency
+            self._latency_count[route] += 1
+
+        quotes = ", ".join(f"{r.value}={q.amount_out}" for r, q in decision.quotes.items())
+        latencies = ", ".join(
+            f"{r.value}={latency * 1000:.1f}ms" for r, latency in decision.latencies.items()
+        )
+        errors = ", ".join(f"{r.value}={error}" for r, error in decision.errors.items())
+        logger.info(
+            f"Route decision for {token_address}: {decision.route.value}"
+            f"{' (fallback)' if decision.fallback else ''}, quotes: [{quotes}], "
+            f"latency: [{latencies}], errors: [{errors}]"
+        )
+
+    def stats(self) -> dict:
+        """各路由的胜出次数和平均报价耗时（毫秒）"""
+        return {
+            "fallbacks": self.fallbacks,
+            "routes": {
+                route.value: {
+                    "wins": self.wins[route],
+                    "avg_quote_ms": round(
+                        self._latency_sum[route] / self._latency_count[route] * 1000, 1
+                    )
+                    if self._latency_count[route]
+                    else None,
+                }
+                for route in self.builders
+            },
+        }
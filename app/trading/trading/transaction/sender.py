@@ -1,16 +1,29 @@
+import asyncio
 import base64
+import time
+from collections.abc import Awaitable, Callable
 
+import httpx
+import orjson as json
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.types import TxOpts
+from solbot_cache import BlockhashRefresher
 from solbot_common.config import settings
 from solbot_common.log import logger
+from solbot_common.models.swap_record import TransactionStatus
+from solbot_common.utils.endpoint_pool import EndpointStats, RPCError
 from solbot_common.utils.gmgn import GmgnAPI
 from solbot_common.utils.jito import JitoClient
 from solders.signature import Signature  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
+from trading.settlement import SignatureConfirmer
+
 from .base import TransactionSender
 
+# blockhash 在其后 150 个区块内有效，最新 blockhash 的 last valid block height 约为当前区块高度加 150
+MAX_PROCESSING_AGE = 150
+
 
 class DefaultTransactionSender(TransactionSender):
     """默认的交易发送器，使用普通 RPC 节点"""
@@ -89,3 +102,287 @@ class GMGNTransactionSender(TransactionSender):
     ) -> bool:
         resp = await self.rpc_client.simulate_transaction(transaction)
         return resp.value.value.err is None
+
+
+class BroadcastPath:
+    """广播的一条提交路径"""
+
+    def __init__(
+        self,
+        name: str,
+        submit: Callable[[str], Awaitable[None]],
+        jito: bool = False,
+        window: int = 200,
+    ):
+        """
+        Args:
+            name: 路径名称，用于日志和统计
+            submit: 提交 base64 编码的已签名交易
+            jito: 是否为 Jito block engine，交易不带小费时不使用
+            window: 统计最近的提交次数
+        """
+        self.name = name
+        self.submit = submit
+        self.jito = jito
+        # 提交的确认耗时和结果
+        self.stats = EndpointStats(window)
+        # 交易上链前最先确认提交的次数
+        self.wins = 0
+        self.landed = 0
+
+    @property
+    def score(self) -> float:
+        """越小越好：提交延迟和错误率越低、最先确认提交后上链的比例越高，排名越靠前"""
+        win_rate = (self.wins + 1) / (self.landed + 2)
+        return self.stats.score / win_rate
+
+
+class BroadcastSender(TransactionSender):
+    """同时向多个 RPC 节点、Jito block engine 和 GMGN 提交同一笔交易
+
+    - 任一路径确认提交后即返回签名，其余路径继续在后台提交
+    - 同一签名只广播一次，重复发送直接返回签名
+    - 交易上链前按路径排名间隔重发，直到上链或 blockhash 过期，
+      上链状态来自 SignatureConfirmer 的订阅推送，与结算共用，不逐笔轮询 RPC
+    - 链上无法区分交易由哪条路径送达，上链后记为最先确认提交的路径胜出，
+      胜出比例参与路径排名，决定重发时优先使用的路径
+    """
+
+    def __init__(
+        self,
+        rpc_client: AsyncClient,
+        rpc_endpoints: list[str] | None = None,
+        jito_engines: list[str] | None = None,
+        use_gmgn: bool | None = None,
+        rebroadcast_interval: float | None = None,
+        rebroadcast_paths: int | None = None,
+        max_rebroadcast_time: float = 90,
+        confirmer: SignatureConfirmer | None = None,
+    ):
+        """
+        Args:
+            rpc_client: RPC 客户端
+            rpc_endpoints: 提交交易的 RPC 节点，默认使用 rpc.endpoints
+            jito_engines: Jito block engine，默认使用 trading.jito_api 和 trading.jito_engines
+            use_gmgn: 是否同时提交到 GMGN，默认使用 trading.broadcast_gmgn
+            rebroadcast_interval: 首次重发的间隔（秒），之后逐次加倍，最多 4 倍
+            rebroadcast_paths: 每次重发使用排名前几的路径
+            max_rebroadcast_time: 最长重发时间（秒），无法得知 blockhash 的有效高度时以此判断过期
+            confirmer: 交易确认服务，默认使用全局的 SignatureConfirmer
+        """
+        super().__init__(rpc_client)
+        self.confirmer = confirmer or SignatureConfirmer(rpc_client)
+        trading = settings.trading
+        if rpc_endpoints is None:
+            rpc_endpoints = settings.rpc.endpoints
+        if jito_engines is None:
+            jito_engines = list(dict.fromkeys([trading.jito_api, *trading.jito_engines]))
+        if use_gmgn is None:
+            use_gmgn = trading.broadcast_gmgn
+        self.rebroadcast_interval = (
+            rebroadcast_interval
+            if rebroadcast_interval is not None
+            else trading.rebroadcast_interval_ms / 1000
+        )
+        self.rebroadcast_paths = rebroadcast_paths or trading.rebroadcast_paths
+        self.max_rebroadcast_time = max_rebroadcast_time
+
+        # 所有路径共享连接池
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=5,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+        )
+        self.paths = [
+            BroadcastPath(f"rpc:{endpoint}", self._json_rpc_submitter(endpoint))
+            for endpoint in rpc_endpoints
+        ]
+        self.paths.extend(
+            BroadcastPath(
+                f"jito:{engine}",
+                self._json_rpc_submitter(f"{engine.rstrip('/')}/api/v1/transactions"),
+                jito=True,
+            )
+            for engine in jito_engines
+        )
+        if use_gmgn:
+            gmgn = GmgnAPI()
+
+            async def submit_gmgn(encoded_tx: str) -> None:
+                await gmgn.submit_signed_transaction(signed_tx=encoded_tx)
+
+            self.paths.append(BroadcastPath("gmgn", submit_gmgn))
+        # 签名 -> 重发任务
+        self._broadcasts: dict[str, asyncio.Task] = {}
+
+    def _json_rpc_submitter(self, url: str) -> Callable[[str], Awaitable[None]]:
+        async def submit(encoded_tx: str) -> None:
+            body = json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "sendTransaction",
+                    "params": [
+                        encoded_tx,
+                        {
+                            "encoding": "base64",
+                            "skipPreflight": not settings.trading.preflight_check,
+                            "maxRetries": 0,
+                        },
+                    ],
+                }
+            )
+            response = await self.client.post(url, content=body)
+            response.raise_for_status()
+            data = json.loads(response.content)
+            if "error" in data:
+                raise RPCError(url, data["error"])
+
+        return submit
+
+    def ranked(self, use_jito: bool) -> list[BroadcastPath]:
+        """按排名从优到劣排序的可用路径"""
+        paths = [path for path in self.paths if use_jito or not path.jito]
+        return sorted(paths, key=lambda path: path.score)
+
+    async def _submit(self, path: BroadcastPath, encoded_tx: str) -> BroadcastPath:
+        start = time.perf_counter()
+        ok = False
+        try:
+            await path.submit(encoded_tx)
+            ok = True
+            return path
+        finally:
+            path.stats.record(time.perf_counter() - start, ok)
+
+    async def send_transaction(
+        self,
+        transaction: VersionedTransaction,
+        use_jito: bool = False,
+        **kwargs,
+    ) -> Signature:
+        """广播交易，任一路径确认提交后返回签名
+
+        Args:
+            transaction (VersionedTransaction): 已签名的交易
+            use_jito (bool, optional): 交易是否带有 Jito 小费，不带小费时不提交到 Jito. Defaults to False.
+
+        Raises:
+            Exception: 所有路径都提交失败时抛出最后一个异常
+        """
+        signature = transaction.signatures[0]
+        key = str(signature)
+        if key in self._broadcasts:
+            logger.info(f"Transaction {key} is already being broadcast")
+            return signature
+
+        paths = self.ranked(use_jito)
+        if not paths:
+            raise ValueError("No broadcast paths configured")
+        encoded_tx = base64.b64encode(bytes(transaction)).decode("utf-8")
+        pending = {asyncio.create_task(self._submit(path, encoded_tx)) for path in paths}
+        first: BroadcastPath | None = None
+        last_error: BaseException | None = None
+        while pending and first is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                first = task.result()
+                break
+        if first is None:
+            assert last_error is not None
+            raise last_error
+
+        logger.info(
+            f"Transaction {key} accepted first by {first.name}, broadcasting to {len(paths)} paths"
+        )
+        task = asyncio.create_task(
+            self._rebroadcast(transaction, encoded_tx, first, pending, use_jito)
+        )
+        self._broadcasts[key] = task
+        task.add_done_callback(lambda _: self._broadcasts.pop(key, None))
+        return signature
+
+    def _expired(self, last_valid_block_height: int | None, started: float) -> bool:
+        """按本地刷新的最新 blockhash 估算交易的 blockhash 是否过期，不请求 RPC"""
+        latest = BlockhashRefresher().latest()
+        if last_valid_block_height is None or latest is None:
+            return time.monotonic() - started > self.max_rebroadcast_time
+        return latest[1] - MAX_PROCESSING_AGE > last_valid_block_height
+
+    async def _rebroadcast(
+        self,
+        transaction: VersionedTransaction,
+        encoded_tx: str,
+        first: BroadcastPath,
+        pending: set[asyncio.Task],
+        use_jito: bool,
+    ) -> None:
+        """间隔重发直到上链或 blockhash 过期，上链后记录最先确认提交的路径"""
+        signature = transaction.signatures[0]
+        last_valid_block_height = BlockhashRefresher().last_valid_block_height(
+            transaction.message.recent_blockhash
+        )
+        started = time.monotonic()
+        interval = self.rebroadcast_interval
+        confirmation = asyncio.ensure_future(
+            self.confirmer.confirm(signature, timeout=self.max_rebroadcast_time)
+        )
+        try:
+            while True:
+                done, _ = await asyncio.wait({confirmation}, timeout=interval)
+                if done:
+                    break
+                interval = min(interval * 2, self.rebroadcast_interval * 4)
+                if self._expired(last_valid_block_height, started):
+                    logger.warning(f"Transaction {signature} expired before landing")
+                    return
+
+                paths = self.ranked(use_jito)[: self.rebroadcast_paths]
+                logger.debug(
+                    f"Rebroadcasting {signature} to {', '.join(path.name for path in paths)}"
+                )
+                pending.update(
+                    asyncio.create_task(self._submit(path, encoded_tx)) for path in paths
+                )
+                pending = {task for task in pending if not task.done()}
+
+            try:
+                status = confirmation.result()
+            except Exception as e:
+                logger.warning(f"Failed to confirm transaction {signature}: {e}")
+                return
+            if status == TransactionStatus.EXPIRED:
+                logger.warning(f"Transaction {signature} expired before landing")
+                return
+            # 失败的交易同样已经上链
+            for path in self.ranked(use_jito):
+                path.landed += 1
+            first.wins += 1
+            logger.info(f"Transaction {signature} landed, first accepted by {first.name}")
+        finally:
+            if not confirmation.done():
+                confirmation.cancel()
+            await asyncio.gather(confirmation, *pending, return_exceptions=True)
+
+    async def simulate_transaction(
+        self,
+        transaction: VersionedTransaction,
+    ) -> bool:
+        resp = await self.rpc_client.simulate_transaction(transaction)
+        return resp.value.value.err is None
+
+    def stats(self) -> dict:
+        """各路径的提交延迟、错误率和胜出次数"""
+        return {
+            path.name: {
+                "p50_ms": round(path.stats.p50 * 1000, 1) if path.stats.p50 is not None else None,
+                "error_rate": round(path.stats.error_rate, 4),
+                "wins": path.wins,
+                "landed": path.landed,
+            }
+            for path in self.paths
+        }
@@ -1,21 +1,45 @@
+import asyncio
 import base64
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from solana.rpc.async_api import AsyncClient
-from solbot_cache import get_latest_blockhash
+from solbot_cache import BlockhashRefresher, get_latest_blockhash
 from solbot_common.config import settings
-from solbot_common.constants import SOL_DECIMAL
+from solbot_common.constants import JITO_TIP_ACCOUNTS, SOL_DECIMAL
 from solbot_common.log import logger
 from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.message import MessageV0  # type: ignore
-from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.system_program import TransferParams, transfer
 from solders.transaction import VersionedTransaction  # type: ignore
 
+from trading.compute_units import ComputeUnitProfiler
+from trading.lookup_table import AddressLookupTableManager
+from trading.pipeline import PipelineMetrics
 from trading.utils import calc_tx_units, calc_tx_units_and_split_fees
 
+_signing_pool: ThreadPoolExecutor | None = None
+
+
+def _get_signing_pool() -> ThreadPoolExecutor:
+    global _signing_pool
+    if _signing_pool is None:
+        _signing_pool = ThreadPoolExecutor(
+            max_workers=settings.trading.sign_workers, thread_name_prefix="signer"
+        )
+    return _signing_pool
+
+
+async def sign_message(message: MessageV0, keypair: Keypair) -> VersionedTransaction:
+    """在线程池中签名，多个并发交易不会在事件循环上排队等待 Ed25519 签名"""
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    txn = await loop.run_in_executor(_get_signing_pool(), VersionedTransaction, message, [keypair])
+    PipelineMetrics().record("sign", time.perf_counter() - start)
+    return txn
+
 
 async def sign_transaction_from_raw(
     raw_tx: str,
@@ -28,8 +52,7 @@ async def sign_transaction_from_raw(
     message = VersionedTransaction.from_bytes(tx_bytes).message
 
     # Create and sign transaction
-    txn = VersionedTransaction(message, [keypair])
-    return txn
+    return await sign_message(message, keypair)
 
 
 async def build_transaction(
@@ -37,6 +60,7 @@ async def build_transaction(
     instructions: list,
     use_jito: bool | None = None,
     priority_fee: float | None = None,
+    profile: str | None = None,
 ) -> VersionedTransaction:
     """Build transaction with instructions.
 
@@ -45,52 +69,58 @@ async def build_transaction(
         instructions (list): List of instructions to include in the transaction
         use_jito (bool): Whether to use Jito or not
         priority_fee (float): Priority fee
+        profile (str): Transaction profile (route:direction), the compute unit limit
+            is calibrated from its observed consumption
 
     Returns:
         VersionedTransaction: The built transaction
     """
+    profiler = ComputeUnitProfiler()
     if use_jito and priority_fee is not None:
-        unit_price, unit_limit, jito_fee = calc_tx_units_and_split_fees(priority_fee)
-        # 96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5
+        unit_price, unit_limit, jito_fee = calc_tx_units_and_split_fees(
+            priority_fee, profiler.limit(profile)
+        )
         instructions.append(
             transfer(
                 TransferParams(
                     from_pubkey=keypair.pubkey(),
-                    to_pubkey=Pubkey.from_string("96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5"),
+                    to_pubkey=JITO_TIP_ACCOUNTS[0],
                     lamports=int(jito_fee * 10 ** SOL_DECIMAL),
                 )
             )
         )
     elif priority_fee is not None:
-        unit_price, unit_limit = calc_tx_units(priority_fee)
+        unit_price, unit_limit = calc_tx_units(priority_fee, profiler.limit(profile))
         logger.info(
             f"Using custom priority fee, unit limit: {unit_limit}, unit price: {unit_price}"
         )
-        instructions.insert(0, set_compute_unit_limit(unit_limit))
-        instructions.insert(1, set_compute_unit_price(unit_price))
     else:
         logger.info(
             f"Using default priority fee, unit limit: {settings.trading.unit_limit}, unit price: {settings.trading.unit_price}"
         )
         unit_price, unit_limit = (
             settings.trading.unit_price,
-            settings.trading.unit_limit,
+            profiler.limit(profile, settings.trading.unit_limit),
         )
 
     instructions.insert(0, set_compute_unit_limit(unit_limit))
     instructions.insert(1, set_compute_unit_price(unit_price))
 
-    # init tx
-    recent_blockhash, _ = await get_latest_blockhash()
+    # init tx，使用本地持续刷新的 blockhash
+    recent_blockhash, _ = await BlockhashRefresher().get()
 
+    lookup_tables = AddressLookupTableManager()
     message = MessageV0.try_compile(
         payer=keypair.pubkey(),
         instructions=instructions,
         recent_blockhash=recent_blockhash,
-        address_lookup_table_accounts=[],
+        address_lookup_table_accounts=lookup_tables.lookup_tables(keypair),
     )
+    lookup_tables.record(keypair.pubkey(), instructions)
 
-    txn = VersionedTransaction(message, [keypair])
+    txn = await sign_message(message, keypair)
+    if profile is not None:
+        profiler.track(str(txn.signatures[0]), profile, unit_limit)
     return txn
 
 
@@ -0,0 +1,67 @@
+import asyncio
+
+from solbot_common.log import logger
+from solbot_common.models.tg_bot.monitor import Monitor
+from solbot_services.copytrade import CopyTradeService
+
+
+class ActiveWalletRegistry:
+    """进程内的已激活目标钱包集合
+
+    启动时从数据库加载一次（监听器 + 跟单），之后由 TxMonitor 根据 monitor_events 中的
+    RESUME / PAUSE 事件增量更新（跟单的新增、启停、删除同样通过该频道发布）。
+    与 TxMonitor 的订阅行为保持一致：RESUME 加入集合，PAUSE 移出集合。
+
+    内部使用 frozenset，每次更新替换为新的集合，读取时不需要加锁，成员判断为 O(1)。
+    """
+
+    def __init__(self):
+        self._wallets: frozenset[str] = frozenset()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def wallets(self) -> frozenset[str]:
+        return self._wallets
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __contains__(self, wallet: object) -> bool:
+        return wallet in self._wallets
+
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+    async def _load(self) -> None:
+        monitor_addresses = await Monitor.get_active_wallet_addresses()
+        copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
+        self._wallets = frozenset(monitor_addresses) | frozenset(copytrade_addresses)
+        self._loaded = True
+        logger.info(f"Loaded {len(self._wallets)} active wallets")
+
+    async def load(self) -> frozenset[str]:
+        """从数据库中重新加载已激活的目标钱包"""
+        async with self._lock:
+            await self._load()
+        return self._wallets
+
+    async def ensure_loaded(self) -> frozenset[str]:
+        """未加载时从数据库加载，已加载时直接返回"""
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    await self._load()
+        return self._wallets
+
+    def add(self, wallet: str) -> None:
+        if wallet not in self._wallets:
+            self._wallets = self._wallets | {wallet}
+
+    def discard(self, wallet: str) -> None:
+        if wallet in self._wallets:
+            self._wallets = self._wallets - {wallet}
+
+
+active_wallet_registry = ActiveWalletRegistry()
@@ -9,3 +9,10 @@ FAILED_TX_DETAIL_CHANNEL = "tx_detail:failed"
 
 NEW_TX_EVENT_CHANNEL = "tx_event:new"
 FAILED_TX_EVENT_CHANNEL = "tx_event:failed"
+
+# inprocess 模式下的交易详情留存队列，仅用于排查问题，不会被消费
+TX_DETAIL_TAP_CHANNEL = "tx_detail:tap"
+TX_DETAIL_TAP_MAX_LENGTH = 1000
+
+# 交易签名去重键前缀
+TX_DEDUP_PREFIX = "tx:dedup:"
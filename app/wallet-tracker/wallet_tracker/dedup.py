@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import aioredis
+from aioredis.exceptions import RedisError
+from solbot_common.log import logger
+
+from wallet_tracker.constants import TX_DEDUP_PREFIX
+
+
+@dataclass
+class DedupStats:
+    local_hits: int = 0  # 本地 LRU 命中
+    redis_hits: int = 0  # Redis SET NX 命中（其他进程或本地已淘汰的签名）
+    misses: int = 0  # 首次出现的签名
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.redis_hits
+
+
+class SignatureDeduplicator:
+    """交易签名去重
+
+    同一笔交易可能经由多个路径到达（geyser 重连重放、重叠的订阅过滤条件、
+    迁移期间 wss 与 geyser 同时运行），在解析之前按签名去重，避免重复产生 TxEvent：
+    - 本地 LRU：有界、带过期时间，重复签名只需要一次哈希查找
+    - Redis SET NX EX（可选）：跨进程去重，本地未命中时才会访问 Redis
+
+    is_duplicate 只占用签名，处理完成后调用 finish：处理成功才记入 LRU，
+    处理失败时释放占用，之后经由其他路径到达的同一笔交易仍会被处理。
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis | None = None,
+        max_size: int = 100_000,
+        ttl: float = 600,
+    ):
+        """
+        Args:
+            redis: Redis 客户端，为 None 时只做进程内去重
+            max_size: 本地 LRU 的最大容量
+            ttl: 去重时间窗口（秒）
+        """
+        self.redis = redis
+        self.max_size = max_size
+        self.ttl = ttl
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        # 正在处理中的签名
+        self._pending: set[str] = set()
+        self.stats = DedupStats()
+
+    def _seen_locally(self, signature: str, now: float) -> bool:
+        expire_at = self._seen.get(signature)
+        if expire_at is None:
+            return False
+        if expire_at < now:
+            del self._seen[signature]
+            return False
+        self._seen.move_to_end(signature)
+        return True
+
+    def _remember(self, signature: str, now: float) -> None:
+        self._seen[signature] = now + self.ttl
+        self._seen.move_to_end(signature)
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+
+    async def is_duplicate(self, signature: str) -> bool:
+        """判断签名是否已经处理过或正在处理，都不是时占用该签名，处理完成后需要调用 finish"""
+        now = time.monotonic()
+        if signature in self._pending or self._seen_locally(signature, now):
+            self.stats.local_hits += 1
+            return True
+
+        self._pending.add(signature)
+        if self.redis is not None:
+            try:
+                created = await self.redis.set(
+                    f"{TX_DEDUP_PREFIX}{signature}", 1, nx=True, ex=int(self.ttl)
+                )
+                if not created:
+                    self._pending.discard(signature)
+                    self._remember(signature, now)
+                    self.stats.redis_hits += 1
+                    return True
+            except RedisError as e:
+                # Redis 不可用时退化为进程内去重，不阻塞交易处理
+                logger.warning(f"Failed to dedup signature {signature} in Redis: {e}")
+
+        self.stats.misses += 1
+        return False
+
+    async def finish(self, signature: str, handled: bool) -> None:
+        """结束签名的处理
+
+        Args:
+            signature: is_duplicate 返回 False 的签名
+            handled: 是否处理成功，成功时标记为已处理，失败时释放占用
+        """
+        self._pending.discard(signature)
+        if handled:
+            self._remember(signature, time.monotonic())
+            return
+        if self.redis is not None:
+            try:
+                await self.redis.delete(f"{TX_DEDUP_PREFIX}{signature}")
+            except RedisError as e:
+                logger.warning(f"Failed to release signature {signature} in Redis: {e}")
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -16,6 +16,8 @@ class UnknownTransactionType(Exception):
 
 class ZeroChangeAmountError(Exception):
     def __init__(self, pre_amount: int, post_amount: int):
+        # 传入 args 以便异常可以被 pickle，在解析子进程和主进程之间传递
+        super().__init__(pre_amount, post_amount)
         self.pre_amount = pre_amount
         self.post_amount = post_amount
 
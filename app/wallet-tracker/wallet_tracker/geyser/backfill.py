@@ -0,0 +1,104 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+
+
+class SignatureBackfiller:
+    """断线期间的交易补齐
+
+    通过 getSignaturesForAddress 查询钱包在 after_slot 之后的交易签名，
+    再逐个拉取交易详情交给下游。已经处理过的交易由下游的签名去重过滤，不会重复处理。
+    补齐的交易详情带有 backfilled 标记，产生的 TxEvent 只用于记录持仓，不触发跟单。
+    geyser 推送的是 processed 的交易，补齐使用 confirmed，不必等待约 32 个 slot 的最终确认。
+    """
+
+    def __init__(
+        self,
+        rpc_endpoint: str = settings.rpc.rpc_url,
+        limit: int = 100,
+        max_pages: int = 5,
+        concurrency: int = 8,
+    ):
+        """
+        Args:
+            rpc_endpoint: RPC 端点
+            limit: 单次 getSignaturesForAddress 查询的签名数量
+            max_pages: 单个钱包最多查询的页数
+            concurrency: 拉取交易详情的并发数
+        """
+        self.client = AsyncClient(rpc_endpoint)
+        self.fetcher = TxDetailRawFetcher(rpc_endpoint, commitment=Confirmed)
+        self.limit = limit
+        self.max_pages = max_pages
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def get_signatures_after(self, wallet: str, after_slot: int) -> list[Signature]:
+        """查询钱包在 after_slot 之后（含）的成功交易签名，按时间从旧到新排列"""
+        signatures: list[Signature] = []
+        before = None
+        for _ in range(self.max_pages):
+            resp = await self.client.get_signatures_for_address(
+                Pubkey.from_string(wallet),
+                before=before,
+                limit=self.limit,
+                commitment=Confirmed,
+            )
+            if not resp.value:
+                break
+            reached = False
+            for status in resp.value:
+                if status.slot < after_slot:
+                    reached = True
+                    break
+                if status.err is None:
+                    signatures.append(status.signature)
+            if reached or len(resp.value) < self.limit:
+                break
+            before = resp.value[-1].signature
+        else:
+            logger.warning(
+                f"Backfill of {wallet} stopped after {self.max_pages} pages, some txs may be missed"
+            )
+        signatures.reverse()
+        return signatures
+
+    async def _fetch(self, signature: Signature) -> dict | None:
+        async with self.semaphore:
+            try:
+                return await self.fetcher.fetch(signature)
+            except Exception as e:
+                logger.error(f"Failed to fetch backfill tx {signature}: {e}")
+                return None
+
+    async def backfill(
+        self,
+        wallets: Iterable[str],
+        after_slot: int,
+        push: Callable[[dict], Awaitable[None]],
+    ) -> int:
+        """补齐 wallets 在 after_slot 之后的交易，返回补齐的交易数量"""
+        count = 0
+        for wallet in wallets:
+            try:
+                signatures = await self.get_signatures_after(wallet, after_slot)
+            except Exception as e:
+                logger.error(f"Failed to get signatures of {wallet}: {e}")
+                continue
+            if not signatures:
+                continue
+            tx_details = await asyncio.gather(*(self._fetch(sig) for sig in signatures))
+            for tx_detail in tx_details:
+                if tx_detail is None:
+                    continue
+                tx_detail["backfilled"] = True
+                await push(tx_detail)
+                count += 1
+        return count
@@ -0,0 +1,83 @@
+"""Geyser 交易解码器
+
+直接读取 SubscribeUpdateTransaction 的 protobuf 字段，生成 RawTXParser 所需的精简结构，
+避免 protobuf -> JSON -> dict 的往返转换。
+
+与 RPC getTransaction 的返回结构保持一致（字段名相同），但只保留解析需要的字段：
+- transaction.signatures: 交易签名（数量等于签名者数量）
+- transaction.message.accountKeys: 仅包含签名者地址（header.num_required_signatures 个）
+- meta.preBalances / meta.postBalances
+- meta.preTokenBalances / meta.postTokenBalances
+- meta.logMessages
+"""
+
+import time
+
+import base58
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def _encode_token_balances(token_balances) -> list[dict]:
+    return [
+        {
+            "accountIndex": token_balance.account_index,
+            "mint": token_balance.mint,
+            "owner": token_balance.owner,
+            "programId": token_balance.program_id,
+            "uiTokenAmount": {
+                "amount": token_balance.ui_token_amount.amount,
+                "decimals": token_balance.ui_token_amount.decimals,
+            },
+        }
+        for token_balance in token_balances
+    ]
+
+
+def decode_transaction_update(
+    update: geyser_pb2.SubscribeUpdateTransaction,
+    block_time: int | None = None,
+) -> dict:
+    """将 geyser 交易更新解码为 RawTXParser 可直接使用的 dict
+
+    只对下游实际使用的签名和签名者地址做 base58 编码，其余 bytes 字段一律跳过。
+
+    Args:
+        update (SubscribeUpdateTransaction): geyser 推送的交易更新
+        block_time (int | None, optional): 区块时间. 只有被确认之后才会有 blockTime,
+            默认使用当前时间.
+
+    Returns:
+        dict: 与 RPC getTransaction 结构一致的精简交易详情
+    """
+    info = update.transaction
+    message = info.transaction.message
+    meta = info.meta
+
+    num_signers = message.header.num_required_signatures or 1
+    account_keys = [
+        base58.b58encode(key).decode("utf-8") for key in message.account_keys[:num_signers]
+    ]
+
+    return {
+        "slot": update.slot,
+        "version": 0,
+        "blockTime": int(time.time()) if block_time is None else block_time,
+        "transaction": {
+            "signatures": [
+                base58.b58encode(signature).decode("utf-8")
+                for signature in info.transaction.signatures
+            ]
+            or [base58.b58encode(info.signature).decode("utf-8")],
+            "message": {
+                "accountKeys": account_keys,
+            },
+        },
+        "meta": {
+            "fee": meta.fee,
+            "preBalances": list(meta.pre_balances),
+            "postBalances": list(meta.post_balances),
+            "preTokenBalances": _encode_token_balances(meta.pre_token_balances),
+            "postTokenBalances": _encode_token_balances(meta.post_token_balances),
+            "logMessages": list(meta.log_messages),
+        },
+    }
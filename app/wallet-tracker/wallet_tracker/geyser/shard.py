@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from google.protobuf.json_format import Parse
+from grpc.aio import AioRpcError
+from solbot_common.log import logger
+from yellowstone_grpc.client import GeyserClient
+from yellowstone_grpc.grpc import geyser_pb2
+from yellowstone_grpc.types import (
+    SubscribeRequest,
+    SubscribeRequestFilterSlots,
+    SubscribeRequestFilterTransactions,
+    SubscribeRequestPing,
+)
+
+# 部分 yellowstone 版本支持从指定 slot 开始重放
+SUPPORTS_FROM_SLOT = "from_slot" in geyser_pb2.SubscribeRequest.DESCRIPTOR.fields_by_name
+
+GapHandler = Callable[["GeyserShard", int], Awaitable[None]]
+
+
+class GeyserShard:
+    """单个 Geyser 订阅分片
+
+    每个分片使用独立的 gRPC 连接和订阅流，只负责一部分钱包。
+    Geyser 的每个 SubscribeRequest 都会替换该流上的全部订阅，
+    因此钱包变更只需要重新发送所在分片的过滤条件，而不是全部钱包。
+
+    分片同时订阅 slot 更新，用于计算该分片相对于最新 slot 的延迟。
+
+    断线后以指数退避加随机抖动无限重连，并记录断线前最后一个 slot：
+    - 端点支持 from_slot 时，重连请求从该 slot 开始重放
+    - 否则（或重放失败时）调用 on_gap 补齐断线期间的交易
+    """
+
+    def __init__(
+        self,
+        index: int,
+        endpoint: str,
+        api_key: str,
+        base_delay: float = 1,
+        max_delay: float = 60,
+        on_gap: GapHandler | None = None,
+    ):
+        self.index = index
+        self.name = f"shard-{index}"
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_gap = on_gap
+
+        self.wallets: set[str] = set()
+        self.geyser_client: GeyserClient | None = None
+        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
+        self.responses = None
+        # 断线重连相关
+        self.attempts = 0
+        # 断线前最后一个 slot，补齐完成前不为 None
+        self.gap_slot: int | None = None
+        # 重连时请求重放的起始 slot
+        self.from_slot: int | None = None
+        self.replay_supported = SUPPORTS_FROM_SLOT
+        self.task_pool: set[asyncio.Task] = set()
+
+        # 延迟统计
+        self.last_slot = 0
+        self.last_update_at = 0.0
+        self.updates = 0
+
+    def build_subscribe_request(self) -> geyser_pb2.SubscribeRequest:
+        params = {}
+        if len(self.wallets) != 0:
+            params["transactions"] = {
+                self.name: SubscribeRequestFilterTransactions(
+                    account_include=list(self.wallets),
+                    failed=False,
+                )
+            }
+            params["slots"] = {self.name: SubscribeRequestFilterSlots()}
+        else:
+            params["ping"] = SubscribeRequestPing(id=1)
+
+        subscribe_request = SubscribeRequest(**params)
+        pb_request = Parse(subscribe_request.model_dump_json(), geyser_pb2.SubscribeRequest())
+        if self.from_slot is not None:
+            pb_request.from_slot = self.from_slot
+        return pb_request
+
+    def backoff_delay(self) -> float:
+        """指数退避加随机抖动（full jitter）"""
+        # 限制指数，避免连续失败次数过多时 2**attempts 溢出 float
+        exponent = min(self.attempts, 32)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**exponent))
+
+    async def connect(self) -> None:
+        """建立连接并以当前钱包集合订阅"""
+        self.geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
+        (
+            self.request_queue,
+            self.responses,
+        ) = await self.geyser_client.subscribe_with_request(self.build_subscribe_request())
+        logger.info(f"Geyser {self.name} subscribed to {len(self.wallets)} wallets")
+
+    async def resubscribe(self) -> None:
+        """以当前钱包集合重新发送该分片的订阅请求"""
+        if self.request_queue is None:
+            # 尚未连接，连接时会使用最新的钱包集合
+            return
+        logger.info(f"Geyser {self.name} resubscribing to {len(self.wallets)} wallets")
+        await self.request_queue.put(self.build_subscribe_request())
+
+    def _start_gap_handler(self, after_slot: int) -> None:
+        if self.on_gap is None:
+            return
+        logger.warning(f"Geyser {self.name} gap detected, backfilling from slot {after_slot}")
+        task = asyncio.create_task(self.on_gap(self, after_slot))
+        self.task_pool.add(task)
+        task.add_done_callback(self.task_pool.discard)
+
+    async def run(self, response_queue: asyncio.Queue) -> None:
+        """读取订阅流，交易更新放入 response_queue，断开后重连"""
+        while True:
+            received = False
+            connected = self.responses is not None
+            try:
+                if not connected:
+                    if self.gap_slot is not None and self.replay_supported:
+                        self.from_slot = self.gap_slot
+                    await self.connect()
+                    connected = True
+                    if self.gap_slot is not None and self.from_slot is None:
+                        # 不支持重放，连接成功后补齐断线期间的交易
+                        self._start_gap_handler(self.gap_slot)
+                        self.gap_slot = None
+                async for response in self.responses:
+                    if not received:
+                        received = True
+                        self.attempts = 0
+                        if self.from_slot is not None:
+                            logger.info(f"Geyser {self.name} replaying from slot {self.from_slot}")
+                            self.from_slot = None
+                            self.gap_slot = None
+                    self.last_update_at = time.monotonic()
+                    self.updates += 1
+                    if response.HasField("slot"):
+                        self.last_slot = max(self.last_slot, response.slot.slot)
+                        continue
+                    if response.HasField("transaction"):
+                        self.last_slot = max(self.last_slot, response.transaction.slot)
+                    await response_queue.put(response)
+            except asyncio.CancelledError:
+                break
+            except AioRpcError as e:
+                logger.error(f"Geyser {self.name} rpc error: {e._details}")
+            except Exception as e:
+                logger.error(f"Geyser {self.name} error: {e}")
+                logger.exception(e)
+            await self.close()
+
+            if self.from_slot is not None and connected and not received:
+                # 端点拒绝了重放请求，之后改为通过 on_gap 补齐
+                logger.warning(f"Geyser {self.name} replay from slot {self.from_slot} failed")
+                self.replay_supported = False
+            self.from_slot = None
+            if self.gap_slot is None and self.last_slot > 0:
+                self.gap_slot = self.last_slot
+            self.attempts += 1
+            delay = self.backoff_delay()
+            logger.info(f"Geyser {self.name} reconnecting in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        self.request_queue = None
+        self.responses = None
+        if self.geyser_client is not None:
+            try:
+                await self.geyser_client.close()
+            except Exception as e:
+                logger.error(f"Error closing geyser {self.name}: {e}")
+            self.geyser_client = None
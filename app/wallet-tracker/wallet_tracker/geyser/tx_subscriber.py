@@ -1,178 +1,135 @@
 import asyncio
 import signal
 import time
-from collections.abc import AsyncGenerator, Sequence
+import zlib
+from collections.abc import Sequence
 
 import aioredis
-import base58
-import orjson as json
-from google.protobuf.json_format import (
-    Parse,
-    _Printer,  # type: ignore
-)
-from google.protobuf.message import Message
-from grpc.aio import AioRpcError
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
-from yellowstone_grpc.client import GeyserClient
-from yellowstone_grpc.grpc import geyser_pb2
-from yellowstone_grpc.types import (
-    SubscribeRequest,
-    SubscribeRequestFilterTransactions,
-    SubscribeRequestPing,
-)
 
-from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.geyser.backfill import SignatureBackfiller
+from wallet_tracker.geyser.decoder import decode_transaction_update
+from wallet_tracker.geyser.shard import GeyserShard
+from wallet_tracker.pipeline import TxDetailPipeline
 
 
-def should_convert_to_base58(value) -> bool:
-    """Check if bytes should be converted to base58."""
-    if not isinstance(value, bytes):
-        return False
-    try:
-        # 尝试解码为字符串，如果成功且没有特殊字符，就用字符串
-        decoded = value.decode("utf-8")
-        # 检查是否包含转义字符或不可打印字符
-        return "\\" in decoded or any(ord(c) < 32 or ord(c) > 126 for c in decoded)
-    except UnicodeDecodeError:
-        # 如果无法解码为字符串，就用 base58
-        return True
-
-
-class Base58Printer(_Printer):
-    def __init__(self) -> None:
-        super().__init__()
-        self.preserve_proto_field_names = True
-
-    def _RenderBytes(self, value):
-        """Renders a bytes value as base58 or utf-8 string."""
-        if should_convert_to_base58(value):
-            return base58.b58encode(value).decode("utf-8")
-        return value.decode("utf-8")
-
-    def _FieldToJsonObject(self, field, value):
-        """Converts field value according to its type."""
-        if field.cpp_type == field.CPPTYPE_BYTES and isinstance(value, bytes):
-            if should_convert_to_base58(value):
-                return base58.b58encode(value).decode("utf-8")
-            return value.decode("utf-8")
-        return super()._FieldToJsonObject(field, value)
-
-
-def proto_to_dict(message: Message) -> dict:
-    """Convert protobuf message to dict with bytes fields encoded as base58 or utf-8."""
-    printer = Base58Printer()
-    return printer._MessageToJsonObject(message)
+class TransactionDetailSubscriber:
+    """Geyser 交易订阅管理
 
+    钱包按稳定哈希分配到 num_shards 个分片，每个分片一条独立的 gRPC 订阅流：
+    - 钱包变更只重新发送所在分片的订阅请求
+    - batch_window 内的多次变更会合并为每个分片一次请求
+    - 定期上报每个分片的 slot 延迟
+    - 分片断线重连后，重放或补齐断线期间的交易，重复的交易由下游去重
+    """
 
-class TransactionDetailSubscriber:
     def __init__(
         self,
         endpoint: str,
         api_key: str,
         redis_client: aioredis.Redis,
         wallets: Sequence[Pubkey],
+        pipeline: TxDetailPipeline | None = None,
+        num_shards: int = 1,
+        batch_window: float = 0.005,
+        lag_report_interval: float = 60,
+        backfiller: SignatureBackfiller | None = None,
     ):
         self.endpoint = endpoint
         self.api_key = api_key
-        self.geyser_client = None
         self.wallets = wallets
-        self.subscribed_wallets = {str(wallet) for wallet in wallets}
         self.redis = redis_client
+        self.pipeline = pipeline or TxDetailPipeline(redis_client)
         self.is_running = False
-        self.retry_count = 0
-        self.max_retries = 3
-        self.retry_delay = 5  # seconds
 
-        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
-        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate, None] | None = None
+        self.backfiller = backfiller or SignatureBackfiller()
+        self.shards = [
+            GeyserShard(i, endpoint, api_key, on_gap=self._backfill)
+            for i in range(max(1, num_shards))
+        ]
+        for wallet in wallets:
+            self.shard_of(str(wallet)).wallets.add(str(wallet))
+        # 变更合并
+        self.batch_window = batch_window
+        self._dirty_shards: set[int] = set()
+        self._flush_task: asyncio.Task | None = None
+        self.lag_report_interval = lag_report_interval
+        self.shard_tasks: list[asyncio.Task] = []
+
         # 响应处理相关
         self.response_queue = asyncio.Queue(maxsize=1000)
         self.worker_nums = 2
         self.workers: list[asyncio.Task] = []
 
-    async def _connect(self) -> None:
-        """Connect to Geyser service with retry mechanism."""
-        while self.retry_count < self.max_retries:
+    @property
+    def subscribed_wallets(self) -> set[str]:
+        return set().union(*(shard.wallets for shard in self.shards))
+
+    def shard_of(self, wallet: str) -> GeyserShard:
+        # 使用稳定的哈希，不受 PYTHONHASHSEED 影响
+        return self.shards[zlib.crc32(wallet.encode("utf-8")) % len(self.shards)]
+
+    def _mark_dirty(self, shard: GeyserShard) -> None:
+        self._dirty_shards.add(shard.index)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        """等待 batch_window 后，为每个有变更的分片发送一次订阅请求"""
+        await asyncio.sleep(self.batch_window)
+        dirty, self._dirty_shards = self._dirty_shards, set()
+        for index in sorted(dirty):
             try:
-                self.geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
-                self.retry_count = 0  # Reset retry count on successful connection
-                logger.info("Successfully connected to Geyser service")
-                return
+                await self.shards[index].resubscribe()
             except Exception as e:
-                self.retry_count += 1
-                if self.retry_count >= self.max_retries:
-                    logger.error(
-                        f"Failed to connect to Geyser service after {self.max_retries} attempts: {e}"
-                    )
-                    raise
-                logger.warning(
-                    f"Connection attempt {self.retry_count} failed, retrying in {self.retry_delay} seconds..."
-                )
-                await asyncio.sleep(self.retry_delay)
-
-    async def _reconnect_and_subscribe(self) -> None:
-        logger.info("Attempting to reconnect...")
-        await asyncio.sleep(self.retry_delay)
-        await self._connect()
-
-        if self.geyser_client is None:
-            raise RuntimeError("Geyser client is not connected")
-
-        # Create subscription request
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-
-        # Subscribe to updates
-        logger.info("Subscribing to account updates...")
-        (
-            self.request_queue,
-            self.responses,
-        ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-    def __build_subscribe_request(self) -> SubscribeRequest:
-        logger.info(f"Subscribing to accounts: {self.subscribed_wallets}")
-
-        params = {}
-
-        if len(self.subscribed_wallets) != 0:
-            params["transactions"] = {
-                "key": SubscribeRequestFilterTransactions(
-                    account_include=list(self.subscribed_wallets),
-                    failed=False,
-                )
+                logger.error(f"Failed to resubscribe geyser shard-{index}: {e}")
+
+    def shard_lags(self) -> list[dict]:
+        """每个分片的延迟
+
+        slot_lag 为分片最新 slot 与所有分片中最新 slot 的差值，
+        idle_seconds 为距离该分片上一次收到消息的时间
+        """
+        now = time.monotonic()
+        latest_slot = max(shard.last_slot for shard in self.shards)
+        return [
+            {
+                "shard": shard.name,
+                "wallets": len(shard.wallets),
+                "slot": shard.last_slot,
+                "slot_lag": latest_slot - shard.last_slot,
+                "idle_seconds": now - shard.last_update_at if shard.last_update_at else None,
+                "updates": shard.updates,
             }
-        else:
-            params["ping"] = SubscribeRequestPing(id=1)
+            for shard in self.shards
+        ]
 
-        subscribe_request = SubscribeRequest(**params)
-        return subscribe_request
+    async def _report_lag(self) -> None:
+        while self.is_running:
+            await asyncio.sleep(self.lag_report_interval)
+            for lag in self.shard_lags():
+                logger.info(f"Geyser shard lag: {lag}")
 
-    async def _process_transaction(self, transaction: dict) -> None:
-        """Process and store transaction in Redis."""
-        if self.redis is None:
-            raise Exception("Redis is not connected")
+    async def _backfill(self, shard: GeyserShard, after_slot: int) -> None:
+        """补齐分片断线期间（after_slot 之后）的交易"""
+        try:
+            count = await self.backfiller.backfill(
+                list(shard.wallets), after_slot, self._process_transaction
+            )
+            logger.info(f"Geyser {shard.name} backfilled {count} txs after slot {after_slot}")
+        except Exception as e:
+            logger.error(f"Geyser {shard.name} backfill failed: {e}")
+            logger.exception(e)
 
+    async def _process_transaction(self, tx_detail: dict) -> None:
+        """Dispatch transaction to the parse pipeline."""
         try:
-            signature = transaction["transaction"]["signature"]
-            # 构建成 rpc 返回的结构，方便统一解析交易数据
-            data = {
-                **transaction["transaction"],
-            }
-            data["slot"] = int(transaction["slot"])
-            data["version"] = 0
-            # 只有被确认之后才会有 blockTime, 所以这里设置为当前时间
-            data["blockTime"] = int(time.time())
-
-            tx_info_json = json.dumps(data)
-            # Store in Redis using LIST structure
-            # 将交易信息添加到列表左端（最新的交易在最前面）
-            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_info_json)
-            # 保持列表长度在合理范围内（比如最多保留1000条交易记录）
-            # await self.redis.ltrim(NEW_TX_DETAIL_CHANNEL, 0, 999)
+            signature = tx_detail["transaction"]["signatures"][0]
+            # redis 模式下写入 Redis 列表，inprocess 模式下直接放入进程内队列
+            await self.pipeline.push(tx_detail)
             logger.info(f"Added transaction '{signature}' to queue")
         except Exception as e:
             logger.exception(f"Error processing transaction: {e}")
@@ -184,12 +141,13 @@ class TransactionDetailSubscriber:
             try:
                 response = await self.response_queue.get()
                 try:
-                    response_dict = proto_to_dict(response)
-                    if "ping" in response_dict:
-                        logger.debug(f"Got ping response: {response_dict}")
-                    if "filters" in response_dict and "transaction" in response_dict:
-                        logger.debug(f"Got transaction response: \n {response_dict}")
-                        await self._process_transaction(response_dict["transaction"])
+                    if response.HasField("ping"):
+                        logger.debug("Got ping response")
+                    if response.filters and response.HasField("transaction"):
+                        # 直接读取 protobuf 字段，避免 protobuf -> JSON 的往返转换
+                        tx_detail = decode_transaction_update(response.transaction)
+                        logger.debug(f"Got transaction response: \n {tx_detail}")
+                        await self._process_transaction(tx_detail)
                 except Exception as e:
                     logger.error(f"Error processing response: {e}")
                     logger.exception(e)
@@ -232,43 +190,13 @@ class TransactionDetailSubscriber:
             # 启动工作协程
             await self._start_workers()
 
-            # 初始化连接
-            await self._connect()
-
-            if self.geyser_client is None:
-                raise Exception("Geyser client is not connected")
-
-            # Create subscription request
-            subscribe_request = SubscribeRequest(ping=SubscribeRequestPing(id=1))
-            pb_request = Parse(subscribe_request.model_dump_json(), geyser_pb2.SubscribeRequest())
-
-            # Subscribe to updates
-            logger.info("Subscribing to account updates...")
-            (
-                self.request_queue,
-                self.responses,
-            ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-            async def _f():
-                """Process responses from the queue."""
-                logger.info(f"Starting response worker {id(asyncio.current_task())}")
-
-                while self.is_running:
-                    try:
-                        async for response in self.responses:
-                            if not self.is_running:
-                                break
-                            await self.response_queue.put(response)
-                    except AioRpcError as e:
-                        logger.error(f"Rpc Error: {e._details}")
-                        await self._reconnect_and_subscribe()
-                    except Exception as e:
-                        logger.exception(e)
-                        await self._reconnect_and_subscribe()
-
-            monitor_task = asyncio.create_task(_f())
-            # 添加任务完成回调以处理可能的异常
-            monitor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+            # 每个分片独立连接并以当前分配的钱包订阅，连接失败时由分片自行退避重连
+            self.shard_tasks = [
+                asyncio.create_task(shard.run(self.response_queue)) for shard in self.shards
+            ]
+            logger.info(f"Subscribing to account updates with {len(self.shards)} shards")
+            if self.lag_report_interval > 0:
+                self.shard_tasks.append(asyncio.create_task(self._report_lag()))
         except asyncio.CancelledError:
             logger.info("Monitor cancelled, shutting down...")
         except Exception as e:
@@ -286,13 +214,17 @@ class TransactionDetailSubscriber:
         # 等待所有工作协程完成
         await self._stop_workers()
 
-        # 关闭 geyser client
-        if self.geyser_client:
-            try:
-                await self.geyser_client.close()
-                self.geyser_client = None
-            except Exception as e:
-                logger.error(f"Error closing geyser client: {e}")
+        # 关闭所有分片的 geyser client
+        for task in self.shard_tasks:
+            task.cancel()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await asyncio.gather(*self.shard_tasks, return_exceptions=True)
+        self.shard_tasks.clear()
+        for shard in self.shards:
+            for task in shard.task_pool:
+                task.cancel()
+            await shard.close()
 
         # 关闭 Redis 连接
         if self.redis:
@@ -307,54 +239,35 @@ class TransactionDetailSubscriber:
     async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        每次发送新的订阅请求都会完全替换该订阅流之前的订阅状态，
+        因此只重新发送钱包所在分片的订阅请求，并在 batch_window 内合并多次变更。
 
         Args:
             wallet (Pubkey): 要订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
-
-        if str(wallet) in self.subscribed_wallets:
+        shard = self.shard_of(str(wallet))
+        if str(wallet) in shard.wallets:
             logger.warning(f"Wallet {wallet} already subscribed")
             return
 
-        # 添加到订阅集合
-        self.subscribed_wallets.add(str(wallet))
-
-        # 发送订阅请求，包含所有已订阅的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
+        shard.wallets.add(str(wallet))
+        self._mark_dirty(shard)
 
     async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """取消订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        只重新发送钱包所在分片的订阅请求，并在 batch_window 内合并多次变更。
 
         Args:
             wallet (Pubkey): 要取消订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
-
-        if str(wallet) not in self.subscribed_wallets:
+        shard = self.shard_of(str(wallet))
+        if str(wallet) not in shard.wallets:
             logger.warning(f"Wallet {wallet} not subscribed")
             return
 
-        # 从订阅集合中移除钱包
-        self.subscribed_wallets.remove(str(wallet))
-
-        # 发送新的订阅请求，只包含剩余的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
+        shard.wallets.remove(str(wallet))
+        self._mark_dirty(shard)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+import aioredis
+from aioredis.exceptions import RedisError
+from solbot_common.log import logger
+
+Handler = Callable[[bytes | str], Awaitable[None]]
+
+
+class RedisListConsumer:
+    """Redis 列表批量消费者
+
+    由单个拉取协程从 Redis 列表批量取出消息，放入进程内的有界队列，再由多个 worker 并行处理，
+    worker 之间不需要加锁：
+    - 先用 BRPOP 阻塞等待第一条消息（列表为空时不会空转）
+    - 再用 RPOP count 一次性取出剩余的至多 batch_size - 1 条消息
+    进程内队列满时拉取协程会阻塞，不会无限制地从 Redis 中取出消息。
+    停止时，尚未处理的消息会被放回 Redis 列表。
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        key: str,
+        handler: Handler,
+        batch_size: int = 100,
+        queue_size: int = 1000,
+        report_interval: float = 10,
+    ):
+        """
+        Args:
+            redis: Redis 客户端
+            key: 要消费的 Redis 列表
+            handler: 处理单条消息的协程函数
+            batch_size: 单次从 Redis 中最多取出的消息数量
+            queue_size: 进程内队列大小
+            report_interval: 队列深度上报间隔（秒），小于等于 0 时不上报
+        """
+        self.redis = redis
+        self.key = key
+        self.handler = handler
+        self.batch_size = max(1, batch_size)
+        self.queue: asyncio.Queue[bytes | str] = asyncio.Queue(maxsize=queue_size)
+        self.report_interval = report_interval
+        self.is_running = False
+        self.tasks: list[asyncio.Task] = []
+        # 已从 Redis 取出、尚未放入进程内队列的消息
+        self._fetched: deque[bytes | str] = deque()
+
+    async def fetch_batch(self) -> list[bytes | str]:
+        """从 Redis 列表中取出一批消息，超时返回空列表"""
+        result = await self.redis.brpop(self.key, timeout=1)
+        if result is None:  # timeout occurred
+            return []
+        _, item = result
+        items = [item]
+        if self.batch_size > 1:
+            rest = await self.redis.rpop(self.key, self.batch_size - 1)
+            if rest:
+                items.extend(rest)
+        return items
+
+    async def depth(self) -> tuple[int, int]:
+        """队列深度
+
+        Returns:
+            tuple[int, int]: (Redis 列表中待取出的消息数, 进程内队列中待处理的消息数)
+        """
+        return await self.redis.llen(self.key), self.queue.qsize()
+
+    async def _fetcher(self):
+        while self.is_running:
+            try:
+                self._fetched.extend(await self.fetch_batch())
+                while self._fetched:
+                    # 放入队列后再移除，put 等待期间被取消时消息仍在 _fetched 中
+                    await self.queue.put(self._fetched[0])
+                    self._fetched.popleft()
+            except RedisError as e:
+                logger.error(f"Failed to pop from Redis list {self.key}: {e}")
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                logger.info(f"Fetcher of {self.key} cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Fetcher of {self.key} error: {e}")
+                logger.exception(e)
+                # 避免异常时空转占满事件循环
+                await asyncio.sleep(1)
+
+    async def _worker(self):
+        while self.is_running:
+            try:
+                item = await self.queue.get()
+            except asyncio.CancelledError:
+                break
+            try:
+                await self.handler(item)
+            except asyncio.CancelledError:
+                logger.info("Worker task cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Worker error: {e}")
+                logger.exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def _reporter(self):
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.report_interval)
+                backlog, pending = await self.depth()
+                logger.info(f"Queue depth of {self.key}: redis={backlog}, local={pending}")
+            except RedisError as e:
+                logger.error(f"Failed to get depth of Redis list {self.key}: {e}")
+            except asyncio.CancelledError:
+                break
+
+    async def start(self, num_workers: int = 2):
+        """启动拉取协程和 worker 协程，直到全部结束"""
+        self.is_running = True
+        self.tasks = [asyncio.create_task(self._fetcher())]
+        self.tasks.extend(asyncio.create_task(self._worker()) for _ in range(num_workers))
+        if self.report_interval > 0:
+            self.tasks.append(asyncio.create_task(self._reporter()))
+        try:
+            await asyncio.gather(*self.tasks)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """停止消费，并将尚未处理的消息放回 Redis 列表"""
+        self.is_running = False
+        for task in self.tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+            self.queue.task_done()
+        # 拉取协程取消时还未放入队列的消息，排在队列中的消息之后
+        pending.extend(self._fetched)
+        self._fetched.clear()
+        if not pending:
+            return
+        # BRPOP 从右侧取出，RPUSH 放回右侧，保证这些消息下次最先被消费
+        try:
+            await self.redis.rpush(self.key, *reversed(pending))
+            logger.info(f"Pushed {len(pending)} pending items back to {self.key}")
+        except RedisError as e:
+            logger.error(f"Failed to push {len(pending)} pending items back to {self.key}: {e}")
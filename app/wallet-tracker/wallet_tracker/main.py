@@ -10,6 +10,9 @@ from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 
 from wallet_tracker.benchmark import BenchmarkService
+from wallet_tracker.dedup import SignatureDeduplicator
+from wallet_tracker.parse_pool import ParsePool
+from wallet_tracker.pipeline import TxDetailPipeline
 from wallet_tracker.tx_monitor import TxMonitor
 from wallet_tracker.tx_worker import TransactionWorker
 
@@ -19,8 +22,37 @@ class WalletTracker:
         self.redis = RedisClient.get_instance()
         self.client = get_async_client()
         self.wallets = init_wallets
-        self.transaction_monitor = TxMonitor(self.wallets, mode=settings.monitor.mode)
-        self.transaction_worker = TransactionWorker(self.redis)
+        # inprocess 模式下，交易详情经由进程内队列直接交给 worker 解析，不再经过 Redis 列表
+        tx_queue: asyncio.Queue[dict] | None = None
+        if settings.monitor.pipeline == "inprocess":
+            tx_queue = asyncio.Queue(maxsize=settings.monitor.pipeline_queue_size)
+        self.pipeline = TxDetailPipeline(
+            self.redis,
+            queue=tx_queue,
+            durability_tap=settings.monitor.durability_tap,
+        )
+        self.transaction_monitor = TxMonitor(
+            self.wallets,
+            mode=settings.monitor.mode,
+            pipeline=self.pipeline,
+        )
+        parse_pool: ParsePool | None = None
+        if settings.monitor.parse_workers > 0:
+            parse_pool = ParsePool(
+                settings.monitor.parse_workers,
+                queue_size=settings.monitor.parse_queue_size,
+            )
+        self.dedup = SignatureDeduplicator(
+            self.redis if settings.monitor.dedup_redis else None,
+            max_size=settings.monitor.dedup_size,
+            ttl=settings.monitor.dedup_ttl,
+        )
+        self.transaction_worker = TransactionWorker(
+            self.redis,
+            queue=tx_queue,
+            parse_pool=parse_pool,
+            dedup=self.dedup,
+        )
         self.benchmark_service = BenchmarkService()
 
     # @provide_session
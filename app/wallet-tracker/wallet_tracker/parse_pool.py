@@ -0,0 +1,193 @@
+import asyncio
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import orjson as json
+from solbot_common.log import logger
+from solbot_common.types import TxEvent
+
+from wallet_tracker.parser import RawTXParser
+
+TxDetail = dict | bytes | str
+
+# 账户列表为字符串或不含数组的对象，第一个 "]" 即为数组结尾
+_SIGNATURES = re.compile(rb'"signatures"\s*:\s*(\[[^\]]*\])')
+_ACCOUNT_KEYS = re.compile(rb'"accountKeys"\s*:\s*(\[[^\]]*\])')
+_BLOCK_TIME = re.compile(rb'"blockTime"\s*:\s*(-?\d+|null)')
+
+
+def peek_tx_header(raw: bytes | str) -> dict | None:
+    """从交易详情的原始 JSON 中只取出签名、账户列表和区块时间，不解码整个交易详情
+
+    返回的 dict 与交易详情的结构一致，可以直接交给 RawTXParser 确定签名和 who，
+    完整的解码留给解析子进程。找不到这些字段时返回 None。
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    signatures = _SIGNATURES.search(raw)
+    account_keys = _ACCOUNT_KEYS.search(raw)
+    if signatures is None or account_keys is None:
+        return None
+    block_time = _BLOCK_TIME.search(raw)
+    try:
+        return {
+            "blockTime": json.loads(block_time.group(1)) if block_time else None,
+            "transaction": {
+                "signatures": json.loads(signatures.group(1)),
+                "message": {"accountKeys": json.loads(account_keys.group(1))},
+            },
+        }
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_tx_detail(tx_detail: TxDetail, who: str) -> TxEvent | None:
+    """在子进程中解析交易详情
+
+    who 需要在主进程中通过 RawTXParser.set_who 确定（可能需要查询数据库），
+    子进程中只做纯 CPU 的解析工作。tx_detail 为原始 JSON 时在子进程中解码，
+    主进程不需要解码和序列化整个交易详情。
+    """
+    if not isinstance(tx_detail, dict):
+        tx_detail = json.loads(tx_detail)
+    tx_parser = RawTXParser(tx_detail)
+    tx_parser.who = who
+    return tx_parser.parse()
+
+
+@dataclass
+class ShardStats:
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0
+
+    def reset(self) -> None:
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0
+
+
+class ParseShard:
+    """单个解析分片
+
+    独占一个单进程的 ProcessPoolExecutor，按提交顺序依次解析，保证同一分片内的顺序
+    """
+
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue: asyncio.Queue[tuple[TxDetail, str, asyncio.Future]] = asyncio.Queue(
+            maxsize=queue_size
+        )
+        self.executor: ProcessPoolExecutor | None = None
+        self.stats = ShardStats()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(max_workers=1)
+        try:
+            while True:
+                tx_detail, who, future = await self.queue.get()
+                start = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(
+                        self.executor, parse_tx_detail, tx_detail, who
+                    )
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    self.stats.failed += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.stats.processed += 1
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self.stats.busy_seconds += time.perf_counter() - start
+                    self.queue.task_done()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+class ParsePool:
+    """多进程交易解析池
+
+    按签名者（who）将交易分配到固定的分片，每个分片对应一个独立的解析进程：
+    - 同一钱包的交易总是落在同一分片，按提交顺序解析，保证单钱包内的顺序
+    - 不同钱包的交易在不同进程中并行解析，单个钱包的突发交易不会阻塞其他钱包
+    - 分片队列有界，队列满时 submit 会阻塞调用方，背压会一路传递到订阅者的队列
+    """
+
+    def __init__(self, num_shards: int, queue_size: int = 100, report_interval: float = 60):
+        """
+        Args:
+            num_shards: 分片数量，即解析进程数量
+            queue_size: 每个分片的队列大小
+            report_interval: 分片吞吐量上报间隔（秒），小于等于 0 时不上报
+        """
+        if num_shards <= 0:
+            raise ValueError(f"Invalid num_shards: {num_shards}")
+        self.shards = [ParseShard(i, queue_size) for i in range(num_shards)]
+        self.report_interval = report_interval
+        self.tasks: list[asyncio.Task] = []
+
+    def shard_of(self, who: str) -> ParseShard:
+        # 使用稳定的哈希，不受 PYTHONHASHSEED 影响
+        return self.shards[zlib.crc32(who.encode("utf-8")) % len(self.shards)]
+
+    async def submit(self, tx_detail: TxDetail, who: str) -> asyncio.Future[TxEvent | None]:
+        """提交交易详情（dict 或原始 JSON）到对应分片，返回解析结果的 future
+
+        分片队列满时会阻塞，直到有空位
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.shard_of(who).queue.put((tx_detail, who, future))
+        return future
+
+    async def parse(self, tx_detail: TxDetail, who: str) -> TxEvent | None:
+        """提交并等待解析结果，解析异常会原样抛出"""
+        return await (await self.submit(tx_detail, who))
+
+    async def _reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            for shard in self.shards:
+                stats = shard.stats
+                throughput = stats.processed / self.report_interval
+                avg_ms = (
+                    stats.busy_seconds / (stats.processed + stats.failed) * 1000
+                    if stats.processed + stats.failed
+                    else 0
+                )
+                logger.info(
+                    f"Parse shard {shard.index}: {throughput:.2f} tx/s, "
+                    f"processed={stats.processed}, failed={stats.failed}, "
+                    f"avg={avg_ms:.2f}ms, backlog={shard.queue.qsize()}"
+                )
+                stats.reset()
+
+    def start(self) -> None:
+        """启动所有分片，需要在事件循环中调用"""
+        if self.tasks:
+            return
+        self.tasks = [asyncio.create_task(shard.run()) for shard in self.shards]
+        if self.report_interval > 0:
+            self.tasks.append(asyncio.create_task(self._reporter()))
+        logger.info(f"Parse pool started with {len(self.shards)} shards")
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # 取消尚未解析的交易，避免调用方一直等待
+        for shard in self.shards:
+            while not shard.queue.empty():
+                _, _, future = shard.queue.get_nowait()
+                future.cancel()
+                shard.queue.task_done()
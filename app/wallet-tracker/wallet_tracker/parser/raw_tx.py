@@ -1,11 +1,13 @@
-from functools import cache
+from collections.abc import Callable
+from functools import wraps
+from typing import TypeVar
 
 import orjson as json
-from solbot_common.constants import SWAP_PROGRAMS, TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID, WSOL
+from solbot_common.constants import SWAP_PROGRAMS
 from solbot_common.types import SolAmountChange, TokenAmountChange, TxEvent, TxType
-from solbot_common.log import logger
-from solbot_services.copytrade import CopyTradeService
-from solbot_common.models.tg_bot.monitor import Monitor
+from solbot_common.utils.balance_change import TokenBalanceIndex
+
+from wallet_tracker.active_wallets import active_wallet_registry
 from wallet_tracker.exceptions import (
     NotSwapTransaction,
     UnknownTransactionType,
@@ -14,21 +16,44 @@ from wallet_tracker.exceptions import (
 
 from .protocol import TransactionParserInterface
 
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def instance_cache(method: Callable[["RawTXParser"], T]) -> Callable[["RawTXParser"], T]:
+    """将无参方法的结果缓存在实例上
+
+    与 functools.cache 不同，缓存随实例一起释放，不会把解析器和整个交易详情长期留在全局缓存中。
+    与 functools.cache 一致，抛出异常时不缓存。
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self: "RawTXParser") -> T:
+        result = self._cache.get(name, _MISSING)
+        if result is _MISSING:
+            result = self._cache[name] = method(self)
+        return result
+
+    return wrapper
+
 
 class RawTXParser(TransactionParserInterface):
     def __init__(self, tx_detail: dict) -> None:
         self.tx_detail = tx_detail
+        self._cache: dict[str, object] = {}
 
     @classmethod
     def from_json(cls, tx_detail: str) -> "RawTXParser":
         return cls(json.loads(tx_detail))
 
-    @cache
+    @instance_cache
     def get_block_time(self) -> int:
         return self.tx_detail["blockTime"]
 
     # PREF: deal with multi-hash
-    @cache
+    @instance_cache
     def get_tx_hash(self) -> str:
         txs = self.tx_detail["transaction"]["signatures"]
         # if len(txs) > 1:
@@ -40,11 +65,8 @@ class RawTXParser(TransactionParserInterface):
         account_keys = self.tx_detail["transaction"]["message"]["accountKeys"]
         # 查询其中属于聪明钱的地址，以防多个singer
         if len(self.tx_detail["transaction"]["signatures"]) > 1:
-            # 从数据库中获取已激活的目标地址
-            monitor_addresses = await Monitor.get_active_wallet_addresses()
-            copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
-            # 合并两个列表
-            active_wallet_addresses = list(set(list(monitor_addresses) + list(copytrade_addresses)))
+            # 已激活的目标地址，只在首次使用时查询数据库，之后由监听器事件增量更新
+            active_wallet_addresses = await active_wallet_registry.ensure_loaded()
             for account_key in account_keys:
                 if account_key in active_wallet_addresses:
                     if isinstance(account_key, str):
@@ -58,47 +80,22 @@ class RawTXParser(TransactionParserInterface):
             else:
                 self.who = singer["pubkey"]
 
-    @cache
-    def get_mint(self) -> str:
-        token_post_balances = self.tx_detail["meta"]["postTokenBalances"]
-        token_pre_balances = self.tx_detail["meta"]["preTokenBalances"]
-        for token_post_balance in token_post_balances:
-            if token_post_balance["owner"] != self.who:
-                continue
-            if (token_post_balance["programId"] == str(TOKEN_PROGRAM_ID) or token_post_balance["programId"] == str(TOKEN_2022_PROGRAM_ID)) and token_post_balance[
-                "mint"
-            ] != str(WSOL):
-                return token_post_balance["mint"]
+    @instance_cache
+    def get_token_balance_index(self) -> TokenBalanceIndex:
+        meta = self.tx_detail["meta"]
+        return TokenBalanceIndex(self.who, meta["preTokenBalances"], meta["postTokenBalances"])
 
-        for token_pre_balance in token_pre_balances:
-            if token_pre_balance["owner"] != self.who:
-                continue
-            if (token_pre_balance["programId"] == str(TOKEN_PROGRAM_ID) or token_pre_balance["programId"] == str(TOKEN_2022_PROGRAM_ID)) and token_pre_balance[
-                "mint"
-            ] != str(WSOL):
-                return token_pre_balance["mint"]
-        raise ValueError("mint not found")
+    @instance_cache
+    def get_mint(self) -> str:
+        mint = self.get_token_balance_index().mint
+        if mint is None:
+            raise ValueError("mint not found")
+        return mint
 
-    @cache
+    @instance_cache
     def get_token_amount_change(self) -> TokenAmountChange:
-        pre_token_balances = self.tx_detail["meta"]["preTokenBalances"]
-        post_token_balances = self.tx_detail["meta"]["postTokenBalances"]
         mint = self.get_mint()
-        pre_token_amount = 0
-        post_token_amount = 0
-        decimals = 6
-        for pre_token_balance in pre_token_balances:
-            if pre_token_balance["mint"] == mint and pre_token_balance["owner"] == self.who:
-                pre_token_amount = int(pre_token_balance["uiTokenAmount"]["amount"])
-                decimals = pre_token_balance["uiTokenAmount"]["decimals"]
-                break
-
-        for post_token_balance in post_token_balances:
-            if post_token_balance["mint"] == mint and post_token_balance["owner"] == self.who:
-                post_token_amount = int(post_token_balance["uiTokenAmount"]["amount"])
-                decimals = post_token_balance["uiTokenAmount"]["decimals"]
-                break
-
+        pre_token_amount, post_token_amount, decimals = self.get_token_balance_index().get(mint)
         return {
             "change_amount": post_token_amount - pre_token_amount,
             "decimals": decimals,
@@ -106,7 +103,7 @@ class RawTXParser(TransactionParserInterface):
             "post_balance": post_token_amount,
         }
 
-    @cache
+    @instance_cache
     def get_sol_amount_change(self) -> SolAmountChange:
         pre_balances = self.tx_detail["meta"]["preBalances"]
         post_balances = self.tx_detail["meta"]["postBalances"]
@@ -122,14 +119,13 @@ class RawTXParser(TransactionParserInterface):
             "post_balance": post_sol_balance,
         }
 
-    @cache
+    @instance_cache
     def get_tx_type(self) -> TxType:
         token_amount_change = self.get_token_amount_change()
-        change_ui_amount = token_amount_change["change_amount"] / (
-            10 ** token_amount_change["decimals"]
-        )
-        pre_balance = token_amount_change["pre_balance"] / (10 ** token_amount_change["decimals"])
-        post_balance = token_amount_change["post_balance"] / (10 ** token_amount_change["decimals"])
+        unit = 10 ** token_amount_change["decimals"]
+        change_ui_amount = token_amount_change["change_amount"] / unit
+        pre_balance = token_amount_change["pre_balance"] / unit
+        post_balance = token_amount_change["post_balance"] / unit
         if change_ui_amount > 0:
             # 加仓或开仓
             if pre_balance == 0 and post_balance > 0:
@@ -148,16 +144,22 @@ class RawTXParser(TransactionParserInterface):
         else:
             raise ZeroChangeAmountError(pre_balance, post_balance)
 
-    @cache
+    @instance_cache
     def get_swap_program_id(self) -> str | None:
-        log_messages = self.tx_detail["meta"]["logMessages"]
-        for message in log_messages:
-            for program_id in SWAP_PROGRAMS:
-                if program_id in message:
-                    return program_id
-        return None
-
-    @cache
+        # 拼接后对每个程序只做一次查找，按 (日志行号, SWAP_PROGRAMS 中的顺序) 取最先出现的程序，
+        # 与逐行逐程序匹配的结果一致
+        logs = "\n".join(self.tx_detail["meta"]["logMessages"])
+        found = None
+        for order, program_id in enumerate(SWAP_PROGRAMS):
+            pos = logs.find(program_id)
+            if pos == -1:
+                continue
+            rank = (logs.count("\n", 0, pos), order)
+            if found is None or rank < found[0]:
+                found = (rank, program_id)
+        return None if found is None else found[1]
+
+    @instance_cache
     def parse(self) -> TxEvent | None:
         # if self.tx_detail["meta"]["status"] is not None:
         #     if "Err" in self.tx_detail["meta"]["status"]:
@@ -182,7 +184,6 @@ class RawTXParser(TransactionParserInterface):
 
         signature = self.get_tx_hash()
         timestamp = self.get_block_time()
-        mint = self.get_mint()
         token_amount_change = self.get_token_amount_change()
         sol_amount_change = self.get_sol_amount_change()
         tx_type = self.get_tx_type()
@@ -193,15 +194,11 @@ class RawTXParser(TransactionParserInterface):
             from_decimals = 9
             to_amount = abs(token_amount_change["change_amount"])
             to_decimals = token_amount_change["decimals"]
-            pre_token_balance = token_amount_change["pre_balance"]
-            post_token_balance = token_amount_change["post_balance"]
         else:
             from_amount = abs(token_amount_change["change_amount"])
             from_decimals = token_amount_change["decimals"]
             to_amount = abs(sol_amount_change["change_amount"])
             to_decimals = 9
-            pre_token_balance = token_amount_change["pre_balance"]
-            post_token_balance = token_amount_change["post_balance"]
 
         return TxEvent(
             signature=signature,
@@ -214,7 +211,8 @@ class RawTXParser(TransactionParserInterface):
             tx_type=tx_type,
             tx_direction="buy" if sol_amount_change["change_amount"] < 0 else "sell",
             timestamp=timestamp,
-            pre_token_amount=pre_token_balance,
-            post_token_amount=post_token_balance,
+            pre_token_amount=token_amount_change["pre_balance"],
+            post_token_amount=token_amount_change["post_balance"],
             program_id=program_id,
+            backfilled=self.tx_detail.get("backfilled", False),
         )
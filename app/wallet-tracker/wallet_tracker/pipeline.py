@@ -0,0 +1,58 @@
+import asyncio
+
+import aioredis
+import orjson as json
+from solbot_common.log import logger
+
+from wallet_tracker.constants import (
+    NEW_TX_DETAIL_CHANNEL,
+    TX_DETAIL_TAP_CHANNEL,
+    TX_DETAIL_TAP_MAX_LENGTH,
+)
+
+
+class TxDetailPipeline:
+    """交易详情分发
+
+    订阅者拿到交易详情后统一交由该类分发：
+    - redis 模式：序列化后写入 Redis 列表 NEW_TX_DETAIL_CHANNEL，由 TransactionWorker 消费
+    - inprocess 模式：直接放入进程内的有界队列，由 TransactionWorker 直接解析，
+      队列满时 put 会阻塞订阅者，形成背压。
+      开启 durability_tap 时，会在后台额外将交易详情写入 Redis 留存，不阻塞关键路径
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        queue: asyncio.Queue[dict] | None = None,
+        durability_tap: bool = False,
+    ):
+        self.redis = redis
+        self.queue = queue
+        self.durability_tap = durability_tap
+        self.task_pool: set[asyncio.Task] = set()
+
+    @property
+    def in_process(self) -> bool:
+        return self.queue is not None
+
+    async def push(self, tx_detail: dict) -> None:
+        """分发单个交易详情"""
+        if self.queue is None:
+            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, json.dumps(tx_detail))
+            return
+
+        await self.queue.put(tx_detail)
+        if self.durability_tap:
+            task = asyncio.create_task(self._tap(tx_detail))
+            self.task_pool.add(task)
+            task.add_done_callback(self.task_pool.discard)
+
+    async def _tap(self, tx_detail: dict) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.lpush(TX_DETAIL_TAP_CHANNEL, json.dumps(tx_detail))
+                pipe.ltrim(TX_DETAIL_TAP_CHANNEL, 0, TX_DETAIL_TAP_MAX_LENGTH - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to tap transaction detail to Redis: {e}")
@@ -4,12 +4,13 @@ from typing import Literal
 from solbot_common.config import settings
 from solbot_common.cp.monitor_events import MonitorEvent, MonitorEventConsumer, MonitorEventType
 from solbot_common.log import logger
-from solbot_common.models.tg_bot.monitor import Monitor
 from solbot_db.redis import RedisClient
-from solbot_services.copytrade import CopyTradeService
 from solders.pubkey import Pubkey  # type: ignore
 
+from .active_wallets import ActiveWalletRegistry, active_wallet_registry
 from .geyser.tx_subscriber import TransactionDetailSubscriber as GeyserMonitor
+from .pipeline import TxDetailPipeline
+from .wss.tx_stream import TransactionStreamSubscriber as StreamMonitor
 from .wss.tx_subscriber import TransactionDetailSubscriber as RPCMonitor
 
 
@@ -17,9 +18,12 @@ class TxMonitor:
     def __init__(
         self,
         wallets: Sequence[Pubkey],
-        mode: Literal["wss", "geyser"] = "wss",
+        mode: Literal["wss", "geyser", "wss_stream"] = "wss",
+        pipeline: TxDetailPipeline | None = None,
+        active_wallets: ActiveWalletRegistry | None = None,
     ):
         self.mode = mode
+        self.active_wallets = active_wallets or active_wallet_registry
         redis = RedisClient.get_instance()
         self.events = MonitorEventConsumer(redis)
         if mode == "wss":
@@ -27,6 +31,22 @@ class TxMonitor:
                 settings.rpc.rpc_url,
                 redis,
                 wallets,
+                pipeline=pipeline,
+            )
+        elif mode == "wss_stream":
+            # RPC 不支持完整交易订阅时，退回到 logsSubscribe + getTransaction
+            self.monitor = StreamMonitor(
+                settings.rpc.rpc_url,
+                redis,
+                wallets,
+                pipeline=pipeline,
+                method=settings.monitor.stream_method,
+                fallback=lambda wallets: RPCMonitor(
+                    settings.rpc.rpc_url,
+                    redis,
+                    wallets,
+                    pipeline=pipeline,
+                ),
             )
         elif mode == "geyser":
             self.monitor = GeyserMonitor(
@@ -34,6 +54,9 @@ class TxMonitor:
                 settings.rpc.geyser.api_key,
                 redis,
                 wallets,
+                pipeline=pipeline,
+                num_shards=settings.rpc.geyser.shards,
+                batch_window=settings.rpc.geyser.batch_window_ms / 1000,
             )
         else:
             raise ValueError("Invalid mode")
@@ -52,11 +75,8 @@ class TxMonitor:
         # 启动监听器
         await self.monitor.start()
 
-        # 从数据库中获取已激活的目标地址
-        monitor_addresses = await Monitor.get_active_wallet_addresses()
-        copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
-        # 合并两个列表
-        active_wallet_addresses = list(set(list(monitor_addresses) + list(copytrade_addresses)))
+        # 从数据库中获取已激活的目标地址，与解析器共享
+        active_wallet_addresses = await self.active_wallets.load()
         for address in active_wallet_addresses:
             await self.monitor.subscribe_wallet_transactions(Pubkey.from_string(address))
             logger.debug(f"Subscribed to wallet: {address}")
@@ -81,6 +101,7 @@ class TxMonitor:
         """处理恢复监听事件"""
         try:
             wallet = Pubkey.from_string(event.target_wallet)
+            self.active_wallets.add(event.target_wallet)
             await self.monitor.subscribe_wallet_transactions(wallet)
             logger.info(f"Resumed monitoring wallet: {wallet}")
         except Exception as e:
@@ -91,6 +112,7 @@ class TxMonitor:
         """处理暂停监听事件"""
         try:
             wallet = Pubkey.from_string(event.target_wallet)
+            self.active_wallets.discard(event.target_wallet)
             await self.monitor.unsubscribe_wallet_transactions(wallet)
             logger.info(f"Paused monitoring wallet: {wallet}")
         except Exception as e:
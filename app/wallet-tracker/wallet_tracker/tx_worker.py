@@ -2,18 +2,21 @@ import asyncio
 
 import aioredis
 import orjson as json
-from aioredis.exceptions import RedisError
+from solbot_common.config import settings
 from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.dedup import SignatureDeduplicator
 from wallet_tracker.exceptions import (
     NotSwapTransaction,
     TransactionError,
     UnknownTransactionType,
     ZeroChangeAmountError,
 )
+from wallet_tracker.list_consumer import RedisListConsumer
+from wallet_tracker.parse_pool import ParsePool, peek_tx_header
 from wallet_tracker.parser import RawTXParser
 
 
@@ -28,10 +31,32 @@ class TransactionWorker:
     - 清仓
     """
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        queue: asyncio.Queue[dict] | None = None,
+        parse_pool: ParsePool | None = None,
+        dedup: SignatureDeduplicator | None = None,
+    ):
+        """
+        Args:
+            redis: Redis 客户端
+            queue: 进程内交易详情队列，不为 None 时直接从该队列消费，不再从 Redis 列表读取
+            parse_pool: 多进程解析池，不为 None 时交易在子进程中解析，否则在事件循环中解析
+            dedup: 交易签名去重，为 None 时不去重
+        """
         self.redis: aioredis.Redis = redis
+        self.queue = queue
+        self.parse_pool = parse_pool
+        self.dedup = dedup
         self.is_running = False
-        self.lock = asyncio.Lock()
+        self.consumer = RedisListConsumer(
+            redis,
+            NEW_TX_DETAIL_CHANNEL,
+            self.handle_message,
+            batch_size=settings.monitor.consumer_batch_size,
+        )
+        self.workers: list[asyncio.Task] = []
         self.tx_event_producer = TxEventProducer(redis)
 
     async def push_parse_failed_to_redis(self, tx_event: str):
@@ -39,63 +64,109 @@ class TransactionWorker:
         assert self.redis is not None
         await self.redis.lpush(FAILED_TX_DETAIL_CHANNEL, tx_event)
 
-    async def process_transaction(self, tx_detail: dict):
-        """处理单个交易"""
+    async def process_transaction(self, tx_detail: dict, raw: bytes | str | None = None):
+        """处理单个交易
+
+        Args:
+            tx_detail: 交易详情；raw 不为 None 时只需要包含签名、账户列表和区块时间
+            raw: 交易详情的原始 JSON，不为 None 时原样提交到解析池，在子进程中解码
+        """
         tx_parser = RawTXParser(tx_detail)
-        await tx_parser.set_who()
         tx_hash = tx_parser.get_tx_hash()
+        if self.dedup is None:
+            await self._handle_transaction(tx_parser, tx_hash, raw)
+            return
+
+        # 在解析之前去重，同一笔交易可能经由多个路径到达
+        if await self.dedup.is_duplicate(tx_hash):
+            logger.info(f"Duplicate tx: {tx_hash}, hits: {self.dedup.stats.hits}")
+            return
+        handled = False
+        try:
+            handled = await self._handle_transaction(tx_parser, tx_hash, raw)
+        finally:
+            # 处理成功后才标记为已处理，失败时同一笔交易可以经由其他路径重新处理
+            await self.dedup.finish(tx_hash, handled)
+
+    async def _handle_transaction(
+        self, tx_parser: RawTXParser, tx_hash: str, raw: bytes | str | None
+    ) -> bool:
+        """解析交易并产生 TxEvent，交易被放入失败队列时返回 False"""
+        tx_detail = tx_parser.tx_detail
+        await tx_parser.set_who()
+
+        def tx_detail_text() -> str:
+            if raw is not None:
+                return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
+            # 只在失败时序列化，避免每笔交易都做一次完整的 dumps
+            return json.dumps(tx_detail).decode("utf-8")
 
-        # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
-        tx_detail_text = json.dumps(tx_detail).decode("utf-8")
         try:
+            parsed = None
+            if self.parse_pool is not None:
+                # 在任何其他 await 之前提交，保证同一钱包的交易按到达顺序解析
+                parsed = await self.parse_pool.submit(
+                    tx_detail if raw is None else raw, tx_parser.who
+                )
+
             block_time = tx_parser.get_block_time()
             await benchmark.record_block_time(tx_hash, block_time)
 
             async with benchmark.with_parse_tx(tx_hash):
-                tx_event = tx_parser.parse()
+                tx_event = await parsed if parsed is not None else tx_parser.parse()
 
             # FIXME: 解析失败，该如何处理, 后续需要对失败队列加入监控并发出警报
             if tx_event is None:
-                logger.error(f"Parse tx failed, details: {tx_detail_text}")
+                text = tx_detail_text()
+                logger.error(f"Parse tx failed, details: {text}")
                 # 加入到失败队列
-                await self.push_parse_failed_to_redis(tx_detail_text)
-                return
+                await self.push_parse_failed_to_redis(text)
+                return False
             await self.tx_event_producer.produce(tx_event)
             logger.success(f"New tx event: {tx_hash}")
         except TransactionError as e:
             logger.info(f"Transaction status is not valid, status: {e}")
         except NotSwapTransaction:
             logger.info(f"Tx is not swap transaction, details: {tx_hash}")
-            return
         except UnknownTransactionType:
             logger.info(f"Tx type is not valid, details: {tx_hash}")
-            return
         except ZeroChangeAmountError:
             logger.info(f"Tx amount is zero, details: {tx_hash}")
-            return
         except Exception as e:
-            logger.error(f"Failed to process transaction: {e}, details: {tx_detail_text}")
+            text = tx_detail_text()
+            logger.error(f"Failed to process transaction: {e}, details: {text}")
             logger.exception(e)
             # 加入到失败队列
-            await self.push_parse_failed_to_redis(tx_detail_text)
+            await self.push_parse_failed_to_redis(text)
+            return False
         # finally:
         #     await benchmark.show_timeline(tx_hash)
+        return True
 
-    async def worker(self):
-        """单个 worker 协程"""
+    async def handle_message(self, tx_detail: bytes | str):
+        """处理从 Redis 列表中取出的单条消息
+
+        使用解析池时，事件循环中只取出签名和账户列表，原始 JSON 交给解析子进程解码，
+        避免在事件循环中解码、再序列化传给子进程
+        """
+        if self.parse_pool is not None:
+            header = peek_tx_header(tx_detail)
+            if header is not None:
+                await self.process_transaction(header, raw=tx_detail)
+                return
+        await self.process_transaction(json.loads(tx_detail))
+
+    async def queue_worker(self):
+        """单个 worker 协程，从进程内队列消费交易详情"""
+        assert self.queue is not None
         while self.is_running:
             try:
-                assert self.redis is not None
-                async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_DETAIL_CHANNEL, timeout=1)
-                    if result is None:  # timeout occurred
-                        continue
-                _, tx_detail = result
-                json_data = json.loads(tx_detail)
-                await self.process_transaction(json_data)
-            except RedisError as e:
-                logger.error(f"Failed to push transaction to Redis: {e}")
-                continue
+                tx_detail = await self.queue.get()
+                try:
+                    await self.process_transaction(tx_detail)
+                finally:
+                    self.queue.task_done()
             except asyncio.CancelledError:
                 logger.info("Worker task cancelled")
                 break
@@ -107,7 +178,12 @@ class TransactionWorker:
     async def start(self, num_workers: int = 2):
         """启动多个 worker 协程并行处理消息"""
         self.is_running = True
-        self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
+        if self.parse_pool is not None:
+            self.parse_pool.start()
+        if self.queue is None:
+            self.workers = [asyncio.create_task(self.consumer.start(num_workers))]
+        else:
+            self.workers = [asyncio.create_task(self.queue_worker()) for _ in range(num_workers)]
         try:
             await asyncio.gather(*self.workers)
         except asyncio.CancelledError:
@@ -127,3 +203,6 @@ class TransactionWorker:
         self.is_running = False
         for worker in self.workers:
             worker.cancel()
+        await self.consumer.stop()
+        if self.parse_pool is not None:
+            await self.parse_pool.stop()
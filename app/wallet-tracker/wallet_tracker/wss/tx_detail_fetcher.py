@@ -1,22 +1,26 @@
 import httpx
 import orjson as json
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solders.signature import Signature  # type: ignore
 
 
 class TxDetailRawFetcher:
-    def __init__(self, rpc_url: str = settings.rpc.rpc_url) -> None:
+    def __init__(
+        self, rpc_url: str = settings.rpc.rpc_url, commitment: Commitment | None = None
+    ) -> None:
         self.rpc_url = rpc_url
         self.client = AsyncClient(rpc_url)
+        self.commitment = commitment or settings.rpc.commitment
 
     async def fetch(self, signature: Signature) -> dict | None:
         logger.debug(f"Fetching transaction from {self.rpc_url}")
         resp = await self.client.get_transaction(
             signature,
             encoding="json",
-            commitment=settings.rpc.commitment,
+            commitment=self.commitment,
             max_supported_transaction_version=0,
         )
         data = json.loads(resp.to_json())
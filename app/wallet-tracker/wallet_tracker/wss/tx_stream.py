@@ -0,0 +1,318 @@
+"""
+通过 websocket 直接订阅完整交易
+
+支持 transactionSubscribe / blockSubscribe 的 RPC 会在通知中携带完整的交易详情，
+不需要再调用 getTransaction，省去一次 RPC 往返。
+RPC 不支持这些方法时，退回到 logsSubscribe + getTransaction 的方式。
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Callable, Sequence
+from typing import Literal, Protocol
+
+import orjson as json
+import websockets
+from aioredis import Redis
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+
+from wallet_tracker.pipeline import TxDetailPipeline
+
+StreamMethod = Literal["transactionSubscribe", "blockSubscribe"]
+
+# JSON-RPC: Method not found
+METHOD_NOT_FOUND = -32601
+
+
+class WalletMonitor(Protocol):
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
+
+    async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None: ...
+
+    async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None: ...
+
+
+class StreamNotSupported(Exception):
+    """RPC 不支持完整交易订阅"""
+
+
+def to_tx_detail(tx: dict, slot: int, block_time: int | None = None) -> dict | None:
+    """将通知中的交易转换为与 getTransaction 一致的结构，失败的交易返回 None"""
+    meta = tx.get("meta")
+    if meta is None or meta.get("err") is not None:
+        return None
+    return {
+        "slot": slot,
+        "version": tx.get("version", "legacy"),
+        # transactionSubscribe 的通知中没有 blockTime，使用当前时间
+        "blockTime": int(time.time()) if block_time is None else block_time,
+        "transaction": tx["transaction"],
+        "meta": meta,
+    }
+
+
+def tx_details_from_notification(method: str, result: dict) -> list[dict]:
+    """从 transactionNotification / blockNotification 中取出交易详情"""
+    if method == "transactionNotification":
+        tx_detail = to_tx_detail(result["transaction"], result["slot"])
+        return [] if tx_detail is None else [tx_detail]
+
+    if method == "blockNotification":
+        value = result["value"]
+        block = value.get("block")
+        if block is None:
+            return []
+        tx_details = (
+            to_tx_detail(tx, value["slot"], block.get("blockTime"))
+            for tx in block.get("transactions") or []
+        )
+        return [tx_detail for tx_detail in tx_details if tx_detail is not None]
+
+    return []
+
+
+class TransactionStreamSubscriber:
+    """完整交易订阅者
+
+    每个钱包一个订阅，通知中的交易详情直接交给 pipeline，不经过签名队列和 getTransaction。
+    同一笔交易可能涉及多个被跟踪的钱包而被推送多次，由下游的签名去重过滤。
+
+    RPC 返回 Method not found，或连续多次连接失败时，
+    改用 fallback 创建的监听器（logsSubscribe + getTransaction），之后的订阅变更都转发给它。
+    """
+
+    def __init__(
+        self,
+        rpc_endpoint: str,
+        redis_client: Redis,
+        wallets: Sequence[Pubkey],
+        pipeline: TxDetailPipeline | None = None,
+        method: StreamMethod = "transactionSubscribe",
+        fallback: Callable[[Sequence[Pubkey]], WalletMonitor] | None = None,
+        max_failures: int = 5,
+        base_delay: float = 1,
+        max_delay: float = 60,
+    ):
+        """
+        Args:
+            rpc_endpoint: Solana RPC 端点
+            redis_client: Redis 客户端
+            wallets: 初始订阅的钱包
+            pipeline: 交易详情分发
+            method: 订阅方法，transactionSubscribe 或 blockSubscribe
+            fallback: 以当前钱包创建备用监听器
+            max_failures: 连续连接失败多少次后改用备用监听器
+            base_delay: 重连退避的初始间隔（秒）
+            max_delay: 重连退避的最大间隔（秒）
+        """
+        self.websocket_url = rpc_endpoint.replace("https://", "wss://")
+        self.redis = redis_client
+        self.pipeline = pipeline or TxDetailPipeline(redis_client)
+        self.method = method
+        self.fallback = fallback
+        self.max_failures = max_failures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.wallets: set[str] = {str(wallet) for wallet in wallets}
+        self.websocket = None
+        self.is_running = False
+        self.fallback_monitor: WalletMonitor | None = None
+        self._task: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+        # 请求 id -> (方法, 钱包)
+        self._pending: dict[int, tuple[str, str]] = {}
+        # 钱包 <-> 订阅 id
+        self.subscription_ids: dict[str, int] = {}
+        self._wallet_of: dict[int, str] = {}
+
+    @property
+    def notification_method(self) -> str:
+        return self.method.replace("Subscribe", "Notification")
+
+    def build_subscribe_params(self, wallet: str) -> list:
+        if self.method == "blockSubscribe":
+            return [
+                {"mentionsAccountOrProgram": wallet},
+                {
+                    "commitment": settings.rpc.commitment,
+                    "encoding": "json",
+                    "transactionDetails": "full",
+                    "showRewards": False,
+                    "maxSupportedTransactionVersion": 0,
+                },
+            ]
+        return [
+            {"accountInclude": [wallet], "vote": False, "failed": False},
+            {
+                "commitment": settings.rpc.commitment,
+                "encoding": "json",
+                "transactionDetails": "full",
+                "maxSupportedTransactionVersion": 0,
+            },
+        ]
+
+    async def _send(self, method: str, params: list, wallet: str) -> None:
+        if self.websocket is None:
+            # 尚未连接，连接后会订阅全部钱包
+            return
+        request_id = next(self._ids)
+        self._pending[request_id] = (method, wallet)
+        await self.websocket.send(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        )
+
+    async def _subscribe(self, wallet: str) -> None:
+        await self._send(self.method, self.build_subscribe_params(wallet), wallet)
+
+    async def _unsubscribe(self, wallet: str) -> None:
+        subscription_id = self.subscription_ids.pop(wallet, None)
+        if subscription_id is None:
+            return
+        self._wallet_of.pop(subscription_id, None)
+        unsubscribe_method = self.method.replace("Subscribe", "Unsubscribe")
+        await self._send(unsubscribe_method, [subscription_id], wallet)
+
+    async def handle_message(self, message: dict) -> None:
+        """处理单条 websocket 消息"""
+        if "id" in message:
+            method, wallet = self._pending.pop(message["id"], (None, None))
+            if method != self.method:
+                return
+            if "error" in message:
+                error = message["error"]
+                if error.get("code") == METHOD_NOT_FOUND:
+                    raise StreamNotSupported(f"{self.method} is not supported: {error}")
+                logger.error(f"Failed to subscribe {wallet} with {self.method}: {error}")
+                return
+            if wallet not in self.wallets:
+                # 订阅响应返回前已经取消订阅
+                await self._send(
+                    self.method.replace("Subscribe", "Unsubscribe"), [message["result"]], wallet
+                )
+                return
+            self.subscription_ids[wallet] = message["result"]
+            self._wallet_of[message["result"]] = wallet
+            logger.info(f"Subscribed to {wallet} with subscription ID: {message['result']}")
+            return
+
+        if message.get("method") != self.notification_method:
+            return
+        params = message["params"]
+        if params["subscription"] not in self._wallet_of:
+            return
+        for tx_detail in tx_details_from_notification(message["method"], params["result"]):
+            signature = tx_detail["transaction"]["signatures"][0]
+            await self.pipeline.push(tx_detail)
+            logger.info(f"Added transaction '{signature}' to queue")
+
+    async def _run(self) -> None:
+        failures = 0
+        while self.is_running:
+            received = False
+            try:
+                async with websockets.connect(
+                    self.websocket_url,
+                    ping_interval=20,
+                    ping_timeout=30,
+                    close_timeout=20,
+                    # blockNotification 可能很大
+                    max_size=None,
+                ) as websocket:
+                    self.websocket = websocket
+                    logger.info(f"Connected to {self.websocket_url} with {self.method}")
+                    for wallet in list(self.wallets):
+                        await self._subscribe(wallet)
+                    async for raw in websocket:
+                        if not received:
+                            received = True
+                            failures = 0
+                        await self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                break
+            except StreamNotSupported as e:
+                logger.warning(f"{e}, falling back to logsSubscribe")
+                await self._start_fallback()
+                break
+            except Exception as e:
+                logger.error(f"Transaction stream error: {e}")
+                logger.exception(e)
+            finally:
+                self.websocket = None
+                self._pending.clear()
+                self.subscription_ids.clear()
+                self._wallet_of.clear()
+
+            if not self.is_running:
+                break
+            if not received:
+                failures += 1
+                if failures >= self.max_failures:
+                    logger.warning(
+                        f"Transaction stream failed {failures} times, falling back to logsSubscribe"
+                    )
+                    await self._start_fallback()
+                    break
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**failures))
+            logger.info(f"Reconnecting transaction stream in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def _start_fallback(self) -> None:
+        if self.fallback is None:
+            logger.error("No fallback monitor configured, transaction stream stopped")
+            return
+        self.fallback_monitor = self.fallback([Pubkey.from_string(w) for w in self.wallets])
+        await self.fallback_monitor.start()
+
+    async def start(self) -> None:
+        """启动订阅"""
+        self.is_running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止订阅"""
+        self.is_running = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.websocket is not None:
+            await self.websocket.close()
+        if self.fallback_monitor is not None:
+            await self.fallback_monitor.stop()
+
+    async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """订阅钱包的交易信息。
+
+        Args:
+            wallet (Pubkey): 要订阅的钱包地址
+        """
+        if self.fallback_monitor is not None:
+            await self.fallback_monitor.subscribe_wallet_transactions(wallet)
+            return
+        if str(wallet) in self.wallets:
+            logger.warning(f"Wallet {wallet} already subscribed")
+            return
+        self.wallets.add(str(wallet))
+        await self._subscribe(str(wallet))
+
+    async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
+        """取消订阅钱包的交易信息。
+
+        Args:
+            wallet (Pubkey): 要取消订阅的钱包地址
+        """
+        if self.fallback_monitor is not None:
+            await self.fallback_monitor.unsubscribe_wallet_transactions(wallet)
+            return
+        if str(wallet) not in self.wallets:
+            logger.warning(f"Wallet {wallet} not subscribed")
+            return
+        self.wallets.discard(str(wallet))
+        await self._unsubscribe(str(wallet))
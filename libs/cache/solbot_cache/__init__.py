@@ -1,14 +1,24 @@
 from .account_amount import AccountAmountCache
-from .blockhash import get_latest_blockhash
+from .blockhash import BlockhashRefresher, get_latest_blockhash
+from .bonding_curve import BondingCurveCache
 from .cached import cached
+from .keypair import KeypairCache
 from .min_balance_rent import get_min_balance_rent
 from .mint_account import MintAccountCache
+from .token_accounts import OwnerTokenAccountIndex, TokenAccountIndexCache
 from .token_info import TokenInfoCache
+from .vault_balance import VaultBalanceCache
 
 __all__ = [
     "AccountAmountCache",
+    "BlockhashRefresher",
+    "BondingCurveCache",
+    "KeypairCache",
     "MintAccountCache",
+    "OwnerTokenAccountIndex",
+    "TokenAccountIndexCache",
     "TokenInfoCache",
+    "VaultBalanceCache",
     "cached",
     "get_latest_blockhash",
     "get_min_balance_rent",
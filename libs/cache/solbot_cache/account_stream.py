@@ -0,0 +1,280 @@
+"""
+基于 accountSubscribe 的账户缓存
+
+首次读取账户时通过 RPC 批量获取，并使用 websocket accountSubscribe 订阅该账户，
+之后的读取直接使用推送的最新数据，不再请求 RPC。
+缓存超出容量时淘汰最久未使用的账户，并取消其订阅。
+"""
+
+import asyncio
+import base64
+import itertools
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+import orjson as json
+import websockets
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Processed
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solbot_common.utils.utils import get_async_client
+from solders.pubkey import Pubkey  # type: ignore
+
+T = TypeVar("T")
+
+
+@dataclass
+class AccountEntry(Generic[T]):
+    value: T
+    # 账户数据对应的 slot
+    slot: int
+    updated_at: float
+
+
+class AccountSubscriptionCache(ABC, Generic[T]):
+    """按账户地址缓存解码后的账户数据，并通过 accountSubscribe 保持最新
+
+    - 订阅中的账户总是使用推送的最新数据
+    - 未订阅成功（如 websocket 断开）的账户，超过 max_age 秒后重新从 RPC 获取
+    - 只接受 slot 不小于当前缓存的更新
+    - 同一账户的并发冷启动只请求一次
+    - 获取和订阅都使用 processed，用于报价的数据不等待确认
+
+    子类实现 decode，将账户数据解码为缓存的值。
+    """
+
+    _instance = None
+    name = "account"
+    commitment: Commitment = Processed
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        max_size: int = 1024,
+        max_age: float = 2,
+        base_delay: float = 1,
+        max_delay: float = 30,
+    ) -> None:
+        """
+        Args:
+            client: RPC 客户端，冷启动时使用
+            max_size: 最多缓存和订阅的账户数量
+            max_age: 未订阅的缓存项的有效期（秒）
+            base_delay: 重连退避的初始间隔（秒）
+            max_delay: 重连退避的最大间隔（秒）
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.websocket_url = settings.rpc.rpc_url.replace("https://", "wss://")
+        self.max_size = max_size
+        self.max_age = max_age
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.entries: OrderedDict[str, AccountEntry[T]] = OrderedDict()
+        self.websocket = None
+        self._task: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+        # 请求 id -> (方法, 账户)
+        self._pending: dict[int, tuple[str, str]] = {}
+        # 账户 <-> 订阅 id
+        self.subscription_ids: dict[str, int] = {}
+        self._account_of: dict[int, str] = {}
+        self._fetching: dict[str, asyncio.Future] = {}
+
+    @abstractmethod
+    def decode(self, data: bytes) -> T:
+        """将账户数据解码为缓存的值
+
+        Args:
+            data (bytes): 账户数据
+
+        Returns:
+            T: 缓存的值
+        """
+        pass
+
+    def is_fresh(self, account: str) -> bool:
+        entry = self.entries.get(account)
+        if entry is None:
+            return False
+        if account in self.subscription_ids:
+            return True
+        return time.monotonic() - entry.updated_at <= self.max_age
+
+    async def get_account(self, account: Pubkey) -> AccountEntry[T] | None:
+        """获取单个账户，找不到账户时返回 None"""
+        return (await self.get_accounts([account]))[0]
+
+    async def get_accounts(self, accounts: Sequence[Pubkey]) -> list[AccountEntry[T] | None]:
+        """批量获取账户，只有缓存未命中或过期的账户才请求 RPC，且合并为一次请求"""
+        keys = [str(account) for account in accounts]
+        missing = [
+            account
+            for account, key in zip(accounts, keys, strict=True)
+            if not self.is_fresh(key) and key not in self._fetching
+        ]
+        if missing:
+            future = asyncio.ensure_future(self._fetch(missing))
+            for account in missing:
+                key = str(account)
+                self._fetching[key] = future
+                future.add_done_callback(lambda _, key=key: self._fetching.pop(key, None))
+        futures = {id(f): f for f in (self._fetching.get(key) for key in keys) if f is not None}
+        if futures:
+            await asyncio.gather(*(asyncio.shield(f) for f in futures.values()))
+
+        entries = []
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                await self.watch(key)
+            entries.append(entry)
+        return entries
+
+    async def _fetch(self, accounts: Sequence[Pubkey]) -> None:
+        resp = await self.client.get_multiple_accounts(list(accounts), commitment=self.commitment)
+        for account, value in zip(accounts, resp.value, strict=True):
+            if value is None:
+                continue
+            self._store(str(account), resp.context.slot, bytes(value.data))
+        await self._shrink()
+
+    def _store(self, account: str, slot: int, data: bytes) -> bool:
+        entry = self.entries.get(account)
+        if entry is not None and slot < entry.slot:
+            return False
+        self.entries[account] = AccountEntry(
+            value=self.decode(data), slot=slot, updated_at=time.monotonic()
+        )
+        return True
+
+    def update(self, account: str, slot: int, data: bytes) -> bool:
+        """使用推送的账户数据更新缓存，忽略未缓存的账户和比当前缓存旧的数据"""
+        if account not in self.entries:
+            return False
+        return self._store(account, slot, data)
+
+    async def watch(self, account: str | Pubkey) -> None:
+        """订阅账户变化"""
+        key = str(account)
+        if key in self.subscription_ids or key not in self.entries:
+            return
+        if any(pending == key for _, pending in self._pending.values()):
+            return
+        if self._task is None:
+            # 连接后会订阅全部账户
+            self._task = asyncio.create_task(self._run())
+            return
+        await self._subscribe(key)
+
+    async def evict_account(self, account: str | Pubkey) -> None:
+        """移除缓存并取消订阅"""
+        key = str(account)
+        self.entries.pop(key, None)
+        subscription_id = self.subscription_ids.pop(key, None)
+        if subscription_id is None:
+            return
+        self._account_of.pop(subscription_id, None)
+        await self._send("accountUnsubscribe", [subscription_id], key)
+
+    async def _shrink(self) -> None:
+        while len(self.entries) > self.max_size:
+            await self.evict_account(next(iter(self.entries)))
+
+    async def _send(self, method: str, params: list, account: str) -> None:
+        if self.websocket is None:
+            # 尚未连接，连接后会订阅全部账户
+            return
+        request_id = next(self._ids)
+        self._pending[request_id] = (method, account)
+        await self.websocket.send(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        )
+
+    async def _subscribe(self, account: str) -> None:
+        await self._send(
+            "accountSubscribe",
+            [account, {"encoding": "base64", "commitment": self.commitment}],
+            account,
+        )
+
+    async def handle_message(self, message: dict) -> None:
+        """处理单条 websocket 消息"""
+        if "id" in message:
+            method, account = self._pending.pop(message["id"], (None, None))
+            if method != "accountSubscribe":
+                return
+            if "error" in message:
+                logger.error(f"Failed to subscribe {self.name} {account}: {message['error']}")
+                return
+            if account not in self.entries:
+                # 订阅响应返回前已经被淘汰
+                await self._send("accountUnsubscribe", [message["result"]], account)
+                return
+            self.subscription_ids[account] = message["result"]
+            self._account_of[message["result"]] = account
+            return
+
+        if message.get("method") != "accountNotification":
+            return
+        params = message["params"]
+        account = self._account_of.get(params["subscription"])
+        if account is None:
+            return
+        result = params["result"]
+        data = base64.b64decode(result["value"]["data"][0])
+        self.update(account, result["context"]["slot"], data)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                async with websockets.connect(
+                    self.websocket_url,
+                    ping_interval=20,
+                    ping_timeout=30,
+                    close_timeout=20,
+                ) as websocket:
+                    self.websocket = websocket
+                    failures = 0
+                    logger.info(f"Connected to {self.websocket_url} for {self.name} updates")
+                    for account in list(self.entries):
+                        await self._subscribe(account)
+                    async for raw in websocket:
+                        await self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"{self.name} subscription error: {e}")
+            finally:
+                # 断开期间缓存项按 max_age 过期
+                self.websocket = None
+                self._pending.clear()
+                self.subscription_ids.clear()
+                self._account_of.clear()
+
+            failures += 1
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**failures))
+            logger.info(f"Reconnecting {self.name} subscription in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
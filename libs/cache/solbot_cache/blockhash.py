@@ -1,4 +1,9 @@
+import asyncio
+import time
+from collections import OrderedDict
+
 import orjson as json
+from solbot_common.log import logger
 from solbot_common.utils.utils import get_async_client
 from solbot_db.redis import RedisClient
 from solders.hash import Hash  # type: ignore
@@ -19,3 +24,85 @@ async def get_latest_blockhash() -> tuple[Hash, int]:
         return await get_latest_blockhash_from_rpc()
     cached_value = json.loads(raw_cached_value)
     return Hash.from_string(cached_value["blockhash"]), int(cached_value["last_valid_block_height"])
+
+
+class BlockhashRefresher:
+    """在本地持续刷新最新的 blockhash
+
+    构建交易时直接读取本地的值，不再每次访问 Redis。
+    刷新任务未启动或本地值过期时，退回到 get_latest_blockhash。
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, interval: float = 0.4, max_age: float = 5) -> None:
+        """
+        Args:
+            interval: 刷新间隔（秒）
+            max_age: 本地值的有效期（秒），超过后不再使用
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.interval = interval
+        self.max_age = max_age
+        self.value: tuple[Hash, int] | None = None
+        self.updated_at = 0.0
+        self._task: asyncio.Task | None = None
+        # 最近使用过的 blockhash -> last valid block height，用于判断交易是否已过期
+        self._heights: OrderedDict[str, int] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return "BlockhashRefresher()"
+
+    def latest(self) -> tuple[Hash, int] | None:
+        """本地最新的 blockhash，不存在或已过期时返回 None"""
+        if self.value is None or time.monotonic() - self.updated_at > self.max_age:
+            return None
+        return self.value
+
+    def last_valid_block_height(self, blockhash: Hash) -> int | None:
+        """最近刷新过的 blockhash 的 last valid block height，未知时返回 None"""
+        return self._heights.get(str(blockhash))
+
+    async def refresh(self) -> tuple[Hash, int]:
+        self.value = await get_latest_blockhash()
+        self.updated_at = time.monotonic()
+        blockhash, last_valid_block_height = self.value
+        self._heights[str(blockhash)] = last_valid_block_height
+        self._heights.move_to_end(str(blockhash))
+        while len(self._heights) > 512:
+            self._heights.popitem(last=False)
+        return self.value
+
+    async def get(self) -> tuple[Hash, int]:
+        """获取最新的 blockhash 和 last valid block height"""
+        value = self.latest()
+        if value is not None:
+            return value
+        return await self.refresh()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to refresh blockhash: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
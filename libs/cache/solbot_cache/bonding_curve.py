@@ -0,0 +1,64 @@
+"""
+Pump.fun bonding curve 账户缓存
+
+首次读取某个 mint 时通过 RPC 获取 bonding curve 账户，并使用 websocket accountSubscribe
+订阅该账户，之后的读取直接使用推送的最新数据，不再请求 RPC。
+仓位清空后调用 evict 取消订阅，缓存超出容量时淘汰最久未使用的 mint。
+"""
+
+import struct
+from dataclasses import dataclass
+
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.utils.utils import get_associated_bonding_curve, get_bonding_curve_pda
+from solders.pubkey import Pubkey  # type: ignore
+
+from .account_stream import AccountSubscriptionCache
+
+BONDING_CURVE_ACCOUNT_SIZE = struct.calcsize("<QQQQQQ?")
+
+
+@dataclass
+class BondingCurveEntry:
+    bonding_curve: Pubkey
+    associated_bonding_curve: Pubkey
+    account: BondingCurveAccount
+    # 账户数据对应的 slot
+    slot: int
+
+
+class BondingCurveCache(AccountSubscriptionCache[BondingCurveAccount]):
+    """Pump.fun bonding curve 账户缓存，按 mint 读取"""
+
+    _instance = None
+    name = "bonding curve"
+
+    def __repr__(self) -> str:
+        return "BondingCurveCache()"
+
+    def decode(self, data: bytes) -> BondingCurveAccount:
+        return BondingCurveAccount.from_buffer(data[:BONDING_CURVE_ACCOUNT_SIZE])
+
+    async def get(self, mint: str | Pubkey) -> BondingCurveEntry | None:
+        """获取 mint 的 bonding curve 账户，只有缓存未命中或过期时才请求 RPC
+
+        Returns:
+            BondingCurveEntry | None: 找不到 bonding curve 账户时返回 None
+        """
+        mint = Pubkey.from_string(mint) if isinstance(mint, str) else mint
+        bonding_curve = get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+        entry = await self.get_account(bonding_curve)
+        if entry is None:
+            return None
+        return BondingCurveEntry(
+            bonding_curve=bonding_curve,
+            associated_bonding_curve=get_associated_bonding_curve(bonding_curve, mint),
+            account=entry.value,
+            slot=entry.slot,
+        )
+
+    async def evict(self, mint: str | Pubkey) -> None:
+        """移除 mint 的缓存并取消订阅，在仓位清空后调用"""
+        mint = Pubkey.from_string(mint) if isinstance(mint, str) else mint
+        await self.evict_account(get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM))
@@ -0,0 +1,155 @@
+"""
+交易钱包私钥缓存
+
+每笔交易都需要签名用的 Keypair，直接查询 MySQL 会在热路径上增加一次数据库往返。
+这里将私钥按 pubkey 缓存在内存中：
+
+- 私钥使用进程内随机生成的 AES-GCM 密钥加密后保存，只在取用时解密
+- 启动时预热所有启用中的跟单所使用的钱包
+- tg-bot 修改钱包后通过 wallet_events 频道通知失效
+- 按 LRU 限制数量，淘汰和失效时将密文原地清零
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from solbot_common.cp.wallet_events import WalletEvent
+from solbot_common.log import logger
+from solbot_common.models.tg_bot.copytrade import CopyTrade
+from solbot_common.models.tg_bot.user import User
+from solbot_db.session import NEW_ASYNC_SESSION, provide_session
+from solders.keypair import Keypair  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+NONCE_SIZE = 12
+
+
+def _zeroize(buf: bytearray) -> None:
+    buf[:] = bytes(len(buf))
+
+
+class KeypairCache:
+    """按 pubkey 缓存钱包私钥"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """
+        Args:
+            max_size: 最多缓存的钱包数量
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.max_size = max_size
+        # 密钥只存在于当前进程，不落盘
+        self._cipher = AESGCM(AESGCM.generate_key(bit_length=128))
+        # pubkey -> nonce + 密文
+        self._entries: OrderedDict[str, bytearray] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+        # 钱包失效的次数，用于丢弃失效前发起的数据库查询结果
+        self._versions: dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return "KeypairCache()"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pubkey: str) -> bool:
+        return pubkey in self._entries
+
+    def put(self, pubkey: str, private_key: bytes) -> None:
+        """加密保存私钥，超出容量时淘汰最久未使用的钱包"""
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = bytearray(nonce + self._cipher.encrypt(nonce, private_key, pubkey.encode()))
+        self.evict(pubkey)
+        self._entries[pubkey] = sealed
+        while len(self._entries) > self.max_size:
+            self.evict(next(iter(self._entries)))
+
+    def evict(self, pubkey: str) -> None:
+        """移除钱包并清零密文"""
+        sealed = self._entries.pop(pubkey, None)
+        if sealed is not None:
+            _zeroize(sealed)
+
+    def clear(self) -> None:
+        for pubkey in list(self._entries):
+            self.evict(pubkey)
+
+    def _open(self, pubkey: str) -> Keypair | None:
+        sealed = self._entries.get(pubkey)
+        if sealed is None:
+            return None
+        self._entries.move_to_end(pubkey)
+        nonce, ciphertext = bytes(sealed[:NONCE_SIZE]), bytes(sealed[NONCE_SIZE:])
+        return Keypair.from_bytes(self._cipher.decrypt(nonce, ciphertext, pubkey.encode()))
+
+    async def get(self, pubkey: str) -> Keypair:
+        """获取钱包的 Keypair，缓存未命中时查询数据库，同一钱包的并发查询只请求一次
+
+        Raises:
+            ValueError: 如果钱包不存在
+        """
+        keypair = self._open(pubkey)
+        if keypair is not None:
+            return keypair
+
+        version = self._versions.get(pubkey, 0)
+        future = self._loading.get(pubkey)
+        if future is None:
+            future = asyncio.ensure_future(self._load(pubkey))
+            self._loading[pubkey] = future
+            future.add_done_callback(
+                lambda f: self._loading.pop(pubkey) if self._loading.get(pubkey) is f else None
+            )
+        private_key = await asyncio.shield(future)
+        if not private_key:
+            raise ValueError("Wallet not found")
+        if pubkey not in self._entries and self._versions.get(pubkey, 0) == version:
+            self.put(pubkey, private_key)
+        return Keypair.from_bytes(private_key)
+
+    @provide_session
+    async def _load(
+        self, pubkey: str, *, session: AsyncSession = NEW_ASYNC_SESSION
+    ) -> bytes | None:
+        stmt = select(User.private_key).where(User.pubkey == pubkey).limit(1)
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    @provide_session
+    async def warm(self, *, session: AsyncSession = NEW_ASYNC_SESSION) -> int:
+        """预热所有启用中的跟单使用的钱包
+
+        Returns:
+            int: 预热的钱包数量
+        """
+        versions = dict(self._versions)
+        owners = select(CopyTrade.owner).where(CopyTrade.active == True)
+        stmt = select(User.pubkey, User.private_key).where(User.pubkey.in_(owners))  # type: ignore
+        rows = (await session.execute(stmt)).all()
+        count = 0
+        for pubkey, private_key in rows[: self.max_size]:
+            # 与 get 相同，丢弃查询期间已失效的钱包，下次使用时重新读取
+            if not private_key or self._versions.get(pubkey, 0) != versions.get(pubkey, 0):
+                continue
+            self.put(pubkey, private_key)
+            count += 1
+        logger.info(f"Warmed keypair cache with {count} wallets")
+        return count
+
+    async def handle_wallet_event(self, event: WalletEvent) -> None:
+        """钱包变化后使缓存失效，下次使用时重新从数据库读取"""
+        self._versions[event.pubkey] = self._versions.get(event.pubkey, 0) + 1
+        self._loading.pop(event.pubkey, None)
+        self.evict(event.pubkey)
+        logger.info(f"Invalidated cached keypair of {event.pubkey} ({event.event_type.value})")
@@ -1,8 +1,8 @@
-from solbot_common.constants import PUMP_FUN_PROGRAM
-from solbot_common.utils.utils import get_async_client, get_bonding_curve_account
 from solbot_common.log import logger
 from solders.pubkey import Pubkey  # type: ignore
 
+from .bonding_curve import BondingCurveCache
+
 # from .cached import cached
 
 
@@ -15,7 +15,7 @@ class LaunchCache:
         return cls._instance
 
     def __init__(self) -> None:
-        self.client = get_async_client()
+        self.bonding_curve_cache = BondingCurveCache()
 
     def __repr__(self) -> str:
         return "LaunchCache()"
@@ -36,13 +36,8 @@ class LaunchCache:
         Raises:
             BondingCurveNotFound: 如果找不到对应的 bonding curve 账户
         """
-        result = await get_bonding_curve_account(
-            self.client,
-            Pubkey.from_string(mint) if isinstance(mint, str) else mint,
-            PUMP_FUN_PROGRAM,
-        )
-        if result is None:
+        entry = await self.bonding_curve_cache.get(mint)
+        if entry is None:
             logger.info("Get bonding curve account failed, default as launched.")
             return True
-        _, _, bonding_curve_account = result
-        return bonding_curve_account.virtual_sol_reserves == 0
+        return entry.account.virtual_sol_reserves == 0
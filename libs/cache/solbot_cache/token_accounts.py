@@ -0,0 +1,458 @@
+"""
+交易钱包的代币账户索引
+
+构建交易时需要知道钱包是否已经有某个代币的账户，以决定是否添加创建 ATA 的指令。
+逐笔交易查询 getAccountInfo / getTokenAccountsByOwner 会在热路径上增加一次 RPC 往返，
+这里为每个交易钱包维护一份内存中的代币账户索引：
+
+- 首次使用时通过 getTokenAccountsByOwner 分别加载 Token 和 Token-2022 程序下的全部代币账户
+- 通过 programSubscribe（按 owner 过滤）接收代币账户的创建和余额变化
+- 自己的交易确认后，用交易的 postTokenBalances 立即更新，不等待推送
+- 只接受 slot 不小于当前记录的更新；未订阅成功的钱包超过 max_age 秒后重新加载
+
+关闭的账户归属系统程序，不再匹配 programSubscribe 的过滤条件，节点不会推送关闭，
+在其他地方关闭的账户会一直留在索引中。因此：
+- 订阅中的钱包每 reload_interval 秒在后台重新加载一次
+- 买入时总是使用幂等的创建 ATA 指令，不依赖索引判断 ATA 是否存在
+"""
+
+import asyncio
+import base64
+import itertools
+import random
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import orjson as json
+import websockets
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Processed
+from solana.rpc.types import TokenAccountOpts
+from solbot_common.config import settings
+from solbot_common.constants import TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID
+from solbot_common.log import logger
+from solbot_common.utils.utils import get_async_client
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
+
+TOKEN_PROGRAMS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+TOKEN_ACCOUNT_SIZE = 165
+# Token-2022 带扩展的账户在基础布局之后有一个账户类型字节，2 表示代币账户
+ACCOUNT_TYPE_ACCOUNT = 2
+TOKEN_ACCOUNT_AMOUNT = struct.Struct("<Q")
+
+
+def decode_token_account(data: bytes) -> tuple[Pubkey, Pubkey, int] | None:
+    """解码代币账户的 (mint, owner, amount)，不是代币账户时返回 None"""
+    if len(data) < TOKEN_ACCOUNT_SIZE:
+        return None
+    if len(data) > TOKEN_ACCOUNT_SIZE and data[TOKEN_ACCOUNT_SIZE] != ACCOUNT_TYPE_ACCOUNT:
+        return None
+    mint = Pubkey.from_bytes(data[:32])
+    owner = Pubkey.from_bytes(data[32:64])
+    return mint, owner, TOKEN_ACCOUNT_AMOUNT.unpack_from(data, 64)[0]
+
+
+def transaction_account_keys(tx_detail: dict) -> list[str]:
+    """交易的全部账户，包括通过地址查找表加载的账户，顺序与 accountIndex 一致"""
+    keys = [
+        key if isinstance(key, str) else key["pubkey"]
+        for key in tx_detail["transaction"]["message"]["accountKeys"]
+    ]
+    loaded = tx_detail["meta"].get("loadedAddresses") or {}
+    return keys + loaded.get("writable", []) + loaded.get("readonly", [])
+
+
+@dataclass
+class TokenAccount:
+    mint: Pubkey
+    program: Pubkey
+    amount: int
+    # 数据对应的 slot
+    slot: int
+
+
+@dataclass
+class OwnerTokenAccountIndex:
+    """单个钱包的代币账户索引"""
+
+    owner: Pubkey
+    # 代币账户 -> 账户信息
+    accounts: dict[Pubkey, TokenAccount] = field(default_factory=dict)
+    # mint -> 代币账户
+    by_mint: dict[Pubkey, set[Pubkey]] = field(default_factory=dict)
+    # 已关闭的代币账户 -> 关闭时的 slot，用于丢弃关闭前的旧数据
+    closed: dict[Pubkey, int] = field(default_factory=dict)
+    loaded_at: float = 0
+
+    def __contains__(self, account: Pubkey) -> bool:
+        return account in self.accounts
+
+    def update(
+        self, account: Pubkey, mint: Pubkey, program: Pubkey, amount: int, slot: int
+    ) -> bool:
+        """记录代币账户，忽略比当前记录旧的数据"""
+        current = self.accounts.get(account)
+        if current is not None and slot < current.slot:
+            return False
+        if slot < self.closed.get(account, -1):
+            return False
+        self.closed.pop(account, None)
+        self.accounts[account] = TokenAccount(mint, program, amount, slot)
+        self.by_mint.setdefault(mint, set()).add(account)
+        return True
+
+    def remove(self, account: Pubkey, slot: int) -> bool:
+        """记录代币账户已关闭，忽略比当前记录旧的数据"""
+        current = self.accounts.get(account)
+        if current is not None:
+            if slot < current.slot:
+                return False
+            del self.accounts[account]
+            accounts = self.by_mint.get(current.mint)
+            if accounts is not None:
+                accounts.discard(account)
+                if not accounts:
+                    del self.by_mint[current.mint]
+        self.closed[account] = max(slot, self.closed.get(account, -1))
+        return True
+
+    def has_ata(self, mint: Pubkey, token_program: Pubkey = TOKEN_PROGRAM_ID) -> bool:
+        """钱包是否已有 mint 的关联代币账户"""
+        return get_associated_token_address(self.owner, mint, token_program) in self.accounts
+
+    def token_account(self, mint: Pubkey) -> Pubkey | None:
+        """钱包持有 mint 的代币账户，优先返回关联代币账户"""
+        accounts = self.by_mint.get(mint)
+        if not accounts:
+            return None
+        for program in TOKEN_PROGRAMS:
+            ata = get_associated_token_address(self.owner, mint, program)
+            if ata in accounts:
+                return ata
+        return min(accounts, key=str)
+
+
+class TokenAccountIndexCache:
+    """按钱包缓存代币账户索引，并通过 programSubscribe 保持最新"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        max_size: int = 1024,
+        max_age: float = 30,
+        reload_interval: float = 300,
+        base_delay: float = 1,
+        max_delay: float = 30,
+    ) -> None:
+        """
+        Args:
+            client: RPC 客户端，加载钱包时使用
+            max_size: 最多缓存和订阅的钱包数量
+            max_age: 未订阅的钱包索引的有效期（秒）
+            reload_interval: 订阅中的钱包重新加载的间隔（秒），用于移除在其他地方关闭的账户
+            base_delay: 重连退避的初始间隔（秒）
+            max_delay: 重连退避的最大间隔（秒）
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.websocket_url = settings.rpc.rpc_url.replace("https://", "wss://")
+        self.max_size = max_size
+        self.max_age = max_age
+        self.reload_interval = reload_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.indexes: OrderedDict[Pubkey, OwnerTokenAccountIndex] = OrderedDict()
+        self.websocket = None
+        self._task: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+        # 请求 id -> (方法, (钱包, 代币程序))
+        self._pending: dict[int, tuple[str, tuple[Pubkey, Pubkey]]] = {}
+        # (钱包, 代币程序) <-> 订阅 id
+        self.subscription_ids: dict[tuple[Pubkey, Pubkey], int] = {}
+        self._subscription_of: dict[int, tuple[Pubkey, Pubkey]] = {}
+        self._loading: dict[Pubkey, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+        self.loads = 0
+
+    def __repr__(self) -> str:
+        return "TokenAccountIndexCache()"
+
+    def is_subscribed(self, owner: Pubkey) -> bool:
+        return all((owner, program) in self.subscription_ids for program in TOKEN_PROGRAMS)
+
+    def is_fresh(self, owner: Pubkey) -> bool:
+        index = self.indexes.get(owner)
+        if index is None:
+            return False
+        max_age = self.reload_interval if self.is_subscribed(owner) else self.max_age
+        return time.monotonic() - index.loaded_at <= max_age
+
+    async def get(self, owner: Pubkey | str) -> OwnerTokenAccountIndex:
+        """获取钱包的代币账户索引，只有首次使用或过期时才请求 RPC，同一钱包的并发加载只请求一次
+
+        订阅中的钱包到期后在后台重新加载，本次使用当前的索引
+
+        Raises:
+            Exception: 首次加载失败时抛出，重新加载失败时继续使用过期的索引
+        """
+        owner = Pubkey.from_string(owner) if isinstance(owner, str) else owner
+        if not self.is_fresh(owner):
+            future = self._loading.get(owner)
+            if future is None:
+                future = asyncio.ensure_future(self._load(owner))
+                self._loading[owner] = future
+                future.add_done_callback(lambda f: self._loaded(owner, f))
+            if owner not in self.indexes or not self.is_subscribed(owner):
+                try:
+                    await asyncio.shield(future)
+                except Exception:
+                    if owner not in self.indexes:
+                        raise
+        self.indexes.move_to_end(owner)
+        await self.watch(owner)
+        return self.indexes[owner]
+
+    async def has_ata(
+        self, owner: Pubkey, mint: Pubkey, token_program: Pubkey = TOKEN_PROGRAM_ID
+    ) -> bool:
+        """钱包是否已有 mint 的关联代币账户"""
+        return (await self.get(owner)).has_ata(mint, token_program)
+
+    async def get_token_account(self, owner: Pubkey, mint: Pubkey) -> Pubkey | None:
+        """钱包持有 mint 的代币账户，优先返回关联代币账户"""
+        return (await self.get(owner)).token_account(mint)
+
+    def _loaded(self, owner: Pubkey, future: asyncio.Future) -> None:
+        self._loading.pop(owner, None)
+        if future.cancelled() or future.exception() is None:
+            return
+        if owner in self.indexes:
+            logger.warning(f"Failed to reload token accounts of {owner}: {future.exception()!r}")
+
+    async def _load(self, owner: Pubkey) -> None:
+        responses = await asyncio.gather(
+            *(
+                self.client.get_token_accounts_by_owner(
+                    owner, TokenAccountOpts(program_id=program), Processed
+                )
+                for program in TOKEN_PROGRAMS
+            )
+        )
+        self.loads += 1
+        current = self.indexes.get(owner)
+        index = OwnerTokenAccountIndex(owner, loaded_at=time.monotonic())
+        loaded: set[Pubkey] = set()
+        for program, resp in zip(TOKEN_PROGRAMS, responses, strict=True):
+            slot = resp.context.slot
+            for keyed_account in resp.value:
+                decoded = decode_token_account(bytes(keyed_account.account.data))
+                if decoded is None:
+                    continue
+                mint, _, amount = decoded
+                index.update(keyed_account.pubkey, mint, program, amount, slot)
+                loaded.add(keyed_account.pubkey)
+        if current is not None:
+            # 保留加载期间推送的、比加载结果新的数据
+            slot = min(resp.context.slot for resp in responses)
+            for account, token_account in current.accounts.items():
+                if account not in loaded and token_account.slot > slot:
+                    index.update(
+                        account,
+                        token_account.mint,
+                        token_account.program,
+                        token_account.amount,
+                        token_account.slot,
+                    )
+            for account, closed_slot in current.closed.items():
+                if closed_slot > slot:
+                    index.remove(account, closed_slot)
+        self.indexes[owner] = index
+        logger.info(f"Loaded {len(index.accounts)} token accounts of {owner}")
+        await self._shrink()
+
+    def apply_transaction(self, owner: Pubkey | str, tx_detail: dict) -> None:
+        """用自己已确认交易的代币余额更新索引，交易后不存在的代币账户视为已关闭
+
+        Args:
+            owner: 发起交易的钱包
+            tx_detail: getTransaction 的返回结果（json 编码）
+        """
+        owner = Pubkey.from_string(owner) if isinstance(owner, str) else owner
+        index = self.indexes.get(owner)
+        if index is None:
+            return
+        meta = tx_detail["meta"]
+        if meta.get("err") is not None:
+            return
+        slot = tx_detail["slot"]
+        keys = transaction_account_keys(tx_detail)
+        owner_str = str(owner)
+
+        def owned(token_balances: list[dict]) -> dict[Pubkey, dict]:
+            return {
+                Pubkey.from_string(keys[balance["accountIndex"]]): balance
+                for balance in token_balances
+                if balance.get("owner") == owner_str
+            }
+
+        pre = owned(meta.get("preTokenBalances") or [])
+        post = owned(meta.get("postTokenBalances") or [])
+        for account, balance in post.items():
+            index.update(
+                account,
+                Pubkey.from_string(balance["mint"]),
+                Pubkey.from_string(balance.get("programId") or str(TOKEN_PROGRAM_ID)),
+                int(balance["uiTokenAmount"]["amount"]),
+                slot,
+            )
+        for account in pre.keys() - post.keys():
+            index.remove(account, slot)
+
+    def evict(self, owner: Pubkey | str) -> None:
+        """移除钱包的索引并取消订阅"""
+        owner = Pubkey.from_string(owner) if isinstance(owner, str) else owner
+        self.indexes.pop(owner, None)
+        for program in TOKEN_PROGRAMS:
+            subscription_id = self.subscription_ids.pop((owner, program), None)
+            if subscription_id is None:
+                continue
+            self._subscription_of.pop(subscription_id, None)
+            task = asyncio.ensure_future(
+                self._send("programUnsubscribe", [subscription_id], (owner, program))
+            )
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _shrink(self) -> None:
+        while len(self.indexes) > self.max_size:
+            self.evict(next(iter(self.indexes)))
+
+    async def watch(self, owner: Pubkey) -> None:
+        """订阅钱包的代币账户变化"""
+        if owner not in self.indexes:
+            return
+        if self._task is None:
+            # 连接后会订阅全部钱包
+            self._task = asyncio.create_task(self._run())
+            return
+        for program in TOKEN_PROGRAMS:
+            key = (owner, program)
+            if key in self.subscription_ids:
+                continue
+            if any(pending == key for _, pending in self._pending.values()):
+                continue
+            await self._subscribe(key)
+
+    async def _send(self, method: str, params: list, key: tuple[Pubkey, Pubkey]) -> None:
+        if self.websocket is None:
+            # 尚未连接，连接后会订阅全部钱包
+            return
+        request_id = next(self._ids)
+        self._pending[request_id] = (method, key)
+        await self.websocket.send(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        )
+
+    async def _subscribe(self, key: tuple[Pubkey, Pubkey]) -> None:
+        owner, program = key
+        filters: list[dict] = [{"memcmp": {"offset": 32, "bytes": str(owner)}}]
+        if program == TOKEN_PROGRAM_ID:
+            filters.append({"dataSize": TOKEN_ACCOUNT_SIZE})
+        await self._send(
+            "programSubscribe",
+            [
+                str(program),
+                {"encoding": "base64", "commitment": settings.rpc.commitment, "filters": filters},
+            ],
+            key,
+        )
+
+    async def handle_message(self, message: dict) -> None:
+        """处理单条 websocket 消息"""
+        if "id" in message:
+            method, key = self._pending.pop(message["id"], (None, None))
+            if method != "programSubscribe" or key is None:
+                return
+            if "error" in message:
+                logger.error(f"Failed to subscribe token accounts of {key[0]}: {message['error']}")
+                return
+            if key[0] not in self.indexes:
+                # 订阅响应返回前已经被淘汰
+                await self._send("programUnsubscribe", [message["result"]], key)
+                return
+            self.subscription_ids[key] = message["result"]
+            self._subscription_of[message["result"]] = key
+            return
+
+        if message.get("method") != "programNotification":
+            return
+        params = message["params"]
+        key = self._subscription_of.get(params["subscription"])
+        if key is None:
+            return
+        owner, program = key
+        index = self.indexes.get(owner)
+        if index is None:
+            return
+        result = params["result"]
+        slot = result["context"]["slot"]
+        account = Pubkey.from_string(result["value"]["pubkey"])
+        value = result["value"]["account"]
+        decoded = decode_token_account(base64.b64decode(value["data"][0]))
+        if decoded is None:
+            return
+        mint, _, amount = decoded
+        index.update(account, mint, program, amount, slot)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                async with websockets.connect(
+                    self.websocket_url,
+                    ping_interval=20,
+                    ping_timeout=30,
+                    close_timeout=20,
+                ) as websocket:
+                    self.websocket = websocket
+                    failures = 0
+                    logger.info(f"Connected to {self.websocket_url} for token account updates")
+                    for owner in list(self.indexes):
+                        for program in TOKEN_PROGRAMS:
+                            await self._subscribe((owner, program))
+                    async for raw in websocket:
+                        await self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"token account subscription error: {e}")
+            finally:
+                # 断开期间索引按 max_age 过期后重新加载
+                self.websocket = None
+                self._pending.clear()
+                self.subscription_ids.clear()
+                self._subscription_of.clear()
+
+            failures += 1
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** min(failures, 32)))
+            logger.info(f"Reconnecting token account subscription in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,40 @@
+"""
+AMM 池子金库余额缓存
+
+金库是普通的 SPL token 账户，余额位于账户数据偏移 64 处的 u64。
+首次读取时通过 RPC 批量获取，之后由 accountSubscribe 推送保持最新。
+"""
+
+import struct
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from .account_stream import AccountSubscriptionCache
+
+TOKEN_ACCOUNT_AMOUNT = struct.Struct("<Q")
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+
+
+class VaultBalanceCache(AccountSubscriptionCache[int]):
+    """池子金库的原始余额（最小单位）缓存"""
+
+    _instance = None
+    name = "vault balance"
+
+    def __repr__(self) -> str:
+        return "VaultBalanceCache()"
+
+    def decode(self, data: bytes) -> int:
+        return TOKEN_ACCOUNT_AMOUNT.unpack_from(data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+    async def get_balances(self, *vaults: Pubkey) -> tuple[int, ...]:
+        """获取多个金库的余额
+
+        Raises:
+            ValueError: 如果某个金库账户不存在
+        """
+        entries = await self.get_accounts(vaults)
+        for vault, entry in zip(vaults, entries, strict=True):
+            if entry is None:
+                raise ValueError(f"Vault account not found: {vault}")
+        return tuple(entry.value for entry in entries)  # type: ignore
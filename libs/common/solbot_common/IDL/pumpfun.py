@@ -1,22 +1,101 @@
 import pathlib
+import struct
 
 from anchorpy.program.core import Program
 from anchorpy.provider import Provider, Wallet
 from anchorpy_core.idl import Idl  # type: ignore
 from solana.rpc.async_api import AsyncClient
-from solders.instruction import Instruction
+from solders.instruction import AccountMeta, Instruction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 
 from solbot_common.constants import (
+    ASSOCIATED_TOKEN_PROGRAM,
     EVENT_AUTHORITY,
+    PUMP_BUY_METHOD,
     PUMP_FUN_PROGRAM,
     PUMP_GLOBAL_ACCOUNT,
+    PUMP_SELL_METHOD,
     RENT_PROGRAM_ID,
     SYSTEM_PROGRAM_ID,
     TOKEN_PROGRAM_ID,
 )
 
+# buy/sell 指令数据: 8 字节 discriminator + (amount: u64, sol_amount: u64)
+PUMP_BUY_DISCRIMINATOR = struct.pack("<Q", PUMP_BUY_METHOD)
+PUMP_SELL_DISCRIMINATOR = struct.pack("<Q", PUMP_SELL_METHOD)
+_SWAP_ARGS = struct.Struct("<QQ")
+
+
+def build_buy_instruction(
+    token_amount: int,
+    max_sol_cost: int,
+    user: Pubkey,
+    mint: Pubkey,
+    fee_recipient: Pubkey,
+    bonding_curve: Pubkey,
+    associated_bonding_curve: Pubkey,
+    associated_user: Pubkey,
+    token_program: Pubkey = TOKEN_PROGRAM_ID,
+) -> Instruction:
+    """按 IDL 的账户顺序直接编码 buy 指令，不经过 anchorpy
+
+    Args:
+        token_amount: 买入的代币数量
+        max_sol_cost: 最多花费的 SOL（lamports）
+    """
+    accounts = [
+        AccountMeta(PUMP_GLOBAL_ACCOUNT, is_signer=False, is_writable=False),
+        AccountMeta(fee_recipient, is_signer=False, is_writable=True),
+        AccountMeta(mint, is_signer=False, is_writable=False),
+        AccountMeta(bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_user, is_signer=False, is_writable=True),
+        AccountMeta(user, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+        AccountMeta(token_program, is_signer=False, is_writable=False),
+        AccountMeta(RENT_PROGRAM_ID, is_signer=False, is_writable=False),
+        AccountMeta(EVENT_AUTHORITY, is_signer=False, is_writable=False),
+        AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+    ]
+    data = PUMP_BUY_DISCRIMINATOR + _SWAP_ARGS.pack(token_amount, max_sol_cost)
+    return Instruction(PUMP_FUN_PROGRAM, data, accounts)
+
+
+def build_sell_instruction(
+    token_amount: int,
+    min_sol_output: int,
+    user: Pubkey,
+    mint: Pubkey,
+    fee_recipient: Pubkey,
+    bonding_curve: Pubkey,
+    associated_bonding_curve: Pubkey,
+    associated_user: Pubkey,
+    token_program: Pubkey = TOKEN_PROGRAM_ID,
+) -> Instruction:
+    """按 IDL 的账户顺序直接编码 sell 指令，不经过 anchorpy
+
+    Args:
+        token_amount: 卖出的代币数量
+        min_sol_output: 最少获得的 SOL（lamports）
+    """
+    accounts = [
+        AccountMeta(PUMP_GLOBAL_ACCOUNT, is_signer=False, is_writable=False),
+        AccountMeta(fee_recipient, is_signer=False, is_writable=True),
+        AccountMeta(mint, is_signer=False, is_writable=False),
+        AccountMeta(bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_user, is_signer=False, is_writable=True),
+        AccountMeta(user, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+        AccountMeta(ASSOCIATED_TOKEN_PROGRAM, is_signer=False, is_writable=False),
+        AccountMeta(token_program, is_signer=False, is_writable=False),
+        AccountMeta(EVENT_AUTHORITY, is_signer=False, is_writable=False),
+        AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+    ]
+    data = PUMP_SELL_DISCRIMINATOR + _SWAP_ARGS.pack(token_amount, min_sol_output)
+    return Instruction(PUMP_FUN_PROGRAM, data, accounts)
+
 
 class PumpFunInterface:
     def __init__(self, keypair: Keypair, client: AsyncClient):
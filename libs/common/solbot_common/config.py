@@ -106,15 +106,46 @@ class WalletConfig(BaseModel):
 class MonitorConfig(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    mode: str = "wss"  # or "geyser"
+    mode: str = "wss"  # or "geyser" / "wss_stream"
+    # wss_stream 模式下的订阅方法：transactionSubscribe 或 blockSubscribe
+    stream_method: str = "transactionSubscribe"
     wallets: list[Pubkey] = Field(default_factory=list)
+    # redis: 交易详情经由 Redis 列表传递给解析 worker
+    # inprocess: 交易详情经由进程内队列直接交给解析 worker，只有 TxEvent 写入 Redis
+    pipeline: str = "redis"
+    pipeline_queue_size: int = 1000
+    # inprocess 模式下，是否额外将交易详情写入 Redis 列表留存（不在关键路径上）
+    durability_tap: bool = False
+    # 从 Redis 列表中单次批量取出的最大消息数
+    consumer_batch_size: int = 100
+    # 解析进程数，按签名者分片，0 表示在事件循环中直接解析
+    parse_workers: int = 0
+    # 每个解析分片的队列大小，队列满时向上游施加背压
+    parse_queue_size: int = 100
+    # 交易签名去重：本地 LRU 容量、时间窗口（秒），以及是否额外使用 Redis 跨进程去重
+    # Redis 去重每笔交易多一次 Redis 往返，只在多个进程消费同一来源时开启
+    dedup_size: int = 100_000
+    dedup_ttl: int = 600
+    dedup_redis: bool = False
 
     @field_validator("mode", mode="after")
     def validate_mode(cls, value: str) -> str:
-        if value.lower() not in ["wss", "geyser"]:
+        if value.lower() not in ["wss", "geyser", "wss_stream"]:
             raise ValueError(f"Invalid mode: {value}")
         return value
 
+    @field_validator("stream_method", mode="after")
+    def validate_stream_method(cls, value: str) -> str:
+        if value not in ["transactionSubscribe", "blockSubscribe"]:
+            raise ValueError(f"Invalid stream method: {value}")
+        return value
+
+    @field_validator("pipeline", mode="after")
+    def validate_pipeline(cls, value: str) -> str:
+        if value.lower() not in ["redis", "inprocess"]:
+            raise ValueError(f"Invalid pipeline: {value}")
+        return value.lower()
+
     @field_validator("wallets", mode="before")
     def validate_wallets(cls, value: list[str]) -> list[Pubkey]:
         return [Pubkey.from_string(wallet) for wallet in value]
@@ -124,6 +155,10 @@ class GeyserConfig(BaseModel):
     enable: bool = False
     endpoint: str = ""
     api_key: str = ""
+    # 订阅分片数，每个分片使用独立的连接，钱包变更只重新订阅所在分片
+    shards: int = 1
+    # 钱包变更的合并窗口（毫秒），窗口内的多次变更合并为每个分片一次订阅请求
+    batch_window_ms: int = 5
 
 
 class RPCConfig(BaseModel):
@@ -151,6 +186,39 @@ class TradingConfig(BaseModel):
     preflight_check: bool = False
     use_jito: bool = True
     jito_api: str = "https://mainnet.block-engine.jito.wtf"
+    # 并发向 Pump、Raydium、Jupiter 报价，按扣除费用后的预期输出选择路由
+    smart_routing: bool = True
+    # 路由报价超时时间（毫秒），超时的路由不参与比较
+    route_quote_timeout_ms: int = 300
+    # 交易签名后在后台发送，不等待节点响应，发送结果在结算时读取
+    async_send: bool = True
+    # 签名线程数
+    sign_workers: int = 2
+    # 本地 blockhash 的刷新间隔（毫秒）
+    blockhash_refresh_ms: int = 400
+    # 同时向所有 RPC 节点和 Jito block engine 提交交易，并在上链前间隔重发
+    # 开启后替代 Jito 和默认发送器，所有交易都通过广播发送
+    broadcast: bool = False
+    # 广播时同时提交到 GMGN
+    broadcast_gmgn: bool = False
+    # 除 jito_api 之外，广播时使用的其他 Jito block engine
+    jito_engines: list[str] = []
+    # 首次重发的间隔（毫秒），之后逐次加倍
+    rebroadcast_interval_ms: int = 500
+    # 每次重发使用排名前几的路径
+    rebroadcast_paths: int = 2
+    # 按交易类型统计的 CU 消耗，由 python -m trading.compute_units 生成，启动时加载
+    compute_unit_profile: str = "compute_units.json"
+    # CU 上限在 p99 消耗之上增加的余量比例
+    compute_unit_margin: float = 0.1
+    # 首次交易时为用户创建地址查找表（由用户钱包支付租金），之后的交易通过查找表引用常用账户
+    lookup_tables: bool = False
+    # 创建和维护共享查找表（热门池子账户）的钱包地址，需要是已导入的钱包，为空时不使用共享查找表
+    lookup_table_authority: str = ""
+    # 跟单自动滑点由本地池子状态和近期波动估计，不在关键路径上请求 Jupiter
+    local_slippage: bool = True
+    # 同一代币两次 Jupiter 滑点校准的最小间隔（秒），为 0 时不校准
+    slippage_calibration_interval: float = 30
 
     @field_validator("jito_api", mode="before")
     def validate_jito_api(cls, value: str) -> str:
@@ -169,6 +237,15 @@ class APIConfig(BaseModel):
     solscan_api_key: str
     shyft_api_base_url: str
     shyft_api_key: str
+    jupiter_api_base_url: str = "https://api.jup.ag"
+    jupiter_api_key: str = ""
+    # Jupiter 报价的请求频率，与套餐额度一致
+    jupiter_rate_limit: float = 1
+    jupiter_burst: int = 1
+    # 报价缓存时间（毫秒）
+    jupiter_quote_ttl_ms: int = 500
+    # 自动滑点报价的数量分档宽度（bps），相近的数量共用同一个报价
+    jupiter_amount_bucket_bps: int = 100
 
 
 class DBConfig(BaseModel):
@@ -0,0 +1,108 @@
+"""
+Wallet event producer and consumer for propagating wallet changes to other services
+"""
+
+from collections.abc import Callable
+from enum import Enum
+
+import aioredis
+import orjson as json
+from aioredis.client import PubSub
+from pydantic import BaseModel
+
+from solbot_common.log import logger
+
+
+class WalletEventType(str, Enum):
+    """钱包事件类型"""
+
+    REGISTERED = "registered"  # 导入或创建钱包
+    ACTIVE_CHANGED = "active_changed"  # 启用或停用钱包
+    DELETED = "deleted"  # 删除钱包
+
+
+class WalletEvent(BaseModel):
+    """钱包事件"""
+
+    event_type: WalletEventType
+    pubkey: str
+    chat_id: int
+
+
+class WalletEventProducer:
+    """钱包事件生产者"""
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self.channel = "wallet_events"
+
+    async def publish_event(self, event: WalletEvent):
+        """发布钱包事件"""
+        await self.redis.publish(self.channel, json.dumps(event.dict()))
+        logger.info(f"Published wallet event {event.event_type.value} for wallet {event.pubkey}")
+
+
+class WalletEventConsumer:
+    """钱包事件消费者
+
+    与 MonitorEventConsumer 的用法一致：注册处理器后 subscribe，
+    再将 PubSub 收到的消息交给 process_event 处理。
+    """
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self.channel = "wallet_events"
+        self._handlers: dict[WalletEventType, Callable] = {}
+        self._pubsub: PubSub | None = None
+
+    async def subscribe(self) -> PubSub:
+        """订阅钱包事件
+
+        Raises:
+            RuntimeError: 如果重复调用subscribe
+        """
+        if self._pubsub is not None:
+            raise RuntimeError("Already subscribed to channel")
+
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        return self._pubsub
+
+    async def unsubscribe(self) -> None:
+        """取消订阅并清理资源"""
+        if self._pubsub is None:
+            return
+
+        await self._pubsub.unsubscribe(self.channel)
+        await self._pubsub.close()
+        self._pubsub = None
+
+    def register_handler(self, event_type: WalletEventType, handler: Callable) -> None:
+        """注册事件处理器
+
+        Args:
+            event_type: 事件类型
+            handler: 处理器函数，必须是一个接受WalletEvent参数的异步函数
+
+        Raises:
+            ValueError: 如果handler不是可调用对象
+        """
+        if not callable(handler):
+            raise ValueError("Handler must be callable")
+        self._handlers[event_type] = handler
+
+    async def process_event(self, message: dict) -> None:
+        """处理钱包事件
+
+        Args:
+            message: Redis消息对象
+        """
+        if message.get("type") != "message":
+            return
+
+        data = message.get("data")
+        if not data:
+            raise ValueError("Empty message data")
+        event = WalletEvent(**json.loads(data))
+        if handler := self._handlers.get(event.event_type):
+            await handler(event)
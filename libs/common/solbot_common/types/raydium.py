@@ -37,7 +37,13 @@ class AmmV4PoolKeys:
     ray_authority_v4: Pubkey
     open_book_program: Pubkey
     token_program_id: Pubkey
-    
+    # swap 手续费，Raydium AMM v4 按 swapFeeNumerator / swapFeeDenominator 收取
+    swap_fee_numerator: int = 25
+    swap_fee_denominator: int = 10000
+    # 池子状态中尚未提取的 PnL，属于金库余额但不属于储备，数据来自获取池子状态时
+    need_take_pnl_base: int = 0
+    need_take_pnl_quote: int = 0
+
     @classmethod
     async def from_pool_data(cls, pool_id: str | Pubkey, amm_data: bytes, market_data: bytes) -> Self:
         if isinstance(pool_id, str):
@@ -84,7 +90,11 @@ class AmmV4PoolKeys:
             event_queue=Pubkey.from_bytes(market_decoded.event_queue),
             ray_authority_v4=ray_authority_v4,
             open_book_program=open_book_program,
-            token_program_id=Pubkey.from_string(token_info.token_program)
+            token_program_id=Pubkey.from_string(token_info.token_program),
+            swap_fee_numerator=amm_data_decoded.swapFeeNumerator,
+            swap_fee_denominator=amm_data_decoded.swapFeeDenominator,
+            need_take_pnl_base=amm_data_decoded.needTakePnlCoin,
+            need_take_pnl_quote=amm_data_decoded.needTakePnlPc,
         )
 
         return pool_keys
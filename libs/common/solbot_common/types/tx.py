@@ -27,6 +27,8 @@ class TxEvent:
     pre_token_amount: int
     post_token_amount: int
     program_id: str | None = None
+    # 断线后补齐的历史交易，只用于记录持仓，不触发跟单
+    backfilled: bool = False
 
     def to_json(self) -> str:
         return json.dumps(asdict(self)).decode("utf-8")
@@ -0,0 +1,76 @@
+"""
+交易前后的余额变化
+
+从 getTransaction 返回的 meta 中计算某个 owner 的 SOL 和代币余额变化，
+wallet-tracker 解析聪明钱交易和 trading 结算自己的交易共用这里的逻辑。
+"""
+
+from solbot_common.constants import TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID, WSOL
+
+# 预先计算常量字符串，避免每次比较时都调用 str(Pubkey)
+TOKEN_PROGRAM_IDS = frozenset((str(TOKEN_PROGRAM_ID), str(TOKEN_2022_PROGRAM_ID)))
+WSOL_MINT = str(WSOL)
+
+
+def account_index(tx_detail: dict, account: str) -> int:
+    """账户在交易账户列表中的位置
+
+    Raises:
+        ValueError: 如果账户不在交易的静态账户列表中
+    """
+    for index, account_key in enumerate(tx_detail["transaction"]["message"]["accountKeys"]):
+        pubkey = account_key if isinstance(account_key, str) else account_key["pubkey"]
+        if pubkey == account:
+            return index
+    raise ValueError(f"Account {account} not found in transaction")
+
+
+class TokenBalanceIndex:
+    """单个 owner 的代币余额索引
+
+    一次遍历 preTokenBalances 和 postTokenBalances，只保留属于 owner 的记录：
+    - mint -> (pre, post)，同一 mint 只取第一条记录
+    - 第一个 Token/Token-2022 程序下的非 WSOL mint，post 优先于 pre
+    遍历时只记录引用，金额只在查询时转换。
+    """
+
+    __slots__ = ("mint", "post_balances", "pre_balances")
+
+    def __init__(self, owner: str, pre_token_balances: list[dict], post_token_balances: list[dict]):
+        self.pre_balances, pre_mint = self._index(owner, pre_token_balances)
+        self.post_balances, post_mint = self._index(owner, post_token_balances)
+        self.mint: str | None = post_mint or pre_mint
+
+    @staticmethod
+    def _index(owner: str, token_balances: list[dict]) -> tuple[dict[str, dict], str | None]:
+        balances: dict[str, dict] = {}
+        first_mint = None
+        for token_balance in token_balances:
+            if token_balance["owner"] != owner:
+                continue
+            mint = token_balance["mint"]
+            balances.setdefault(mint, token_balance)
+            if (
+                first_mint is None
+                and mint != WSOL_MINT
+                and token_balance["programId"] in TOKEN_PROGRAM_IDS
+            ):
+                first_mint = mint
+        return balances, first_mint
+
+    def get(self, mint: str) -> tuple[int, int, int]:
+        """返回 (pre_amount, post_amount, decimals)
+
+        不存在的记录按 0 处理，decimals 优先取 post，默认为 6
+        """
+        pre_amount = post_amount = 0
+        decimals = 6
+        pre = self.pre_balances.get(mint)
+        if pre is not None:
+            pre_amount = int(pre["uiTokenAmount"]["amount"])
+            decimals = pre["uiTokenAmount"]["decimals"]
+        post = self.post_balances.get(mint)
+        if post is not None:
+            post_amount = int(post["uiTokenAmount"]["amount"])
+            decimals = post["uiTokenAmount"]["decimals"]
+        return pre_amount, post_amount, decimals
@@ -0,0 +1,229 @@
+"""
+RPC 端点池
+
+按每个端点最近的延迟和错误率排序，请求先发给最优端点，
+超过该端点延迟分位数仍未返回时，才向下一个端点发送对冲请求（hedged request），
+而不是每次都向所有端点并发请求。
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Sequence
+from typing import Any
+
+import httpx
+import orjson as json
+
+from solbot_common.log import logger
+
+
+class RPCError(Exception):
+    """JSON-RPC 返回的错误"""
+
+    def __init__(self, endpoint: str, error: Any):
+        super().__init__(endpoint, error)
+        self.endpoint = endpoint
+        self.error = error
+
+    def __str__(self) -> str:
+        return f"RPC error from {self.endpoint}: {self.error}"
+
+
+class EndpointStats:
+    """单个端点最近 window 次请求的延迟和结果"""
+
+    def __init__(self, window: int = 200):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(ok)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def p50(self) -> float | None:
+        return self.percentile(0.5)
+
+    @property
+    def p99(self) -> float | None:
+        return self.percentile(0.99)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def score(self) -> float:
+        """越小越好，没有样本的端点优先尝试"""
+        p50 = self.p50
+        if p50 is None:
+            return 0.0
+        return p50 * (1 + 4 * self.error_rate)
+
+
+class EndpointPool:
+    """带延迟评分和对冲请求的 RPC 端点池
+
+    - 所有端点共享一个 keep-alive 的 httpx 客户端，使用 HTTP/2，并发请求复用同一条连接
+    - 响应只做一次 JSON 解码，直接返回 result
+    - 主请求在 hedge_percentile 分位延迟内未返回、出错或返回空结果时，
+      才向下一个端点发送请求，最多同时请求 max_attempts 个端点
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        max_attempts: int = 2,
+        hedge_percentile: float = 0.9,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 1.0,
+        min_samples: int = 20,
+        window: int = 200,
+        explore: float = 0.05,
+        timeout: float = 5,
+    ):
+        """
+        Args:
+            endpoints: RPC 端点
+            max_attempts: 单次请求最多使用的端点数
+            hedge_percentile: 对冲请求的延迟分位数
+            min_hedge_delay: 对冲等待的下限（秒）
+            max_hedge_delay: 对冲等待的上限（秒），样本不足时也使用该值
+            min_samples: 使用分位延迟所需的最少样本数
+            window: 每个端点统计的最近请求数
+            explore: 随机打乱端点顺序的概率，让排名靠后的端点也能更新统计
+            timeout: 单个请求的超时时间（秒）
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = list(endpoints)
+        self.max_attempts = max(1, max_attempts)
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.explore = explore
+        self.stats = {endpoint: EndpointStats(window) for endpoint in self.endpoints}
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60),
+        )
+        self._ids = 0
+
+    def ranked(self) -> list[str]:
+        """按评分从优到劣排序的端点"""
+        if len(self.endpoints) > 1 and random.random() < self.explore:
+            return random.sample(self.endpoints, len(self.endpoints))
+        return sorted(self.endpoints, key=lambda endpoint: self.stats[endpoint].score)
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """向下一个端点发送对冲请求前的等待时间"""
+        stats = self.stats[endpoint]
+        if len(stats.latencies) < self.min_samples:
+            return self.max_hedge_delay
+        delay = stats.percentile(self.hedge_percentile) or self.max_hedge_delay
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    async def _post(self, endpoint: str, body: bytes) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(endpoint, content=body)
+            response.raise_for_status()
+            data = json.loads(response.content)
+            if "error" in data:
+                raise RPCError(endpoint, data["error"])
+        except asyncio.CancelledError:
+            # 被对冲请求取代而取消：实际延迟至少是已等待的时间，按该下限记录（截尾样本），
+            # 否则变慢的端点只保留以前的快速样本，一直排在最前并触发对冲
+            self.stats[endpoint].record(time.perf_counter() - start)
+            raise
+        except Exception:
+            self.stats[endpoint].record(time.perf_counter() - start, False)
+            raise
+        self.stats[endpoint].record(time.perf_counter() - start)
+        return data.get("result")
+
+    async def request(self, method: str, params: list | None = None) -> Any:
+        """发送 JSON-RPC 请求，返回第一个非空的 result
+
+        所有端点都返回空结果时返回 None，全部失败时抛出最后一个异常。
+        """
+        self._ids += 1
+        body = json.dumps(
+            {"jsonrpc": "2.0", "id": self._ids, "method": method, "params": params or []}
+        )
+        remaining = deque(self.ranked()[: self.max_attempts])
+        pending: set[asyncio.Task] = set()
+        last_error: Exception | None = None
+        # 有端点正常返回了空结果
+        answered = False
+
+        def launch() -> float:
+            endpoint = remaining.popleft()
+            pending.add(asyncio.create_task(self._post(endpoint, body)))
+            return self.hedge_delay(endpoint)
+
+        delay = launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # 超过对冲等待时间，向下一个端点发送请求
+                    delay = launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if result is not None:
+                        return result
+                    answered = True
+                # 出错或返回空结果，立即尝试下一个端点
+                if remaining:
+                    delay = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is not None and not answered:
+            raise last_error
+        return None
+
+    def snapshot(self) -> list[dict]:
+        """每个端点的延迟和错误率（毫秒）"""
+        return [
+            {
+                "endpoint": endpoint,
+                "samples": len(stats.latencies),
+                "p50_ms": round(stats.p50 * 1000, 1) if stats.p50 is not None else None,
+                "p99_ms": round(stats.p99 * 1000, 1) if stats.p99 is not None else None,
+                "error_rate": round(stats.error_rate, 3),
+            }
+            for endpoint, stats in self.stats.items()
+        ]
+
+    def log_stats(self) -> None:
+        for stats in self.snapshot():
+            logger.info(f"RPC endpoint stats: {stats}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
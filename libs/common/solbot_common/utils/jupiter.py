@@ -1,11 +1,15 @@
 from typing import Literal
 from solbot_common.log import logger
-import httpx, asyncio
+from solbot_common.utils.quote import QuoteService
+import asyncio
 
 
 class JupiterAPI:
-    def __init__(self, base_url="https://api.jup.ag"):
-        self.client = httpx.AsyncClient(base_url=base_url)
+    def __init__(self):
+        # 报价和构建交易共用 QuoteService 的 keep-alive 连接，
+        # QuoteService 是单例，地址由 api.jupiter_api_base_url 配置
+        self.quote_service = QuoteService()
+        self.client = self.quote_service.client
 
     async def get_quote(
         self,
@@ -16,6 +20,8 @@ class JupiterAPI:
     ) -> dict:
         """Get quote from Jupiter API.
 
+        Identical quotes are coalesced and cached briefly by QuoteService.
+
         Args:
             input_mint (str): Input mint
             output_mint (str): Output mint
@@ -27,22 +33,7 @@ class JupiterAPI:
         Returns:
             dict: Quote
         """
-        params = {
-            "inputMint": input_mint,
-            "outputMint": output_mint,
-            "amount": amount,
-            "slippageBps": slippage_bps,
-        }
-        # Add Retry
-        n = 5
-        for i in range(n):
-            try:
-                resp = await self.client.get("/swap/v1/quote", params=params)
-                resp.raise_for_status()
-                return resp.json()
-            except Exception as e:
-                logger.info(f"Retry {i}/{n} jupiter quote: {e}")
-        raise ValueError("Jupiter quote Failed.")
+        return await self.quote_service.get_quote(input_mint, output_mint, amount, slippage_bps)
 
     async def get_swap_transaction(
         self,
@@ -382,6 +382,34 @@ def make_clmm_swap_instruction(
     return swap_instruction
 
 
+def amm_v4_amount_out(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    """按 Raydium AMM v4 链上的整数算法计算 swap base in 的输出数量
+
+    手续费向上取整，从输入中扣除后按恒定乘积计算输出，结果向下取整。
+
+    Args:
+        amount_in: 输入数量（最小单位）
+        reserve_in: 输入代币的池子储备（最小单位）
+        reserve_out: 输出代币的池子储备（最小单位）
+        fee_numerator: 手续费分子
+        fee_denominator: 手续费分母
+
+    Returns:
+        int: 输出数量（最小单位）
+    """
+    if amount_in <= 0:
+        return 0
+    fee = -(-amount_in * fee_numerator // fee_denominator)
+    amount_in_less_fee = amount_in - fee
+    return reserve_out * amount_in_less_fee // (reserve_in + amount_in_less_fee)
+
+
 async def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
     quote_vault = pool_keys.quote_vault
     quote_decimal = pool_keys.quote_decimals
@@ -397,11 +425,6 @@ async def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
     )
     balances = balances_response.value
 
-    balances_response = await client.get_multiple_accounts_json_parsed(
-        [quote_vault, base_vault], Processed
-    )
-    balances = balances_response.value
-
     try:
         quote_account = balances[0]
         base_account = balances[1]
@@ -0,0 +1,227 @@
+"""Jupiter 报价服务
+
+同一笔跟单交易的多个跟随者会对同一对代币、同样的数量重复报价（自动滑点、路由比较、构建交易各一次），
+这里把相同的报价请求合并为一次：
+- 同时发出的相同请求只请求一次 Jupiter，其他请求等待同一个结果
+- 报价结果缓存很短的时间（默认 500 毫秒）
+- 报价与滑点无关，滑点在本地写入报价结果，不同滑点的请求共用一次报价
+- 只需要价格影响的请求（自动滑点）按数量分档，相近的数量共用同一个报价
+
+所有请求共用一个 keep-alive 的 HTTP/2 httpx 客户端，并通过令牌桶限制请求频率，与 Jupiter 的套餐额度一致。
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Literal
+
+import httpx
+
+from solbot_common.config import settings
+from solbot_common.log import logger
+
+SwapMode = Literal["ExactIn", "ExactOut"]
+QuoteKey = tuple[str, str, str, int]
+
+
+class TokenBucket:
+    """令牌桶限流"""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """获取一个令牌，令牌不足时等待，等待的请求按先后顺序获取"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+def apply_slippage(quote: dict, slippage_bps: int) -> dict:
+    """在报价结果中写入滑点，返回新的报价，计算方式与 Jupiter 一致"""
+    quote = dict(quote)
+    quote["slippageBps"] = slippage_bps
+    if quote.get("swapMode", "ExactIn") == "ExactIn":
+        threshold = int(quote["outAmount"]) * (10000 - slippage_bps) // 10000
+    else:
+        threshold = int(quote["inAmount"]) * (10000 + slippage_bps) // 10000
+    quote["otherAmountThreshold"] = str(threshold)
+    return quote
+
+
+class QuoteService:
+    """合并相同请求并限流的 Jupiter 报价服务"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        rate_limit: float | None = None,
+        burst: int | None = None,
+        ttl: float | None = None,
+        amount_bucket_bps: int | None = None,
+        max_retries: int = 3,
+        max_cached: int = 1024,
+    ) -> None:
+        """
+        Args:
+            base_url: Jupiter API 地址，默认使用 api.jupiter_api_base_url
+            rate_limit: 每秒最多请求数，默认使用 api.jupiter_rate_limit
+            burst: 允许的突发请求数，默认使用 api.jupiter_burst
+            ttl: 报价缓存时间（秒），默认使用 api.jupiter_quote_ttl_ms
+            amount_bucket_bps: 非精确报价的数量分档宽度（bps），默认使用 api.jupiter_amount_bucket_bps
+            max_retries: 请求失败时的最大重试次数
+            max_cached: 最多缓存的报价数
+        """
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        api = settings.api
+        self.base_url = base_url or api.jupiter_api_base_url
+        self.ttl = api.jupiter_quote_ttl_ms / 1000 if ttl is None else ttl
+        self.amount_bucket_bps = (
+            api.jupiter_amount_bucket_bps if amount_bucket_bps is None else amount_bucket_bps
+        )
+        self.max_retries = max_retries
+        self.max_cached = max_cached
+        self.limiter = TokenBucket(
+            api.jupiter_rate_limit if rate_limit is None else rate_limit,
+            api.jupiter_burst if burst is None else burst,
+        )
+        headers = {"x-api-key": api.jupiter_api_key} if api.jupiter_api_key else None
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            http2=True,
+            timeout=httpx.Timeout(5.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=60),
+        )
+
+        # 报价 -> (过期时间, 报价结果)
+        self._cache: OrderedDict[QuoteKey, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[QuoteKey, asyncio.Future[dict]] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.requests = 0
+
+    def __repr__(self) -> str:
+        return "QuoteService()"
+
+    def bucket_amount(self, amount: int) -> int:
+        """数量所在分档的代表值，同一分档内数量相差不超过 amount_bucket_bps"""
+        if self.amount_bucket_bps <= 0 or amount <= 0:
+            return amount
+        step = math.log1p(self.amount_bucket_bps / 10000)
+        return max(1, round(math.exp(round(math.log(amount) / step) * step)))
+
+    async def get_quote(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int = 0,
+        swap_mode: SwapMode = "ExactIn",
+        exact: bool = True,
+    ) -> dict:
+        """获取报价
+
+        Args:
+            input_mint: 输入代币的 mint
+            output_mint: 输出代币的 mint
+            amount: 数量（最小单位）
+            slippage_bps: 滑点（bps），在本地写入报价结果
+            swap_mode: 交易模式
+            exact: 是否需要精确数量的报价，用于构建交易的报价必须为 True；
+                只需要价格影响时为 False，相近的数量共用同一个报价
+
+        Raises:
+            ValueError: 多次重试后仍然失败
+        """
+        if not exact:
+            amount = self.bucket_amount(amount)
+        key = (input_mint, output_mint, swap_mode, amount)
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return apply_slippage(cached[1], slippage_bps)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            # 在独立的任务中请求，发起请求的调用被取消时，其他等待者仍能拿到结果
+            future = asyncio.ensure_future(self._fetch_and_store(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        return apply_slippage(await asyncio.shield(future), slippage_bps)
+
+    def _done(self, key: QuoteKey, future: asyncio.Future[dict]) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            # 等待者都已取消时避免 "exception was never retrieved"
+            future.exception()
+
+    async def _fetch_and_store(self, key: QuoteKey) -> dict:
+        quote = await self._fetch(key)
+        self._store(key, quote)
+        return quote
+
+    def _store(self, key: QuoteKey, quote: dict) -> None:
+        self._cache[key] = (time.monotonic() + self.ttl, quote)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, key: QuoteKey) -> dict:
+        input_mint, output_mint, swap_mode, amount = key
+        params = {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "amount": amount,
+            "swapMode": swap_mode,
+            "slippageBps": 0,
+        }
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            self.requests += 1
+            try:
+                resp = await self.client.get("/swap/v1/quote", params=params)
+                resp.raise_for_status()
+                return resp.json()
+            except Exception as e:
+                logger.info(f"Retry {attempt}/{self.max_retries} jupiter quote: {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.2 * 2**attempt)
+        raise ValueError("Jupiter quote Failed.")
+
+    def stats(self) -> dict:
+        """缓存命中、合并和实际请求的次数"""
+        return {"hits": self.hits, "coalesced": self.coalesced, "requests": self.requests}
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -1,5 +1,6 @@
+import asyncio
 from decimal import Decimal
-from functools import cache
+from functools import cache, lru_cache
 
 from jupiter_python_sdk.jupiter import Jupiter
 from loguru import logger
@@ -44,6 +45,7 @@ async def get_token_prices(mints: list, vs_token: str = WSOL.__str__()) -> dict:
         else:
             raise Exception(f"Jupiter 价格获取失败，状态码：{response.status_code}")
 
+@lru_cache(maxsize=4096)
 def get_bonding_curve_pda(mint: Pubkey, program: Pubkey) -> Pubkey:
     return Pubkey.find_program_address([b"bonding-curve", bytes(mint)], program)[0]
 
@@ -52,18 +54,21 @@ async def get_bonding_curve_account(
     client: AsyncClient, mint: Pubkey, program: Pubkey
 ) -> tuple[Pubkey, Pubkey, BondingCurveAccount] | None:
     bonding_curve = get_bonding_curve_pda(mint, program)
-    associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
+    associated_bonding_curve = get_associated_bonding_curve(bonding_curve, mint)
     # Retry 
     n = 5
     for i in range(n):
         try:
             account_info = await client.get_account_info_json_parsed(bonding_curve)
-            if account_info is None or account_info.value is None:
-                continue
-            bonding_curve_account = BondingCurveAccount.from_buffer(bytes((account_info.value).data))
-            return (bonding_curve, associated_bonding_curve, bonding_curve_account)
+            if account_info is not None and account_info.value is not None:
+                bonding_curve_account = BondingCurveAccount.from_buffer(
+                    bytes((account_info.value).data)
+                )
+                return (bonding_curve, associated_bonding_curve, bonding_curve_account)
         except Exception as _:
             logger.info(f"Retry {i}/{n} get bonding curve account.")
+        if i < n - 1:
+            await asyncio.sleep(0.05 * 2**i)
     raise ValueError("bonding curve account not found")
     
 
@@ -74,6 +79,7 @@ async def get_global_account(client: AsyncClient, program: Pubkey) -> GlobalAcco
     return await GlobalAccountCache(client).get(program)
 
 
+@lru_cache(maxsize=4096)
 def get_associated_bonding_curve(bonding_curve: Pubkey, mint: Pubkey) -> Pubkey:
     return get_associated_token_address(bonding_curve, mint)
 
@@ -200,10 +206,6 @@ async def get_token_balance(token_account: Pubkey, client: AsyncClient) -> float
     return resp.value.ui_amount
 
 
-# FIXME: jupiter 的报价 API 有请求频率的限制
-#  后续需要重构该函数为独立的模块，并使用令牌桶来限制请求频率
-#  每秒最多 1 次，每分钟最多 60 次，每小时最多 3600 次
-#  否则会报错：429 Too Many Requests
 async def calculate_auto_slippage(
     input_mint: str,
     output_mint: str,
@@ -251,14 +253,18 @@ async def calculate_auto_slippage(
         f"mode: {swap_mode}, min: {min_slippage_bps} bps, max: {max_slippage_bps} bps"
     )
 
-    jupiter = get_jupiter_client()
+    # Jupiter 报价有频率限制，通过 QuoteService 合并相同请求并限流，
+    # 这里只需要价格影响，相近的数量共用同一个报价
+    from solbot_common.utils.quote import QuoteService
+
     try:
-        quote = await jupiter.quote(
+        quote = await QuoteService().get_quote(
             input_mint=input_mint,
             output_mint=output_mint,
             amount=amount,
-            swap_mode=swap_mode,
-        )  # type: ignore[reportArgumentType]
+            swap_mode=swap_mode,  # type: ignore[reportArgumentType]
+            exact=False,
+        )
 
         # price_impact 是 0~1 的小数
         price_impact = Decimal(quote["priceImpactPct"])
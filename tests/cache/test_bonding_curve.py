@@ -0,0 +1,81 @@
+import base64
+import struct
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from solbot_cache.bonding_curve import BondingCurveCache
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.utils import get_bonding_curve_pda
+from solders.pubkey import Pubkey  # type: ignore
+
+MINT = str(Pubkey.new_unique())
+BONDING_CURVE = str(get_bonding_curve_pda(Pubkey.from_string(MINT), PUMP_FUN_PROGRAM))
+
+
+def _curve_data(virtual_sol_reserves: int) -> bytes:
+    return struct.pack("<QQQQQQ?", 0, 1_000, virtual_sol_reserves, 0, 0, 1_000, False)
+
+
+@pytest.fixture
+def cache():
+    client = AsyncMock()
+    account = MagicMock()
+    account.data = _curve_data(30) + b"\x00" * 32
+    resp = MagicMock()
+    resp.value = [account]
+    resp.context.slot = 100
+    client.get_multiple_accounts.return_value = resp
+
+    BondingCurveCache._instance = None
+    with patch("solbot_cache.account_stream.settings") as settings:
+        settings.rpc.rpc_url = "https://rpc.example"
+        cache = BondingCurveCache(client)
+    # 不建立真实的 websocket 连接
+    cache.watch = AsyncMock()
+    yield cache
+    BondingCurveCache._instance = None
+
+
+@pytest.mark.asyncio
+async def test_cold_miss_then_hit(cache):
+    entry = await cache.get(MINT)
+    assert entry.account.virtual_sol_reserves == 30
+    assert entry.slot == 100
+    await cache.get(MINT)
+    assert cache.client.get_multiple_accounts.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_notification_updates_entry(cache):
+    await cache.get(MINT)
+    cache._pending[1] = ("accountSubscribe", BONDING_CURVE)
+    await cache.handle_message({"id": 1, "result": 7})
+    assert cache.subscription_ids[BONDING_CURVE] == 7
+
+    def notification(slot, sol):
+        return {
+            "method": "accountNotification",
+            "params": {
+                "subscription": 7,
+                "result": {
+                    "context": {"slot": slot},
+                    "value": {"data": [base64.b64encode(_curve_data(sol)).decode(), "base64"]},
+                },
+            },
+        }
+
+    await cache.handle_message(notification(101, 40))
+    assert (await cache.get(MINT)).account.virtual_sol_reserves == 40
+    # 旧 slot 的数据被忽略
+    await cache.handle_message(notification(99, 50))
+    assert (await cache.get(MINT)).account.virtual_sol_reserves == 40
+    assert cache.client.get_multiple_accounts.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_evict(cache):
+    await cache.get(MINT)
+    await cache.evict(MINT)
+    assert BONDING_CURVE not in cache.entries
+    await cache.get(MINT)
+    assert cache.client.get_multiple_accounts.await_count == 2
@@ -0,0 +1,88 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from solbot_cache.keypair import KeypairCache
+from solbot_common.cp.wallet_events import WalletEvent, WalletEventType
+from solders.keypair import Keypair  # type: ignore
+
+
+@pytest.fixture
+def cache():
+    KeypairCache._instance = None
+    cache = KeypairCache(max_size=2)
+    cache._load = AsyncMock(return_value=None)
+    yield cache
+    KeypairCache._instance = None
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit(cache):
+    keypair = Keypair()
+    pubkey = str(keypair.pubkey())
+    cache._load.return_value = bytes(keypair)
+
+    assert (await cache.get(pubkey)).pubkey() == keypair.pubkey()
+    assert (await cache.get(pubkey)).pubkey() == keypair.pubkey()
+    assert cache._load.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_wallet_not_found(cache):
+    with pytest.raises(ValueError):
+        await cache.get(str(Keypair().pubkey()))
+    assert len(cache) == 0
+
+
+def test_stored_encrypted(cache):
+    keypair = Keypair()
+    pubkey = str(keypair.pubkey())
+    cache.put(pubkey, bytes(keypair))
+    assert bytes(keypair) not in bytes(cache._entries[pubkey])
+
+
+def test_lru_evicts_and_zeroizes(cache):
+    keypairs = [Keypair() for _ in range(3)]
+    pubkeys = [str(k.pubkey()) for k in keypairs]
+    cache.put(pubkeys[0], bytes(keypairs[0]))
+    sealed = cache._entries[pubkeys[0]]
+    cache.put(pubkeys[1], bytes(keypairs[1]))
+    cache.put(pubkeys[2], bytes(keypairs[2]))
+
+    assert pubkeys[0] not in cache
+    assert len(cache) == 2
+    assert not any(sealed)
+
+
+@pytest.mark.asyncio
+async def test_wallet_event_invalidates(cache):
+    keypair = Keypair()
+    pubkey = str(keypair.pubkey())
+    cache.put(pubkey, bytes(keypair))
+
+    await cache.handle_wallet_event(
+        WalletEvent(event_type=WalletEventType.DELETED, pubkey=pubkey, chat_id=1)
+    )
+    assert pubkey not in cache
+    with pytest.raises(ValueError):
+        await cache.get(pubkey)
+
+
+@pytest.mark.asyncio
+async def test_warm_skips_wallets_invalidated_during_query(cache):
+    keypairs = [Keypair() for _ in range(2)]
+    pubkeys = [str(k.pubkey()) for k in keypairs]
+    session = AsyncMock()
+
+    async def execute(stmt):
+        # 查询期间第二个钱包被删除
+        await cache.handle_wallet_event(
+            WalletEvent(event_type=WalletEventType.DELETED, pubkey=pubkeys[1], chat_id=1)
+        )
+        result = MagicMock()
+        result.all.return_value = [(p, bytes(k)) for p, k in zip(pubkeys, keypairs, strict=True)]
+        return result
+
+    session.execute.side_effect = execute
+    assert await cache.warm(session=session) == 1
+    assert pubkeys[0] in cache
+    assert pubkeys[1] not in cache
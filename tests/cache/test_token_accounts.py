@@ -0,0 +1,172 @@
+import asyncio
+import base64
+import struct
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from solbot_cache.token_accounts import (
+    TOKEN_PROGRAMS,
+    TokenAccountIndexCache,
+    decode_token_account,
+)
+from solbot_common.constants import TOKEN_2022_PROGRAM_ID, TOKEN_PROGRAM_ID
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
+
+OWNER = Pubkey.new_unique()
+
+
+def _data(mint: Pubkey, amount: int, owner: Pubkey = OWNER, extensions: bool = False) -> bytes:
+    data = bytes(mint) + bytes(owner) + struct.pack("<Q", amount) + bytes(93)
+    if extensions:
+        data += bytes([2]) + bytes(10)
+    return data
+
+
+def _keyed_account(pubkey: Pubkey, data: bytes) -> MagicMock:
+    keyed_account = MagicMock()
+    keyed_account.pubkey = pubkey
+    keyed_account.account.data = data
+    return keyed_account
+
+
+def _resp(slot: int, accounts: list) -> MagicMock:
+    resp = MagicMock()
+    resp.context.slot = slot
+    resp.value = accounts
+    return resp
+
+
+@pytest.fixture
+def cache():
+    TokenAccountIndexCache._instance = None
+    with patch("solbot_cache.token_accounts.settings") as settings:
+        settings.rpc.rpc_url = "https://rpc.example"
+        cache = TokenAccountIndexCache(AsyncMock())
+    cache.watch = AsyncMock()
+    yield cache
+    TokenAccountIndexCache._instance = None
+
+
+def test_decode_token_account():
+    mint = Pubkey.new_unique()
+    assert decode_token_account(_data(mint, 7)) == (mint, OWNER, 7)
+    assert decode_token_account(_data(mint, 7, extensions=True)) == (mint, OWNER, 7)
+    # Token-2022 的 mint 账户
+    assert decode_token_account(bytes(165) + bytes([1])) is None
+    assert decode_token_account(bytes(82)) is None
+
+
+@pytest.mark.asyncio
+async def test_loads_both_programs_once(cache):
+    mint, mint_2022, other = Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique()
+    ata = get_associated_token_address(OWNER, mint)
+    ata_2022 = get_associated_token_address(OWNER, mint_2022, TOKEN_2022_PROGRAM_ID)
+    auxiliary = Pubkey.new_unique()
+
+    async def get_token_accounts_by_owner(owner, opts, commitment):
+        if opts.program_id == TOKEN_PROGRAM_ID:
+            return _resp(
+                10,
+                [_keyed_account(ata, _data(mint, 1)), _keyed_account(auxiliary, _data(other, 2))],
+            )
+        return _resp(10, [_keyed_account(ata_2022, _data(mint_2022, 3, extensions=True))])
+
+    cache.client.get_token_accounts_by_owner.side_effect = get_token_accounts_by_owner
+    assert await cache.has_ata(OWNER, mint)
+    assert not await cache.has_ata(OWNER, mint_2022)
+    assert await cache.has_ata(OWNER, mint_2022, TOKEN_2022_PROGRAM_ID)
+    assert await cache.get_token_account(OWNER, other) == auxiliary
+    assert await cache.get_token_account(OWNER, Pubkey.new_unique()) is None
+    assert cache.client.get_token_accounts_by_owner.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_apply_confirmed_transaction(cache):
+    cache.client.get_token_accounts_by_owner.return_value = _resp(10, [])
+    sold, bought = Pubkey.new_unique(), Pubkey.new_unique()
+    sold_ata = get_associated_token_address(OWNER, sold)
+    bought_ata = get_associated_token_address(OWNER, bought)
+    index = await cache.get(OWNER)
+    index.update(sold_ata, sold, TOKEN_PROGRAM_ID, 5, 10)
+
+    def balance(account_index: int, mint: Pubkey, amount: int) -> dict:
+        return {
+            "accountIndex": account_index,
+            "mint": str(mint),
+            "owner": str(OWNER),
+            "programId": str(TOKEN_PROGRAM_ID),
+            "uiTokenAmount": {"amount": str(amount), "decimals": 6},
+        }
+
+    tx_detail = {
+        "slot": 20,
+        "transaction": {"message": {"accountKeys": [str(OWNER), str(sold_ata)]}},
+        "meta": {
+            "err": None,
+            # 买入的 ATA 通过地址查找表加载
+            "loadedAddresses": {"writable": [str(bought_ata)], "readonly": []},
+            "preTokenBalances": [balance(1, sold, 5)],
+            "postTokenBalances": [balance(2, bought, 9)],
+        },
+    }
+    cache.apply_transaction(OWNER, tx_detail)
+    assert index.has_ata(bought) and index.accounts[bought_ata].amount == 9
+    assert not index.has_ata(sold)
+
+    # 关闭之前的推送被忽略
+    index.update(sold_ata, sold, TOKEN_PROGRAM_ID, 5, 15)
+    assert not index.has_ata(sold)
+
+
+@pytest.mark.asyncio
+async def test_program_notifications(cache):
+    cache.client.get_token_accounts_by_owner.return_value = _resp(10, [])
+    index = await cache.get(OWNER)
+    key = (OWNER, TOKEN_PROGRAM_ID)
+    cache._pending[1] = ("programSubscribe", key)
+    await cache.handle_message({"id": 1, "result": 42})
+    assert cache.subscription_ids[key] == 42
+
+    mint = Pubkey.new_unique()
+    ata = get_associated_token_address(OWNER, mint)
+
+    def notification(slot: int, lamports: int, data: bytes) -> dict:
+        value = {
+            "pubkey": str(ata),
+            "account": {"lamports": lamports, "data": [base64.b64encode(data).decode(), "base64"]},
+        }
+        return {
+            "method": "programNotification",
+            "params": {"subscription": 42, "result": {"context": {"slot": slot}, "value": value}},
+        }
+
+    await cache.handle_message(notification(11, 2_039_280, _data(mint, 100)))
+    assert index.has_ata(mint) and index.accounts[ata].amount == 100
+    await cache.handle_message(notification(12, 2_039_280, _data(mint, 40)))
+    assert index.accounts[ata].amount == 40
+
+
+@pytest.mark.asyncio
+async def test_subscribed_index_reloads_in_background(cache):
+    mint = Pubkey.new_unique()
+    ata = get_associated_token_address(OWNER, mint)
+    cache.client.get_token_accounts_by_owner.return_value = _resp(
+        10, [_keyed_account(ata, _data(mint, 1))]
+    )
+    index = await cache.get(OWNER)
+    assert index.has_ata(mint)
+    for program in TOKEN_PROGRAMS:
+        cache.subscription_ids[(OWNER, program)] = 1
+    # 订阅中的钱包在 reload_interval 内不重新加载
+    index.loaded_at -= cache.max_age + 1
+    await cache.get(OWNER)
+    assert cache.loads == 1
+
+    # 在其他地方关闭的 ATA 不会推送，到期后在后台重新加载移除
+    cache.client.get_token_accounts_by_owner.return_value = _resp(20, [])
+    index.loaded_at -= cache.reload_interval
+    assert (await cache.get(OWNER)).has_ata(mint)
+    await asyncio.gather(*cache._loading.values())
+    assert cache.loads == 2
+    assert not cache.indexes[OWNER].has_ata(mint)
@@ -0,0 +1,49 @@
+import struct
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from solbot_cache.vault_balance import VaultBalanceCache
+from solders.pubkey import Pubkey  # type: ignore
+
+
+def _token_account(amount: int) -> MagicMock:
+    account = MagicMock()
+    account.data = bytes(64) + struct.pack("<Q", amount) + bytes(93)
+    return account
+
+
+@pytest.fixture
+def cache():
+    client = AsyncMock()
+    VaultBalanceCache._instance = None
+    with patch("solbot_cache.account_stream.settings") as settings:
+        settings.rpc.rpc_url = "https://rpc.example"
+        cache = VaultBalanceCache(client)
+    cache.watch = AsyncMock()
+    yield cache
+    VaultBalanceCache._instance = None
+
+
+@pytest.mark.asyncio
+async def test_get_balances_batches_misses(cache):
+    base_vault, quote_vault = Pubkey.new_unique(), Pubkey.new_unique()
+    resp = MagicMock()
+    resp.value = [_token_account(1_000), _token_account(2_000)]
+    resp.context.slot = 10
+    cache.client.get_multiple_accounts.return_value = resp
+
+    assert await cache.get_balances(base_vault, quote_vault) == (1_000, 2_000)
+    assert await cache.get_balances(base_vault, quote_vault) == (1_000, 2_000)
+    assert cache.client.get_multiple_accounts.await_count == 1
+    # 报价使用的储备不等待确认
+    assert cache.client.get_multiple_accounts.await_args.kwargs["commitment"] == "processed"
+
+
+@pytest.mark.asyncio
+async def test_missing_vault(cache):
+    resp = MagicMock()
+    resp.value = [None]
+    resp.context.slot = 10
+    cache.client.get_multiple_accounts.return_value = resp
+    with pytest.raises(ValueError):
+        await cache.get_balances(Pubkey.new_unique())
@@ -0,0 +1,41 @@
+import struct
+
+from solbot_common.constants import PUMP_FUN_PROGRAM, PUMP_GLOBAL_ACCOUNT
+from solbot_common.IDL.pumpfun import (
+    PUMP_BUY_DISCRIMINATOR,
+    PUMP_SELL_DISCRIMINATOR,
+    build_buy_instruction,
+    build_sell_instruction,
+)
+from solders.pubkey import Pubkey  # type: ignore
+
+
+def _accounts():
+    return {
+        "user": Pubkey.new_unique(),
+        "mint": Pubkey.new_unique(),
+        "fee_recipient": Pubkey.new_unique(),
+        "bonding_curve": Pubkey.new_unique(),
+        "associated_bonding_curve": Pubkey.new_unique(),
+        "associated_user": Pubkey.new_unique(),
+    }
+
+
+def test_build_buy_instruction():
+    accounts = _accounts()
+    ix = build_buy_instruction(1_000, 2_000, **accounts)
+    assert ix.program_id == PUMP_FUN_PROGRAM
+    assert bytes(ix.data) == PUMP_BUY_DISCRIMINATOR + struct.pack("<QQ", 1_000, 2_000)
+    assert len(ix.accounts) == 12
+    assert ix.accounts[0].pubkey == PUMP_GLOBAL_ACCOUNT
+    assert ix.accounts[5].pubkey == accounts["associated_user"]
+    user = ix.accounts[6]
+    assert user.pubkey == accounts["user"] and user.is_signer and user.is_writable
+
+
+def test_build_sell_instruction():
+    accounts = _accounts()
+    ix = build_sell_instruction(3_000, 1, **accounts)
+    assert bytes(ix.data) == PUMP_SELL_DISCRIMINATOR + struct.pack("<QQ", 3_000, 1)
+    assert len(ix.accounts) == 12
+    assert bytes(ix.data[:8]).hex() == "33e685a4017f83ad"
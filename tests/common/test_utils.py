@@ -18,3 +18,15 @@ async def test_validate_transaction_fail_tx_hash():
     )
     result = await validate_transaction(tx_hash)
     assert result is False
+
+
+def test_amm_v4_amount_out():
+    from solbot_common.utils.pool import amm_v4_amount_out
+
+    # 1 SOL 买入，池子 100 SOL / 1_000_000 token，0.25% 手续费
+    amount_out = amm_v4_amount_out(10**9, 100 * 10**9, 10**12, 25, 10000)
+    amount_in_less_fee = 10**9 - 2_500_000
+    assert amount_out == 10**12 * amount_in_less_fee // (100 * 10**9 + amount_in_less_fee)
+    # 手续费向上取整
+    assert amm_v4_amount_out(1, 100, 100, 25, 10000) == 0
+    assert amm_v4_amount_out(0, 100, 100, 25, 10000) == 0
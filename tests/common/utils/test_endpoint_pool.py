@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from solbot_common.utils.endpoint_pool import EndpointPool, EndpointStats
+
+
+def test_endpoint_stats():
+    stats = EndpointStats(window=4)
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5):
+        stats.record(latency)
+    # 只保留最近 4 次
+    assert stats.p50 == 0.4
+    assert stats.p99 == 0.5
+    stats.record(1.0, ok=False)
+    assert stats.error_rate == 0.25
+
+
+@pytest.mark.asyncio
+async def test_ranked_by_score():
+    pool = EndpointPool(["a", "b"], explore=0)
+    for _ in range(5):
+        pool.stats["a"].record(0.5)
+        pool.stats["b"].record(0.1)
+    assert pool.ranked() == ["b", "a"]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_hedge_after_delay():
+    pool = EndpointPool(["slow", "fast"], explore=0, max_hedge_delay=0.05)
+    calls = []
+
+    async def post(endpoint, body):
+        calls.append(endpoint)
+        if endpoint == "slow":
+            await asyncio.sleep(1)
+        return {"endpoint": endpoint}
+
+    pool._post = post
+    assert await pool.request("getTransaction") == {"endpoint": "fast"}
+    assert calls == ["slow", "fast"]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_is_fast():
+    pool = EndpointPool(["a", "b"], explore=0, max_hedge_delay=0.5)
+    calls = []
+
+    async def post(endpoint, body):
+        calls.append(endpoint)
+        return {"endpoint": endpoint}
+
+    pool._post = post
+    assert await pool.request("getTransaction") == {"endpoint": "a"}
+    assert calls == ["a"]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_fallback_on_error_and_empty_result():
+    pool = EndpointPool(["a", "b"], explore=0)
+
+    async def post(endpoint, body):
+        if endpoint == "a":
+            raise RuntimeError("boom")
+        return None
+
+    pool._post = post
+    assert await pool.request("getTransaction") is None
+
+    async def fail(endpoint, body):
+        raise RuntimeError(endpoint)
+
+    pool._post = fail
+    with pytest.raises(RuntimeError):
+        await pool.request("getTransaction")
+    await pool.close()
+
+
+def _response(result: int) -> MagicMock:
+    response = MagicMock()
+    response.content = b'{"result": %d}' % result
+    return response
+
+
+@pytest.mark.asyncio
+async def test_cancelled_primary_records_censored_latency():
+    pool = EndpointPool(["slow", "fast"], explore=0, max_hedge_delay=0.05)
+
+    async def post(endpoint, content):
+        if endpoint == "slow":
+            await asyncio.sleep(1)
+        return _response(1)
+
+    pool.client.post = post
+    assert await pool.request("getSlot") == 1
+    await asyncio.sleep(0)
+    # 被取消的主请求按已等待的时间记录，至少是对冲等待时间
+    assert len(pool.stats["slow"].latencies) == 1
+    assert pool.stats["slow"].latencies[0] >= 0.05
+    assert len(pool.stats["fast"].latencies) == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_degraded_primary_loses_rank_to_hedge():
+    pool = EndpointPool(
+        ["primary", "backup"], explore=0, min_hedge_delay=0.01, min_samples=5, window=20
+    )
+    for _ in range(20):
+        pool.stats["primary"].record(0.01)
+        pool.stats["backup"].record(0.03)
+    calls = []
+
+    async def post(endpoint, content):
+        calls.append(endpoint)
+        # 主端点变慢，每次都输给对冲请求
+        await asyncio.sleep(1 if endpoint == "primary" else 0.03)
+        return _response(1)
+
+    pool.client.post = post
+    for _ in range(12):
+        assert await pool.request("getSlot") == 1
+    assert pool.ranked() == ["backup", "primary"]
+    # 排名调整后只请求一个端点
+    calls.clear()
+    await pool.request("getSlot")
+    assert calls == ["backup"]
+    await pool.close()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+from solbot_common.utils.quote import QuoteService, TokenBucket, apply_slippage
+
+SOL = "So11111111111111111111111111111111111111112"
+MINT = "Mint11111111111111111111111111111111111pump"
+
+
+@pytest.fixture
+def service():
+    QuoteService._instance = None
+    service = QuoteService(
+        base_url="https://jupiter.example",
+        rate_limit=1000,
+        burst=1000,
+        ttl=0.05,
+        amount_bucket_bps=100,
+    )
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        _, _, swap_mode, amount = key
+        return {"inAmount": str(amount), "outAmount": str(amount * 2), "swapMode": swap_mode}
+
+    service._fetch = fetch
+    service.calls = calls  # type: ignore
+    yield service
+    QuoteService._instance = None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced(service):
+    quotes = await asyncio.gather(
+        *(service.get_quote(SOL, MINT, 1_000_000, slippage_bps=100 * i) for i in range(10))
+    )
+    assert len(service.calls) == 1
+    assert service.stats()["coalesced"] == 9
+    # 滑点在本地写入，每个请求得到自己的阈值
+    assert [q["otherAmountThreshold"] for q in quotes[:2]] == ["2000000", "1980000"]
+
+
+@pytest.mark.asyncio
+async def test_cache_expires(service):
+    await service.get_quote(SOL, MINT, 1_000_000)
+    await service.get_quote(SOL, MINT, 1_000_000)
+    assert len(service.calls) == 1
+    await asyncio.sleep(0.06)
+    await service.get_quote(SOL, MINT, 1_000_000)
+    assert len(service.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_approximate_amounts_share_bucket(service):
+    await service.get_quote(SOL, MINT, 1_000_000, exact=False)
+    await service.get_quote(SOL, MINT, 998_000, exact=False)
+    assert len(service.calls) == 1
+    # 精确报价不分档
+    quote = await service.get_quote(SOL, MINT, 1_003_000)
+    assert quote["inAmount"] == "1003000"
+
+
+def test_bucket_width(service):
+    for amount in (1, 999, 10**6, 123_456_789, 10**15):
+        bucket = service.bucket_amount(amount)
+        assert abs(bucket - amount) <= max(1, amount * 0.005 + 1)
+
+
+@pytest.mark.asyncio
+async def test_failure_is_shared_and_not_cached(service):
+    async def fail(key):
+        service.calls.append(key)
+        await asyncio.sleep(0.01)
+        raise ValueError("Jupiter quote Failed.")
+
+    service._fetch = fail
+    results = await asyncio.gather(
+        service.get_quote(SOL, MINT, 1), service.get_quote(SOL, MINT, 1), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(service.calls) == 1
+    assert not service._cache and not service._inflight
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_block_waiters(service):
+    first = asyncio.create_task(service.get_quote(SOL, MINT, 1))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(service.get_quote(SOL, MINT, 1))
+    await asyncio.sleep(0)
+    # 发起请求的调用超时被取消，合并的调用仍然得到报价
+    first.cancel()
+    quote = await asyncio.wait_for(second, timeout=1)
+    assert quote["inAmount"] == "1"
+    assert first.cancelled()
+    assert len(service.calls) == 1
+    assert not service._inflight
+
+
+def test_apply_slippage_exact_out():
+    quote = {"inAmount": "1000", "outAmount": "500", "swapMode": "ExactOut"}
+    assert apply_slippage(quote, 50)["otherAmountThreshold"] == "1005"
+    assert "slippageBps" not in quote
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    # 突发 2 个，之后每 20 毫秒 1 个
+    assert time.monotonic() - start >= 0.035
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+from solbot_common.constants import PUMP_FUN_PROGRAM, TOKEN_PROGRAM_ID
+from trading.compute_units import DEFAULT_UNIT_LIMIT, ComputeUnitProfiler, profile_of
+from trading.utils import calc_tx_units
+
+USER = "User1111111111111111111111111111111111111111"
+MINT = "Mint11111111111111111111111111111111111pump"
+
+
+@pytest.fixture
+def profiler():
+    ComputeUnitProfiler._instance = None
+    yield ComputeUnitProfiler(margin=0.1, min_samples=5, window=100, profile_path=os.devnull)
+    ComputeUnitProfiler._instance = None
+
+
+def _token_balance(amount: int) -> dict:
+    return {
+        "accountIndex": 1,
+        "mint": MINT,
+        "owner": USER,
+        "programId": str(TOKEN_PROGRAM_ID),
+        "uiTokenAmount": {"amount": str(amount), "decimals": 6},
+    }
+
+
+def _tx(pre_amount: int, post_amount: int, units: int = 60_000) -> dict:
+    return {
+        "transaction": {"signatures": ["sig"], "message": {"accountKeys": [USER, "Ata"]}},
+        "meta": {
+            "err": None,
+            "computeUnitsConsumed": units,
+            "logMessages": [f"Program {PUMP_FUN_PROGRAM} invoke [1]"],
+            "preTokenBalances": [_token_balance(pre_amount)] if pre_amount else [],
+            "postTokenBalances": [_token_balance(post_amount)] if post_amount else [],
+        },
+    }
+
+
+def test_default_limit_until_enough_samples(profiler):
+    for _ in range(4):
+        profiler.observe("pump:buy", 60_000)
+    assert profiler.limit("pump:buy") == DEFAULT_UNIT_LIMIT
+    assert profiler.limit("pump:buy", 81_000) == 81_000
+    assert profiler.limit(None) == DEFAULT_UNIT_LIMIT
+
+
+def test_limit_is_p99_with_margin(profiler):
+    for units in range(50_000, 150_000, 1_000):
+        profiler.observe("pump:buy", units)
+    # p99 = 148000, 加 10% 余量后向上取整到 1000
+    assert profiler.limit("pump:buy") == 163_000
+
+
+def test_window_drops_old_samples(profiler):
+    for _ in range(100):
+        profiler.observe("pump:sell", 300_000)
+    for _ in range(100):
+        profiler.observe("pump:sell", 40_000)
+    assert profiler.limit("pump:sell") == 44_000
+
+
+def test_observe_tracked_transaction(profiler):
+    profiler.track("sig", "raydium_v4:buy")
+    profiler.observe_transaction("sig", _tx(0, 10, units=70_000))
+    assert list(profiler.samples["raydium_v4:buy"]) == [70_000]
+    assert not profiler._pending
+
+
+def test_failed_transaction_raises_limit(profiler):
+    for _ in range(5):
+        profiler.observe("pump:buy", 60_000)
+    assert profiler.limit("pump:buy") == 66_000
+
+    # 滑点失败的交易中途退出，不作为样本
+    profiler.track("slippage", "pump:buy", 66_000)
+    tx = _tx(0, 0, units=30_000)
+    tx["meta"]["err"] = {"InstructionError": [2, {"Custom": 6002}]}
+    profiler.observe_transaction("slippage", tx)
+    assert len(profiler.samples["pump:buy"]) == 5
+    assert profiler.limit("pump:buy") == 66_000
+
+    # CU 不足失败，上限提高到失败时的 1.5 倍
+    profiler.track("exceeded", "pump:buy", 66_000)
+    tx = _tx(0, 0, units=66_000)
+    tx["meta"]["err"] = {"InstructionError": [2, "ComputationalBudgetExceeded"]}
+    profiler.observe_transaction("exceeded", tx)
+    assert len(profiler.samples["pump:buy"]) == 5
+    assert profiler.limit("pump:buy") == 99_000
+    assert profiler.limit("pump:sell") == DEFAULT_UNIT_LIMIT
+
+
+def test_profile_from_transaction():
+    assert profile_of(_tx(0, 2_500_000)) == "pump:buy"
+    assert profile_of(_tx(2_500_000, 0)) == "pump:sell"
+    tx = _tx(0, 10)
+    tx["meta"]["logMessages"] = []
+    assert profile_of(tx) is None
+
+
+def test_dump_and_load(profiler, tmp_path):
+    for units in (60_000, 65_000):
+        profiler.observe("pump:buy", units)
+    path = str(tmp_path / "compute_units.json")
+    profiler.dump(path)
+
+    profiler.samples.clear()
+    profiler.load(path)
+    assert list(profiler.samples["pump:buy"]) == [60_000, 65_000]
+
+
+def test_unit_price_scales_with_limit():
+    # 相同的优先费用，CU 上限越小单价越高
+    price, limit = calc_tx_units(0.0001, 50_000)
+    assert limit == 50_000
+    assert price == 2_000_000
+    assert calc_tx_units(0.0001)[0] == 500_000
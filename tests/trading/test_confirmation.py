@@ -0,0 +1,98 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from solbot_common.models.swap_record import TransactionStatus
+from solders.signature import Signature  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+from trading.settlement.confirmation import MAX_SIGNATURES_PER_REQUEST, SignatureConfirmer
+
+
+@pytest.fixture
+def confirmer():
+    SignatureConfirmer._instance = None
+    with patch("trading.settlement.confirmation.settings") as settings:
+        settings.rpc.rpc_url = "https://rpc.example"
+        confirmer = SignatureConfirmer(AsyncMock(), fallback_after=0.05, poll_interval=0.01)
+    # 不建立真实的 websocket 连接，只运行批量查询
+    confirmer._start = MagicMock()
+    yield confirmer
+    SignatureConfirmer._instance = None
+
+
+def _statuses(statuses):
+    resp = MagicMock()
+    resp.value = statuses
+    return resp
+
+
+def _status(err=None):
+    status = MagicMock()
+    status.confirmation_status = TransactionConfirmationStatus.Confirmed
+    status.err = err
+    return status
+
+
+@pytest.mark.asyncio
+async def test_notification_resolves_immediately(confirmer):
+    signature = str(Signature.new_unique())
+    confirmer.websocket = AsyncMock()
+    task = asyncio.create_task(confirmer.confirm(signature))
+    await asyncio.sleep(0)
+
+    request_id = next(iter(confirmer._pending))
+    await confirmer.handle_message({"id": request_id, "result": 3})
+    await confirmer.handle_message(
+        {
+            "method": "signatureNotification",
+            "params": {
+                "subscription": 3,
+                "result": {"context": {"slot": 1}, "value": {"err": None}},
+            },
+        }
+    )
+    assert await task == TransactionStatus.SUCCESS
+    assert not confirmer._futures
+    confirmer.client.get_signature_statuses.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction(confirmer):
+    signature = str(Signature.new_unique())
+    confirmer.websocket = AsyncMock()
+    task = asyncio.create_task(confirmer.confirm(signature))
+    await asyncio.sleep(0)
+
+    await confirmer.handle_message({"id": next(iter(confirmer._pending)), "result": 4})
+    await confirmer.handle_message(
+        {
+            "method": "signatureNotification",
+            "params": {
+                "subscription": 4,
+                "result": {"context": {"slot": 1}, "value": {"err": {"InstructionError": [0, 1]}}},
+            },
+        }
+    )
+    assert await task == TransactionStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_poll_is_batched(confirmer):
+    signatures = [str(Signature.new_unique()) for _ in range(MAX_SIGNATURES_PER_REQUEST + 1)]
+    confirmer.client.get_signature_statuses.side_effect = lambda sigs, **_: _statuses(
+        [_status() for _ in sigs]
+    )
+    for signature in signatures:
+        confirmer._futures[signature] = asyncio.get_running_loop().create_future()
+    await confirmer._poll(signatures)
+
+    assert confirmer.client.get_signature_statuses.await_count == 2
+    assert all(f.result() == TransactionStatus.SUCCESS for f in confirmer._futures.values())
+
+
+@pytest.mark.asyncio
+async def test_expired_after_timeout(confirmer):
+    confirmer.client.get_signature_statuses.return_value = _statuses([None])
+    status = await confirmer.confirm(str(Signature.new_unique()), timeout=0.05)
+    assert status == TransactionStatus.EXPIRED
+    assert not confirmer._futures
@@ -0,0 +1,192 @@
+import asyncio
+import struct
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from solbot_common.models.swap_record import TransactionStatus
+from solders.address_lookup_table_account import AddressLookupTableAccount  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from trading.lookup_table import (
+    STATIC_ACCOUNTS,
+    AddressLookupTableManager,
+    create_lookup_table_instruction,
+    decode_lookup_table,
+    extend_lookup_table_instruction,
+)
+
+
+@pytest.fixture
+def manager():
+    AddressLookupTableManager._instance = None
+    confirmer = AsyncMock()
+    confirmer.confirm.return_value = TransactionStatus.SUCCESS
+    yield AddressLookupTableManager(AsyncMock(), confirmer=confirmer)
+    AddressLookupTableManager._instance = None
+
+
+def _table_data(addresses: list[Pubkey], deactivation_slot: int = 2**64 - 1) -> bytes:
+    authority = Pubkey.new_unique()
+    meta = struct.pack("<IQQBB", 1, deactivation_slot, 10, 0, 1) + bytes(authority) + b"\0\0"
+    return meta + b"".join(bytes(a) for a in addresses)
+
+
+def _swap_instruction(accounts: list[Pubkey], user: Pubkey) -> Instruction:
+    metas = [AccountMeta(a, is_signer=False, is_writable=True) for a in accounts]
+    metas.append(AccountMeta(user, is_signer=True, is_writable=True))
+    return Instruction(Pubkey.new_unique(), b"", metas)
+
+
+def test_instruction_data():
+    authority, payer = Pubkey.new_unique(), Pubkey.new_unique()
+    create, table = create_lookup_table_instruction(authority, payer, 123)
+    assert create.data[:12] == struct.pack("<IQ", 0, 123)
+    assert create.accounts[0].pubkey == table
+
+    addresses = [Pubkey.new_unique() for _ in range(3)]
+    extend = extend_lookup_table_instruction(table, authority, payer, addresses)
+    assert extend.data[:12] == struct.pack("<IQ", 2, 3)
+    assert extend.data[12:] == b"".join(bytes(a) for a in addresses)
+
+
+def test_decode_lookup_table():
+    table = Pubkey.new_unique()
+    addresses = [Pubkey.new_unique() for _ in range(3)]
+    resolved = decode_lookup_table(table, _table_data(addresses))
+    assert resolved is not None
+    assert list(resolved.addresses) == addresses
+    assert decode_lookup_table(table, _table_data(addresses, deactivation_slot=5)) is None
+
+
+def test_lookup_table_shrinks_message():
+    user = Keypair()
+    pool_accounts = [Pubkey.new_unique() for _ in range(16)]
+    instruction = _swap_instruction(pool_accounts, user.pubkey())
+    table = AddressLookupTableAccount(Pubkey.new_unique(), pool_accounts)
+
+    inline = MessageV0.try_compile(user.pubkey(), [instruction], [], Hash.default())
+    compact = MessageV0.try_compile(user.pubkey(), [instruction], [table], Hash.default())
+    # 每个账户从 32 字节减少到 1 字节索引，查找表本身占 32 字节地址
+    assert len(bytes(inline)) - len(bytes(compact)) >= 16 * 31 - 34
+
+
+def test_hot_accounts_require_multiple_users(manager):
+    pool = [Pubkey.new_unique() for _ in range(3)]
+    alice, bob = Pubkey.new_unique(), Pubkey.new_unique()
+    own_ata = Pubkey.new_unique()
+
+    manager.record(alice, [_swap_instruction([*pool, own_ata, STATIC_ACCOUNTS[0]], alice)])
+    assert manager.hot_accounts() == []
+    manager.record(bob, [_swap_instruction(pool, bob)])
+    assert manager.hot_accounts() == pool
+
+    shared = Pubkey.new_unique()
+    manager.shared_table = shared
+    manager.tables[shared] = AddressLookupTableAccount(shared, pool[:2])
+    assert manager.hot_accounts() == pool[2:]
+
+
+@pytest.mark.asyncio
+async def test_lookup_tables_use_cache_and_create_in_background(manager):
+    user = Keypair()
+    with patch("trading.lookup_table.settings") as settings:
+        settings.trading.lookup_tables = True
+        manager._ensure_user_table = AsyncMock()
+        assert manager.lookup_tables(user) == []
+        assert manager.lookup_tables(user) == []
+        await asyncio.sleep(0)
+    manager._ensure_user_table.assert_awaited_once_with(user)
+
+    table = Pubkey.new_unique()
+    manager._user_tables[str(user.pubkey())] = table
+    resolved = AddressLookupTableAccount(table, STATIC_ACCOUNTS)
+    manager.tables[table] = resolved
+    assert manager.lookup_tables(user) == [resolved]
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_unconfirmed_tables(manager):
+    ready, pending = Pubkey.new_unique(), Pubkey.new_unique()
+    account = MagicMock()
+    account.data = _table_data(STATIC_ACCOUNTS)
+    resp = MagicMock()
+    resp.value = [account, None]
+    manager.client.get_multiple_accounts.return_value = resp
+
+    await manager.refresh([ready, pending])
+    assert list(manager.tables) == [ready]
+
+
+@pytest.mark.asyncio
+async def test_user_table_saved_after_confirmation(manager):
+    user = Keypair()
+    owner = str(user.pubkey())
+    stale, table = Pubkey.new_unique(), Pubkey.new_unique()
+    redis = AsyncMock()
+    redis.hget.return_value = str(stale)
+    manager.refresh = AsyncMock(side_effect=[[stale], []])
+    manager.create = AsyncMock(return_value=table)
+    with patch("trading.lookup_table.RedisClient") as client:
+        client.get_instance.return_value = redis
+        manager._creating.add(owner)
+        await manager._ensure_user_table(user)
+    # Redis 中的查找表不存在，重新创建
+    manager.create.assert_awaited_once()
+    redis.hset.assert_awaited_once_with("lookup_table:users", owner, str(table))
+    assert manager._user_tables[owner] == table
+
+    # 创建交易未确认时不写入 Redis
+    manager.create = AsyncMock(side_effect=RuntimeError("expired"))
+    redis.reset_mock()
+    redis.hget.return_value = None
+    manager._user_tables.clear()
+    with patch("trading.lookup_table.RedisClient") as client:
+        client.get_instance.return_value = redis
+        await manager._ensure_user_table(user)
+    redis.hset.assert_not_awaited()
+    assert manager._user_tables[owner] is None
+
+
+@pytest.mark.asyncio
+async def test_send_waits_for_confirmation(manager):
+    payer = Keypair()
+    manager.client.send_transaction.return_value = MagicMock(value="sig")
+    manager.confirmer.confirm.return_value = TransactionStatus.EXPIRED
+    with (
+        patch("trading.lookup_table.BlockhashRefresher") as refresher,
+        pytest.raises(RuntimeError),
+    ):
+        refresher.return_value.get = AsyncMock(return_value=(Hash.default(), 0))
+        await manager.extend(Pubkey.new_unique(), payer, [Pubkey.new_unique()])
+    manager.confirmer.confirm.assert_awaited_once_with("sig", timeout=manager.confirm_timeout)
+
+
+@pytest.mark.asyncio
+async def test_shared_table_refreshed_after_extend(manager):
+    shared = Pubkey.new_unique()
+    manager.shared_table = shared
+    manager.tables[shared] = AddressLookupTableAccount(shared, [])
+    pool = [Pubkey.new_unique() for _ in range(2)]
+    for payer in (Pubkey.new_unique(), Pubkey.new_unique()):
+        manager.record(payer, [_swap_instruction(pool, payer)])
+
+    async def extend(table, authority, addresses):
+        manager.tables[table] = AddressLookupTableAccount(table, addresses)
+
+    manager.extend = AsyncMock(side_effect=extend)
+    manager.refresh = AsyncMock(return_value=[])
+    with (
+        patch("trading.lookup_table.settings") as settings,
+        patch("trading.lookup_table.RedisClient"),
+        patch("trading.lookup_table.KeypairCache") as keypairs,
+    ):
+        settings.trading.lookup_table_authority = "authority"
+        keypairs.return_value.get = AsyncMock(return_value=Keypair())
+        await manager._maintain_shared_table()
+        manager.refresh.assert_awaited_once_with([shared])
+        # 已追加的账户不会再次追加
+        await manager._maintain_shared_table()
+    manager.extend.assert_awaited_once()
@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from solders.signature import Signature  # type: ignore
+from trading.pipeline import PipelineMetrics, SendTracker
+from trading.transaction.factory import Swapper
+
+
+@pytest.fixture(autouse=True)
+def reset_singletons():
+    PipelineMetrics._instance = None
+    SendTracker._instance = None
+    yield
+    PipelineMetrics._instance = None
+    SendTracker._instance = None
+
+
+async def _ok():
+    await asyncio.sleep(0.01)
+
+
+async def _fail():
+    await asyncio.sleep(0.01)
+    raise RuntimeError("node rejected")
+
+
+@pytest.mark.asyncio
+async def test_send_success_is_not_retained():
+    tracker = SendTracker()
+    signature = Signature.new_unique()
+    tracker.submit(signature, _ok())
+
+    assert await tracker.wait(signature) is None
+    assert not tracker._tasks
+    assert PipelineMetrics().snapshot()["send"]["error_rate"] == 0
+
+
+@pytest.mark.asyncio
+async def test_send_failure_is_reported():
+    tracker = SendTracker()
+    signature = Signature.new_unique()
+    tracker.submit(signature, _fail())
+    await asyncio.sleep(0.05)
+
+    error = await tracker.wait(signature)
+    assert isinstance(error, RuntimeError)
+    assert await tracker.wait(signature) is None
+    assert PipelineMetrics().snapshot()["send"]["error_rate"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_are_bounded():
+    tracker = SendTracker(max_failed=2)
+    for _ in range(4):
+        tracker.submit(Signature.new_unique(), _fail())
+    await asyncio.sleep(0.05)
+    assert len(tracker._tasks) == 2
+
+
+def test_measure_records_failures():
+    metrics = PipelineMetrics()
+    with metrics.measure("build"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.measure("build"):
+            raise ValueError
+    snapshot = metrics.snapshot()["build"]
+    assert snapshot["count"] == 2
+    assert snapshot["error_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_background_send_retries_connect_errors():
+    signature = Signature.new_unique()
+    transaction = MagicMock()
+    transaction.signatures = [signature]
+    builder = MagicMock()
+    builder.build_swap_transaction = AsyncMock(return_value=transaction)
+    sender = MagicMock()
+    sender.send_transaction = AsyncMock(side_effect=[httpx.ConnectError("refused"), signature])
+
+    with patch("trading.transaction.factory.settings") as settings:
+        settings.trading.tx_simulate = False
+        settings.trading.async_send = True
+        assert await Swapper(builder, sender).swap(MagicMock(), "mint", 1, "buy", 100) == signature
+    assert await SendTracker().wait(signature) is None
+    assert sender.send_transaction.await_count == 2
@@ -0,0 +1,108 @@
+import pytest
+from solbot_common.constants import JITO_TIP_ACCOUNTS, TOKEN_PROGRAM_ID, WSOL
+from trading.settlement.analyzer import analyze_balance_changes
+
+USER = "User1111111111111111111111111111111111111111"
+OTHER = "Other111111111111111111111111111111111111111"
+MINT = "Mint11111111111111111111111111111111111pump"
+RENT = 2_039_280
+FEE = 105_000
+
+
+def _token_balance(account_index: int, owner: str, mint: str, amount: int, decimals=6) -> dict:
+    return {
+        "accountIndex": account_index,
+        "mint": mint,
+        "owner": owner,
+        "programId": str(TOKEN_PROGRAM_ID),
+        "uiTokenAmount": {"amount": str(amount), "decimals": decimals},
+    }
+
+
+def _tx(pre_balances, post_balances, pre_tokens, post_tokens) -> dict:
+    return {
+        "slot": 321,
+        "blockTime": 1_700_000_000,
+        "transaction": {
+            "signatures": ["sig"],
+            "message": {"accountKeys": [OTHER, USER, "Ata", "Pool"]},
+        },
+        "meta": {
+            "err": None,
+            "fee": FEE,
+            "preBalances": pre_balances,
+            "postBalances": post_balances,
+            "preTokenBalances": pre_tokens,
+            "postTokenBalances": post_tokens,
+        },
+    }
+
+
+def test_buy_with_new_token_account():
+    swap = 1_000_000_000
+    tx = _tx(
+        [0, 5_000_000_000, 0, 10**12],
+        [0, 5_000_000_000 - swap - FEE - RENT, RENT, 10**12 + swap],
+        [_token_balance(3, "Pool", MINT, 10**15)],
+        [
+            _token_balance(3, "Pool", MINT, 10**15 - 2_500_000),
+            _token_balance(2, USER, MINT, 2_500_000),
+        ],
+    )
+    result = analyze_balance_changes(tx, USER, MINT)
+
+    assert result["fee"] == FEE
+    assert result["slot"] == 321
+    assert result["timestamp"] == 1_700_000_000
+    assert result["token_change"] == pytest.approx(2.5)
+    assert result["swap_sol_change"] == pytest.approx(1.0)
+    assert result["other_sol_change"] == pytest.approx((FEE + RENT) / 10**9)
+    assert result["sol_change"] == pytest.approx(-(swap + FEE + RENT) / 10**9)
+
+
+def test_sell_closing_token_account():
+    swap = 400_000_000
+    tx = _tx(
+        [0, 1_000_000_000, RENT, 10**12],
+        [0, 1_000_000_000 + swap - FEE + RENT, 0, 10**12 - swap],
+        [_token_balance(2, USER, MINT, 2_500_000)],
+        [],
+    )
+    result = analyze_balance_changes(tx, USER, MINT)
+
+    assert result["token_change"] == pytest.approx(-2.5)
+    assert result["swap_sol_change"] == pytest.approx(0.4)
+    assert result["other_sol_change"] == pytest.approx((FEE - RENT) / 10**9)
+
+
+def test_wrapped_sol_counts_as_sol():
+    swap = 1_000_000_000
+    tx = _tx(
+        [0, 5_000_000_000, RENT + swap, 10**12],
+        [0, 5_000_000_000 - FEE, RENT, 10**12 + swap],
+        [_token_balance(2, USER, str(WSOL), swap, 9)],
+        [_token_balance(2, USER, str(WSOL), 0, 9)],
+    )
+    result = analyze_balance_changes(tx, USER, MINT)
+    assert result["swap_sol_change"] == pytest.approx(1.0)
+
+
+def test_jito_tip_is_not_swapped_sol():
+    swap, tip = 1_000_000_000, 1_000_000
+    tx = _tx(
+        [0, 5_000_000_000, RENT, 10**12, 10**9],
+        [0, 5_000_000_000 - swap - FEE - tip, RENT, 10**12 + swap, 10**9 + tip],
+        [_token_balance(2, USER, MINT, 0)],
+        [_token_balance(2, USER, MINT, 2_500_000)],
+    )
+    # 小费账户通过地址查找表加载
+    tx["meta"]["loadedAddresses"] = {"writable": [str(JITO_TIP_ACCOUNTS[3])], "readonly": []}
+    result = analyze_balance_changes(tx, USER, MINT)
+    assert result["swap_sol_change"] == pytest.approx(1.0)
+    assert result["other_sol_change"] == pytest.approx((FEE + tip) / 10**9)
+
+
+def test_user_not_in_transaction():
+    tx = _tx([0, 0, 0, 0], [0, 0, 0, 0], [], [])
+    with pytest.raises(ValueError):
+        analyze_balance_changes(tx, "Missing11111111111111111111111111111111111", MINT)
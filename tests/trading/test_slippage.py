@@ -0,0 +1,87 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from solbot_common.types.enums import SwapDirection
+from solbot_common.types.tx import TxEvent, TxType
+from trading.slippage import SlippageEstimator, price_impact
+from trading.transaction.protocol import TradingRoute
+
+MINT = "Mint11111111111111111111111111111111111pump"
+
+
+@pytest.fixture
+def estimator():
+    SlippageEstimator._instance = None
+    estimator = SlippageEstimator(reserve_timeout=0.1, calibration_interval=30)
+    yield estimator
+    SlippageEstimator._instance = None
+
+
+def _tx_event(sol_amount: int, token_amount: int) -> TxEvent:
+    return TxEvent(
+        signature="",
+        from_amount=sol_amount,
+        from_decimals=9,
+        to_amount=token_amount,
+        to_decimals=6,
+        mint=MINT,
+        who="",
+        tx_type=TxType.ADD_POSITION,
+        tx_direction="buy",
+        timestamp=0,
+        pre_token_amount=0,
+        post_token_amount=token_amount,
+    )
+
+
+def test_price_impact():
+    assert price_impact(0, 100) == 0
+    assert price_impact(10, 90) == pytest.approx(0.1)
+    assert price_impact(10, 0) == 0
+
+
+def test_volatility_from_tx_events(estimator):
+    assert estimator.volatility(MINT) == 0
+    for price in (100, 110, 100):
+        estimator.observe(_tx_event(price * 1000, 1000))
+    # 对数收益率为 ±ln(1.1)
+    assert estimator.volatility(MINT) == pytest.approx(0.0953, abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_estimate_uses_local_reserves_and_calibrates(estimator):
+    estimator.reserves = AsyncMock(return_value=(TradingRoute.PUMP, 90 * 10**9, 10**15))
+    quote = AsyncMock(return_value={"priceImpactPct": "0.2"})
+    with patch("trading.slippage.QuoteService") as service:
+        service.return_value.get_quote = quote
+        estimate = await estimator.estimate(MINT, 10 * 10**9, SwapDirection.Buy)
+        # 价格影响 10%，倍数 1.5
+        assert estimate.slippage_bps == 1500
+        assert estimate.route == TradingRoute.PUMP
+        # Jupiter 只在后台校准
+        quote.assert_not_awaited()
+        await asyncio.gather(*estimator._tasks)
+
+        quote.assert_awaited_once()
+        # Jupiter 的价格影响是本地的 2 倍，系数向 2 移动 calibration_alpha
+        assert estimator.scales[TradingRoute.PUMP] == pytest.approx(1.2)
+        estimate = await estimator.estimate(MINT, 10 * 10**9, SwapDirection.Buy)
+        assert estimate.slippage_bps == 1800
+        # 校准间隔内不再请求 Jupiter
+        assert not estimator._tasks
+
+
+@pytest.mark.asyncio
+async def test_estimate_clamps_and_falls_back(estimator):
+    estimator.calibration_interval = 0
+    estimator.reserves = AsyncMock(return_value=(TradingRoute.RAYDIUM_V4, 10**15, 10**15))
+    assert (await estimator.estimate(MINT, 1000, SwapDirection.Sell)).slippage_bps == 250
+
+    async def slow(*args):
+        await asyncio.sleep(1)
+
+    estimator.reserves = slow
+    estimate = await estimator.estimate(MINT, 1000, "sell")  # type: ignore[arg-type]
+    assert estimate.slippage_bps == 500 and estimate.route is None
+    assert estimator.stats()["fallbacks"] == 1
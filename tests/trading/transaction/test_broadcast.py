@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from solbot_common.models.swap_record import TransactionStatus
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from trading.transaction.sender import BroadcastPath, BroadcastSender
+
+
+def _transaction() -> VersionedTransaction:
+    keypair = Keypair()
+    message = MessageV0.try_compile(keypair.pubkey(), [], [], Hash.new_unique())
+    return VersionedTransaction(message, [keypair])
+
+
+def _path(name: str, delay: float, error: Exception | None = None, jito: bool = False):
+    calls = []
+
+    async def submit(encoded_tx: str) -> None:
+        calls.append(encoded_tx)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+
+    path = BroadcastPath(name, submit, jito=jito)
+    path.calls = calls  # type: ignore
+    return path
+
+
+def _sender(paths, landed_after: int = 1) -> BroadcastSender:
+    confirmer = MagicMock()
+
+    async def confirm(signature, timeout):
+        # 提交次数达到 landed_after 后上链
+        while sum(len(path.calls) for path in paths) < landed_after:
+            await asyncio.sleep(0.001)
+        return TransactionStatus.SUCCESS
+
+    confirmer.confirm = AsyncMock(side_effect=confirm)
+    sender = BroadcastSender(
+        AsyncMock(),
+        rpc_endpoints=[],
+        jito_engines=[],
+        use_gmgn=False,
+        rebroadcast_interval=0.01,
+        rebroadcast_paths=1,
+        max_rebroadcast_time=1,
+        confirmer=confirmer,
+    )
+    sender.paths = paths
+    return sender
+
+
+@pytest.mark.asyncio
+async def test_returns_on_first_accept_and_credits_path():
+    fast, slow = _path("fast", 0), _path("slow", 0.3)
+    sender = _sender([slow, fast])
+    tx = _transaction()
+
+    signature = await sender.send_transaction(tx)
+    assert signature == tx.signatures[0]
+    await asyncio.gather(*sender._broadcasts.values())
+
+    assert len(slow.calls) == 1
+    assert fast.wins == 1 and slow.wins == 0
+    assert fast.landed == slow.landed == 1
+
+
+@pytest.mark.asyncio
+async def test_dedupes_by_signature():
+    path = _path("rpc", 0)
+    sender = _sender([path], landed_after=3)
+    tx = _transaction()
+
+    await sender.send_transaction(tx)
+    await sender.send_transaction(tx)
+    assert len(path.calls) == 1
+    await asyncio.gather(*sender._broadcasts.values())
+
+
+@pytest.mark.asyncio
+async def test_rebroadcasts_until_landed():
+    path = _path("rpc", 0)
+    sender = _sender([path], landed_after=3)
+
+    await sender.send_transaction(_transaction())
+    await asyncio.gather(*sender._broadcasts.values())
+    assert len(path.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_skips_jito_without_tip_and_raises_when_all_fail():
+    rpc = _path("rpc", 0, error=RuntimeError("rejected"))
+    jito = _path("jito", 0, jito=True)
+    sender = _sender([rpc, jito])
+
+    with pytest.raises(RuntimeError):
+        await sender.send_transaction(_transaction())
+    assert not jito.calls
+    assert rpc.stats.error_rate == 1
+
+
+@pytest.mark.asyncio
+async def test_stops_when_confirmation_expires():
+    path = _path("rpc", 0)
+    sender = _sender([path])
+    sender.confirmer.confirm.side_effect = None
+    sender.confirmer.confirm.return_value = TransactionStatus.EXPIRED
+
+    await sender.send_transaction(_transaction())
+    await asyncio.gather(*sender._broadcasts.values())
+    assert path.wins == path.landed == 0
+    # 不再逐笔查询签名状态和区块高度
+    sender.rpc_client.get_signature_statuses.assert_not_awaited()
+    sender.rpc_client.get_block_height.assert_not_awaited()
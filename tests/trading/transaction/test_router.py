@@ -0,0 +1,110 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from solana.rpc.async_api import AsyncClient
+from solbot_common.types.enums import SwapDirection
+from trading.transaction.builders.base import TransactionBuilder
+from trading.transaction.protocol import SwapQuote, TradingRoute
+from trading.transaction.router import TradingRouter, net_amount_out
+
+
+class QuoteBuilder(TransactionBuilder):
+    """用于测试的报价构建器"""
+
+    def __init__(self, route: TradingRoute, amount_out: int | None, delay: float = 0):
+        super().__init__(AsyncMock(spec=AsyncClient))
+        self.route = route
+        self.amount_out = amount_out
+        self.delay = delay
+
+    async def build_swap_transaction(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def quote(self, token_address, amount_in, swap_direction):
+        await asyncio.sleep(self.delay)
+        if self.amount_out is None:
+            return None
+        return SwapQuote(self.route, amount_in, self.amount_out)
+
+
+def _router(*builders: QuoteBuilder, timeout: float = 0.1) -> TradingRouter:
+    return TradingRouter({b.route: b for b in builders}, timeout=timeout)
+
+
+@pytest.mark.asyncio
+async def test_select_best_output():
+    router = _router(
+        QuoteBuilder(TradingRoute.PUMP, 1_000),
+        QuoteBuilder(TradingRoute.RAYDIUM_V4, 1_010),
+    )
+    decision = await router.select(
+        "mint",
+        10**9,
+        SwapDirection.Buy,
+        [TradingRoute.PUMP, TradingRoute.RAYDIUM_V4],
+        fallback=TradingRoute.PUMP,
+    )
+    assert decision.route == TradingRoute.RAYDIUM_V4
+    assert not decision.fallback
+    assert set(decision.latencies) == {TradingRoute.PUMP, TradingRoute.RAYDIUM_V4}
+    assert router.wins[TradingRoute.RAYDIUM_V4] == 1
+
+
+@pytest.mark.asyncio
+async def test_local_quote_skips_dex():
+    dex = QuoteBuilder(TradingRoute.DEX, 1_010)
+    dex.quote = AsyncMock()
+    router = _router(QuoteBuilder(TradingRoute.RAYDIUM_V4, 1_000), dex)
+    decision = await router.select(
+        "mint",
+        10**9,
+        SwapDirection.Buy,
+        [TradingRoute.RAYDIUM_V4, TradingRoute.DEX],
+        fallback=TradingRoute.RAYDIUM_V4,
+    )
+    assert decision.route == TradingRoute.RAYDIUM_V4
+    assert not decision.fallback
+    dex.quote.assert_not_called()
+    assert set(decision.latencies) == {TradingRoute.RAYDIUM_V4}
+
+
+@pytest.mark.asyncio
+async def test_dex_quoted_when_local_has_no_route():
+    router = _router(
+        QuoteBuilder(TradingRoute.RAYDIUM_V4, None),
+        QuoteBuilder(TradingRoute.DEX, 1_000),
+    )
+    decision = await router.select(
+        "mint",
+        10**9,
+        SwapDirection.Buy,
+        [TradingRoute.RAYDIUM_V4, TradingRoute.DEX],
+        fallback=TradingRoute.RAYDIUM_V4,
+    )
+    assert decision.route == TradingRoute.DEX
+    assert not decision.fallback
+    assert decision.errors == {TradingRoute.RAYDIUM_V4: "no route"}
+
+
+def test_net_amount_out_deducts_priority_fee():
+    quote = SwapQuote(TradingRoute.PUMP, 10**9, 1_000_000)
+    # 买入时按总花费折算
+    assert net_amount_out(quote, SwapDirection.Buy, 10**7) == pytest.approx(990_099, abs=1)
+    quote = SwapQuote(TradingRoute.PUMP, 1_000_000, 10**9)
+    assert net_amount_out(quote, SwapDirection.Sell, 10**7) == 10**9 - 10**7
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_no_route_fall_back():
+    router = _router(
+        QuoteBuilder(TradingRoute.PUMP, None),
+        QuoteBuilder(TradingRoute.DEX, 1_000, delay=1),
+    )
+    decision = await router.select(
+        "mint", 10**9, SwapDirection.Sell, list(router.builders), fallback=TradingRoute.PUMP
+    )
+    assert decision.route == TradingRoute.PUMP
+    assert decision.fallback
+    assert decision.errors == {TradingRoute.PUMP: "no route", TradingRoute.DEX: "timeout"}
+    assert router.fallbacks == 1
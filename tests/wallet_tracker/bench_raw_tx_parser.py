@@ -0,0 +1,58 @@
+"""RawTXParser 微基准测试
+
+遍历 tx_examples/raw 下的所有交易，统计单笔交易完整解析（新建解析器 + parse）的耗时。
+
+Usage:
+    python tests/wallet_tracker/bench_raw_tx_parser.py [-n NUMBER] [-r REPEAT]
+"""
+
+import argparse
+import json
+import timeit
+from pathlib import Path
+
+from wallet_tracker.parser.raw_tx import RawTXParser
+
+RAW_TX_DIR = Path(__file__).parent / "tx_examples" / "raw"
+
+
+def load_raw_txs() -> dict[str, dict]:
+    txs = {}
+    for path in sorted(RAW_TX_DIR.glob("*.json")):
+        with open(path) as f:
+            tx = json.load(f).get("result")
+        if tx and tx.get("transaction"):
+            txs[path.stem] = tx
+    return txs
+
+
+def parse_once(tx: dict) -> None:
+    parser = RawTXParser(tx)
+    # 单签名者交易的 who 即第一个账户，跳过需要查询数据库的 set_who
+    signer = tx["transaction"]["message"]["accountKeys"][0]
+    parser.who = signer if isinstance(signer, str) else signer["pubkey"]
+    try:
+        parser.parse()
+    except Exception:
+        pass
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("-n", "--number", type=int, default=2000, help="每轮解析次数")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=5, help="轮数，取最快的一轮")
+    args = arg_parser.parse_args()
+
+    total = 0.0
+    for name, tx in load_raw_txs().items():
+        timings = timeit.repeat(
+            lambda tx=tx: parse_once(tx), number=args.number, repeat=args.repeat
+        )
+        per_parse = min(timings) / args.number
+        total += per_parse
+        print(f"{name:<12} {per_parse * 1e6:8.2f} us")
+    print(f"{'total':<12} {total * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from wallet_tracker.active_wallets import ActiveWalletRegistry
+
+
+@pytest.fixture
+def mock_queries():
+    with (
+        patch(
+            "wallet_tracker.active_wallets.Monitor.get_active_wallet_addresses",
+            new=AsyncMock(return_value=["wallet_a", "wallet_b"]),
+        ) as monitor_query,
+        patch(
+            "wallet_tracker.active_wallets.CopyTradeService.get_active_wallet_addresses",
+            new=AsyncMock(return_value=["wallet_b", "wallet_c"]),
+        ) as copytrade_query,
+    ):
+        yield monitor_query, copytrade_query
+
+
+@pytest.mark.asyncio
+async def test_ensure_loaded_queries_once(mock_queries):
+    monitor_query, copytrade_query = mock_queries
+    registry = ActiveWalletRegistry()
+    assert not registry.loaded
+
+    wallets = await registry.ensure_loaded()
+    await registry.ensure_loaded()
+
+    assert wallets == frozenset({"wallet_a", "wallet_b", "wallet_c"})
+    assert monitor_query.await_count == 1
+    assert copytrade_query.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_incremental_updates(mock_queries):
+    registry = ActiveWalletRegistry()
+    await registry.load()
+    snapshot = registry.wallets
+
+    registry.add("wallet_d")
+    registry.discard("wallet_a")
+
+    assert "wallet_d" in registry
+    assert "wallet_a" not in registry
+    assert len(registry) == 3
+    # 旧的快照不受影响
+    assert snapshot == frozenset({"wallet_a", "wallet_b", "wallet_c"})
@@ -0,0 +1,66 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from wallet_tracker.dedup import SignatureDeduplicator
+
+
+@pytest.mark.asyncio
+async def test_local_dedup():
+    dedup = SignatureDeduplicator(max_size=2)
+    assert not await dedup.is_duplicate("a")
+    # 正在处理中的签名也视为重复
+    assert await dedup.is_duplicate("a")
+    await dedup.finish("a", True)
+    assert await dedup.is_duplicate("a")
+    for signature in ("b", "c"):
+        assert not await dedup.is_duplicate(signature)
+        await dedup.finish(signature, True)
+    # 超出容量，最早的签名被淘汰
+    assert not await dedup.is_duplicate("a")
+    assert dedup.stats.local_hits == 2
+    assert dedup.stats.misses == 4
+    assert len(dedup) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_signature_is_released():
+    dedup = SignatureDeduplicator()
+    assert not await dedup.is_duplicate("a")
+    await dedup.finish("a", False)
+    assert not await dedup.is_duplicate("a")
+    assert len(dedup) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_dedup_expires():
+    dedup = SignatureDeduplicator(ttl=10)
+    with patch("wallet_tracker.dedup.time.monotonic", return_value=100):
+        assert not await dedup.is_duplicate("a")
+        await dedup.finish("a", True)
+    with patch("wallet_tracker.dedup.time.monotonic", return_value=105):
+        assert await dedup.is_duplicate("a")
+    with patch("wallet_tracker.dedup.time.monotonic", return_value=111):
+        assert not await dedup.is_duplicate("a")
+
+
+@pytest.mark.asyncio
+async def test_redis_dedup():
+    redis = AsyncMock()
+    redis.set.side_effect = [True, None, True]
+    dedup = SignatureDeduplicator(redis, ttl=60)
+
+    assert not await dedup.is_duplicate("a")
+    redis.set.assert_awaited_once_with("tx:dedup:a", 1, nx=True, ex=60)
+    await dedup.finish("a", True)
+    # 本地命中时不访问 Redis
+    assert await dedup.is_duplicate("a")
+    assert redis.set.await_count == 1
+    # 其他进程已处理过
+    assert await dedup.is_duplicate("b")
+    assert dedup.stats.redis_hits == 1
+    assert dedup.stats.hits == 2
+
+    # 处理失败时释放 Redis 中的占用
+    assert not await dedup.is_duplicate("c")
+    await dedup.finish("c", False)
+    redis.delete.assert_awaited_once_with("tx:dedup:c")
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.geyser.backfill import SignatureBackfiller
+from wallet_tracker.geyser.shard import GeyserShard
+
+WALLET = str(Pubkey.new_unique())
+
+
+def status(signature: str, slot: int, err=None):
+    return SimpleNamespace(signature=signature, slot=slot, err=err)
+
+
+@pytest.fixture
+def backfiller():
+    backfiller = SignatureBackfiller("http://localhost:8899", limit=2, max_pages=5)
+    # getSignaturesForAddress 按时间从新到旧返回
+    pages = [
+        [status("e", 105), status("d", 104, err="failed")],
+        [status("c", 103), status("b", 100)],
+        [status("a", 99)],
+    ]
+    backfiller.client = AsyncMock()
+    backfiller.client.get_signatures_for_address.side_effect = [
+        SimpleNamespace(value=page) for page in pages
+    ]
+    backfiller.fetcher = AsyncMock()
+    backfiller.fetcher.fetch.side_effect = lambda sig: {"signature": sig}
+    return backfiller
+
+
+@pytest.mark.asyncio
+async def test_get_signatures_after(backfiller):
+    signatures = await backfiller.get_signatures_after(WALLET, 100)
+    # 跳过失败的交易，到达 after_slot 之前的交易后停止翻页
+    assert signatures == ["b", "c", "e"]
+    assert backfiller.client.get_signatures_for_address.await_count == 3
+    assert backfiller.client.get_signatures_for_address.await_args.kwargs["before"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_backfill_pushes_oldest_first(backfiller):
+    push = AsyncMock()
+    assert await backfiller.backfill([WALLET], 101, push) == 2
+    assert [call.args[0] for call in push.await_args_list] == [
+        {"signature": "c", "backfilled": True},
+        {"signature": "e", "backfilled": True},
+    ]
+
+
+def test_backoff_delay_is_capped():
+    shard = GeyserShard(0, "localhost:443", "", base_delay=1, max_delay=8)
+    for attempts in range(10):
+        shard.attempts = attempts
+        assert 0 <= shard.backoff_delay() <= min(8, 2**attempts)
+    shard.attempts = 5000
+    assert 0 <= shard.backoff_delay() <= 8
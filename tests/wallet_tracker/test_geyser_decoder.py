@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import base58
+import pytest
+from wallet_tracker.geyser.decoder import decode_transaction_update
+from wallet_tracker.parser.raw_tx import RawTXParser
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def build_update(tx: dict) -> geyser_pb2.SubscribeUpdateTransaction:
+    """将 RPC 格式的交易详情还原为 geyser 推送的 protobuf 结构"""
+    update = geyser_pb2.SubscribeUpdateTransaction(slot=tx["slot"])
+    info = update.transaction
+    message = tx["transaction"]["message"]
+    info.signature = base58.b58decode(tx["transaction"]["signatures"][0])
+    info.transaction.signatures.extend(
+        base58.b58decode(sig) for sig in tx["transaction"]["signatures"]
+    )
+    info.transaction.message.header.num_required_signatures = message["header"][
+        "numRequiredSignatures"
+    ]
+    info.transaction.message.account_keys.extend(
+        base58.b58decode(key) for key in message["accountKeys"]
+    )
+
+    meta = tx["meta"]
+    info.meta.fee = meta["fee"]
+    info.meta.pre_balances.extend(meta["preBalances"])
+    info.meta.post_balances.extend(meta["postBalances"])
+    info.meta.log_messages.extend(meta["logMessages"])
+    for field, balances in (
+        (info.meta.pre_token_balances, meta["preTokenBalances"]),
+        (info.meta.post_token_balances, meta["postTokenBalances"]),
+    ):
+        for balance in balances:
+            token_balance = field.add()
+            token_balance.account_index = balance["accountIndex"]
+            token_balance.mint = balance["mint"]
+            token_balance.owner = balance["owner"]
+            token_balance.program_id = balance["programId"]
+            token_balance.ui_token_amount.amount = balance["uiTokenAmount"]["amount"]
+            token_balance.ui_token_amount.decimals = balance["uiTokenAmount"]["decimals"]
+    return update
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["raw/open", "raw/open3", "raw/reduce", "raw/close"])
+async def test_decode_transaction_update(name: str):
+    tx = read_raw_tx(name)
+    decoded = decode_transaction_update(build_update(tx), block_time=tx["blockTime"])
+
+    assert decoded["slot"] == tx["slot"]
+    assert decoded["transaction"]["signatures"] == tx["transaction"]["signatures"]
+    account_keys = decoded["transaction"]["message"]["accountKeys"]
+    assert account_keys[0] == tx["transaction"]["message"]["accountKeys"][0]
+
+    expected_parser = RawTXParser(tx)
+    await expected_parser.set_who()
+    parser = RawTXParser(decoded)
+    await parser.set_who()
+    assert parser.parse() == expected_parser.parse()
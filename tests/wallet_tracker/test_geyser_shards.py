@@ -0,0 +1,59 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.geyser.tx_subscriber import TransactionDetailSubscriber
+
+WALLETS = [Pubkey.new_unique() for _ in range(20)]
+
+
+@pytest.fixture
+def subscriber():
+    subscriber = TransactionDetailSubscriber(
+        "localhost:443",
+        "",
+        AsyncMock(),
+        [],
+        num_shards=4,
+        batch_window=0.01,
+    )
+    for shard in subscriber.shards:
+        shard.resubscribe = AsyncMock()
+    return subscriber
+
+
+@pytest.mark.asyncio
+async def test_changes_are_batched_per_shard(subscriber):
+    for wallet in WALLETS:
+        await subscriber.subscribe_wallet_transactions(wallet)
+    await asyncio.sleep(0.05)
+
+    assert subscriber.subscribed_wallets == {str(wallet) for wallet in WALLETS}
+    for shard in subscriber.shards:
+        assert shard.resubscribe.await_count == (1 if shard.wallets else 0)
+
+
+@pytest.mark.asyncio
+async def test_only_affected_shard_is_resubscribed(subscriber):
+    for wallet in WALLETS:
+        await subscriber.subscribe_wallet_transactions(wallet)
+    await asyncio.sleep(0.05)
+    for shard in subscriber.shards:
+        shard.resubscribe.reset_mock()
+
+    await subscriber.unsubscribe_wallet_transactions(WALLETS[0])
+    await asyncio.sleep(0.05)
+
+    affected = subscriber.shard_of(str(WALLETS[0]))
+    assert str(WALLETS[0]) not in subscriber.subscribed_wallets
+    for shard in subscriber.shards:
+        assert shard.resubscribe.await_count == (1 if shard is affected else 0)
+
+
+def test_shard_lags(subscriber):
+    subscriber.shards[0].last_slot = 100
+    subscriber.shards[1].last_slot = 97
+    lags = {lag["shard"]: lag for lag in subscriber.shard_lags()}
+    assert lags["shard-0"]["slot_lag"] == 0
+    assert lags["shard-1"]["slot_lag"] == 3
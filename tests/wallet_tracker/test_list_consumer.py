@@ -0,0 +1,79 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from wallet_tracker.list_consumer import RedisListConsumer
+
+
+@pytest.fixture
+def mock_redis():
+    redis = AsyncMock()
+    redis.brpop.return_value = ("tx", "a")
+    redis.rpop.return_value = ["b", "c"]
+    redis.llen.return_value = 5
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_fetch_batch(mock_redis):
+    consumer = RedisListConsumer(mock_redis, "tx", AsyncMock(), batch_size=3)
+    assert await consumer.fetch_batch() == ["a", "b", "c"]
+    mock_redis.rpop.assert_awaited_once_with("tx", 2)
+
+
+@pytest.mark.asyncio
+async def test_fetch_batch_timeout(mock_redis):
+    mock_redis.brpop.return_value = None
+    consumer = RedisListConsumer(mock_redis, "tx", AsyncMock())
+    assert await consumer.fetch_batch() == []
+    mock_redis.rpop.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_workers_handle_all_items(mock_redis):
+    handled = []
+
+    async def handler(item):
+        handled.append(item)
+
+    batches = [("tx", "a")]
+
+    async def brpop(key, timeout):
+        if batches:
+            return batches.pop()
+        # 列表为空时模拟 BRPOP 阻塞等待
+        await asyncio.sleep(0.01)
+        return None
+
+    mock_redis.brpop.side_effect = brpop
+    consumer = RedisListConsumer(mock_redis, "tx", handler, report_interval=0)
+    task = asyncio.create_task(consumer.start(num_workers=2))
+    await asyncio.sleep(0.05)
+    await consumer.stop()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert sorted(handled) == ["a", "b", "c"]
+    assert await consumer.depth() == (5, 0)
+
+
+@pytest.mark.asyncio
+async def test_stop_pushes_back_pending(mock_redis):
+    consumer = RedisListConsumer(mock_redis, "tx", AsyncMock())
+    for item in await consumer.fetch_batch():
+        consumer.queue.put_nowait(item)
+    await consumer.stop()
+    # "a" 最先取出，放回后应位于列表最右侧
+    mock_redis.rpush.assert_awaited_once_with("tx", "c", "b", "a")
+
+
+@pytest.mark.asyncio
+async def test_stop_pushes_back_batch_blocked_on_full_queue(mock_redis):
+    consumer = RedisListConsumer(mock_redis, "tx", AsyncMock(), queue_size=1)
+    consumer.is_running = True
+    fetcher = asyncio.create_task(consumer._fetcher())
+    consumer.tasks = [fetcher]
+    await asyncio.sleep(0.01)
+    # 队列只能放下 "a"，"b" 和 "c" 仍在拉取协程手中
+    assert consumer.queue.qsize() == 1
+    await consumer.stop()
+    mock_redis.rpush.assert_awaited_once_with("tx", "c", "b", "a")
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+import pytest
+from wallet_tracker.exceptions import NotSwapTransaction
+from wallet_tracker.parse_pool import ParsePool, peek_tx_header
+from wallet_tracker.parser.raw_tx import RawTXParser
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        return json.load(f)["result"]
+
+
+def test_shard_of_is_stable():
+    pool = ParsePool(4, report_interval=0)
+    who = "BQWWFhzBnb1T4vD7SC8dS9qE1zrWWXe1LikeaAG5iuKm"
+    assert pool.shard_of(who) is pool.shard_of(who)
+
+
+def test_peek_tx_header():
+    tx = read_raw_tx("raw/open")
+    header = peek_tx_header(json.dumps(tx).encode())
+    assert header is not None
+    assert header["blockTime"] == tx["blockTime"]
+    assert header["transaction"]["signatures"] == tx["transaction"]["signatures"]
+    message = header["transaction"]["message"]
+    assert message["accountKeys"] == tx["transaction"]["message"]["accountKeys"]
+    assert peek_tx_header(b'{"blockTime": 1}') is None
+
+
+@pytest.mark.asyncio
+async def test_parse_pool():
+    pool = ParsePool(2, report_interval=0)
+    pool.start()
+    try:
+        for name in ["raw/open", "raw/reduce", "raw/close"]:
+            tx = read_raw_tx(name)
+            parser = RawTXParser(tx)
+            await parser.set_who()
+            assert await pool.parse(tx, parser.who) == parser.parse()
+            # 原始 JSON 在子进程中解码
+            assert await pool.parse(json.dumps(tx).encode(), parser.who) == parser.parse()
+            assert not parser.parse().backfilled
+
+        # 补齐的交易经过原始 JSON 解析后仍带有标记
+        tx = read_raw_tx("raw/open")
+        tx["backfilled"] = True
+        parser = RawTXParser(tx)
+        await parser.set_who()
+        tx_event = await pool.parse(json.dumps(tx).encode(), parser.who)
+        assert tx_event is not None and tx_event.backfilled
+
+        tx = read_raw_tx("raw/open")
+        tx["meta"]["preTokenBalances"] = []
+        with pytest.raises(NotSwapTransaction):
+            await pool.parse(tx, tx["transaction"]["message"]["accountKeys"][0])
+    finally:
+        await pool.stop()
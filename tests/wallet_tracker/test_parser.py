@@ -1,4 +1,6 @@
+import gc
 import json
+import weakref
 from pathlib import Path
 
 import pytest
@@ -185,3 +187,15 @@ def test_parse_raw_tx(
     assert parsed.who == expected_who
     assert parsed.tx_type == expected_tx_type
     assert parsed.program_id == expected_program_id
+
+
+def test_parser_is_not_retained_after_parse():
+    tx = read_raw_tx("raw/open")
+    parser = RawTXParser(tx)
+    parser.who = tx["transaction"]["message"]["accountKeys"][0]
+    assert parser.parse() is parser.parse()
+
+    ref = weakref.ref(parser)
+    del parser
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson as json
+import pytest
+from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL, TX_DETAIL_TAP_CHANNEL
+from wallet_tracker.pipeline import TxDetailPipeline
+from wallet_tracker.tx_worker import TransactionWorker
+
+TX_DETAIL = {"transaction": {"signatures": ["sig"]}}
+
+
+@pytest.fixture
+def redis():
+    redis = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=pipe)
+    context.__aexit__ = AsyncMock(return_value=None)
+    redis.pipeline = MagicMock(return_value=context)
+    redis.pipe = pipe
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_redis_mode_pushes_to_list(redis):
+    pipeline = TxDetailPipeline(redis)
+    assert not pipeline.in_process
+    await pipeline.push(TX_DETAIL)
+    redis.lpush.assert_awaited_once_with(NEW_TX_DETAIL_CHANNEL, json.dumps(TX_DETAIL))
+
+
+@pytest.mark.asyncio
+async def test_in_process_mode_enqueues_without_redis(redis):
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    pipeline = TxDetailPipeline(redis, queue)
+    await pipeline.push(TX_DETAIL)
+    assert queue.get_nowait() is TX_DETAIL
+    redis.lpush.assert_not_awaited()
+    redis.pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_durability_tap_writes_in_background(redis):
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    pipeline = TxDetailPipeline(redis, queue, durability_tap=True)
+    await pipeline.push(TX_DETAIL)
+    assert queue.qsize() == 1
+    await asyncio.gather(*pipeline.task_pool)
+    redis.pipe.lpush.assert_called_once_with(TX_DETAIL_TAP_CHANNEL, json.dumps(TX_DETAIL))
+    redis.pipe.execute.assert_awaited_once()
+    assert not pipeline.task_pool
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure(redis):
+    queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=1)
+    pipeline = TxDetailPipeline(redis, queue)
+    await pipeline.push(TX_DETAIL)
+    blocked = asyncio.create_task(pipeline.push(TX_DETAIL))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    queue.get_nowait()
+    await asyncio.wait_for(blocked, timeout=1)
+    assert queue.qsize() == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_workers_dispatch_and_shutdown(redis):
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    worker = TransactionWorker(redis, queue=queue)
+    handled = []
+
+    async def process_transaction(tx_detail: dict):
+        if tx_detail.get("fail"):
+            raise ValueError("boom")
+        handled.append(tx_detail["id"])
+
+    worker.process_transaction = process_transaction  # type: ignore[method-assign]
+    task = asyncio.create_task(worker.start(num_workers=2))
+    await asyncio.sleep(0)
+    assert len(worker.workers) == 2
+
+    for i in range(5):
+        await queue.put({"id": i})
+    # 处理失败的交易不会使 worker 退出
+    await queue.put({"fail": True})
+    await queue.put({"id": 5})
+    await asyncio.wait_for(queue.join(), timeout=1)
+    assert sorted(handled) == list(range(6))
+
+    await worker.stop()
+    await asyncio.wait_for(task, timeout=1)
+    assert not worker.is_running
+    assert all(w.done() for w in worker.workers)
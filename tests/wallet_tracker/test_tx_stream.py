@@ -0,0 +1,92 @@
+from unittest.mock import AsyncMock
+
+import orjson as json
+import pytest
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.wss.tx_stream import (
+    StreamNotSupported,
+    TransactionStreamSubscriber,
+    tx_details_from_notification,
+)
+
+WALLET = Pubkey.new_unique()
+
+
+def stream_tx(signature: str, err=None) -> dict:
+    return {
+        "transaction": {"signatures": [signature], "message": {"accountKeys": [str(WALLET)]}},
+        "meta": {"err": err, "preBalances": [1], "postBalances": [2]},
+        "version": 0,
+    }
+
+
+def test_transaction_notification():
+    result = {"signature": "a", "slot": 10, "transaction": stream_tx("a")}
+    (tx_detail,) = tx_details_from_notification("transactionNotification", result)
+    assert tx_detail["slot"] == 10
+    assert tx_detail["transaction"]["signatures"] == ["a"]
+    assert tx_detail["meta"]["postBalances"] == [2]
+    assert tx_detail["blockTime"] > 0
+
+
+def test_block_notification_skips_failed():
+    result = {
+        "context": {"slot": 11},
+        "value": {
+            "slot": 11,
+            "block": {
+                "blockTime": 1700000000,
+                "transactions": [stream_tx("a"), stream_tx("b", err={"InstructionError": []})],
+            },
+        },
+    }
+    tx_details = tx_details_from_notification("blockNotification", result)
+    assert [tx["transaction"]["signatures"][0] for tx in tx_details] == ["a"]
+    assert tx_details[0]["blockTime"] == 1700000000
+
+
+@pytest.fixture
+def subscriber():
+    subscriber = TransactionStreamSubscriber("https://localhost", AsyncMock(), [WALLET])
+    subscriber.pipeline = AsyncMock()
+    subscriber.websocket = AsyncMock()
+    return subscriber
+
+
+@pytest.mark.asyncio
+async def test_notification_is_pushed(subscriber):
+    await subscriber._subscribe(str(WALLET))
+    request = json.loads(subscriber.websocket.send.await_args.args[0])
+    assert request["method"] == "transactionSubscribe"
+    assert request["params"][0]["accountInclude"] == [str(WALLET)]
+
+    await subscriber.handle_message({"id": request["id"], "result": 7})
+    assert subscriber.subscription_ids == {str(WALLET): 7}
+
+    result = {"signature": "a", "slot": 10, "transaction": stream_tx("a")}
+    await subscriber.handle_message(
+        {"method": "transactionNotification", "params": {"subscription": 7, "result": result}}
+    )
+    subscriber.pipeline.push.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_method_not_found(subscriber):
+    await subscriber._subscribe(str(WALLET))
+    request = json.loads(subscriber.websocket.send.await_args.args[0])
+    with pytest.raises(StreamNotSupported):
+        await subscriber.handle_message(
+            {"id": request["id"], "error": {"code": -32601, "message": "Method not found"}}
+        )
+
+
+@pytest.mark.asyncio
+async def test_fallback_receives_changes(subscriber):
+    fallback = AsyncMock()
+    subscriber.fallback = lambda wallets: fallback
+    await subscriber._start_fallback()
+    fallback.start.assert_awaited_once()
+
+    wallet = Pubkey.new_unique()
+    await subscriber.subscribe_wallet_transactions(wallet)
+    fallback.subscribe_wallet_transactions.assert_awaited_once_with(wallet)